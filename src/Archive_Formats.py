@@ -10,6 +10,34 @@ OTIK archive formats module
 ...      DataSection (variable)
 ...      IndexSection (variable)
 
+Запись DataTable (HeaderFile), выровнена по 8 байт:
+    [fixed 38 bytes][Name][CodeTable 256 bytes, если файл сжат Хаффманом целиком (F_HUFFMAN без F_BLOCKS и F_SOLID)]
+
+IndexSection (флаг F_INDEX_TABLE в ArchiveHeader.flags) — после DataSection, на неё ссылается IndexSectOffset:
+    [fixed 16 bytes][IndexEntry 40 bytes] * FileCount, записи отсортированы по NameHash
+    NameHash — первые 8 байт BLAKE2b от имени файла (utf-8); поиск записи — двоичный, без разбора DataTable.
+
+Блочный режим (флаг F_BLOCKS в HeaderFile.flags):
+данные файла в DataSection — последовательность независимо закодированных блоков
+(файлы крупнее WHOLE_FILE_MAX_SIZE всегда хранятся так и пишутся/читаются поблочно)
+    [BlockHeader 16 bytes][CodeTable 256 bytes, если блок сжат Хаффманом][payload]
+
+Solid-режим (флаг F_SOLID): все файлы закодированы одной таблицей длин из CodeTable заголовка архива;
+данные файлов идут в DataSection подряд, каждый файл начинается с границы байта.
+
+Дозапись (--append): новые данные пишутся после конца архива, за ними — новая DataTable
+(на неё указывает DataTableOffset) и IndexSection; старые DataTable/IndexSection остаются
+внутри DataSection как неиспользуемые байты, заголовок перезаписывается последним.
+
+Потоковый архив (флаг F_STREAM, pack -o -) пишется за один проход без перемотки:
+    [Header + CodeTable: ArchiveSize = 0, DataCrc32 = 0, FileCount — число файлов]
+    DataSection: для каждого файла [локальная запись HeaderFile (CRC32 = 0), выровнена по 8][данные]
+        в блочном режиме данные завершаются пустым блоком (BlockHeader с RawSize = 0);
+        дедупликации нет — читатель потока не может вернуться к данным оригинала
+    [DataTable][IndexSection][Trailer: итоговый Header + CodeTable, META_SIZE байт]
+Читатель файла берёт заголовок из трейлера (на DataTable указывает DataTableOffset);
+читатель потока (unpack -i -) идёт по локальным записям и сверяет CRC с DataTable в конце.
+
 Примечания:
 - Для файлов с OriginalSize == 0 DataOffset устанавливается в 0, и данных в DataSection нет.
 - HeaderCrc32 считается по (header 96 bytes + code_table 256 bytes) при обнулённом поле HeaderCrc32.
@@ -17,10 +45,11 @@ OTIK archive formats module
 # =================================================================================================================
 
 from __future__ import annotations
+import hashlib
 import struct
 import zlib
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 # =================================================================================================================
 
@@ -29,14 +58,27 @@ MAX_FILES               = 10000
 MAX_PADDING             = 7
 MAX_CONTROL_BITS        = 10
 MAX_FILE_NAME_LEN       = 0x111
-MAX_FILE_SIZE           = 2 << 30   # file size lim 4GB
+MAX_FILE_SIZE           = 1 << 40   # file size lim 1TB (размеры в HeaderFile — uint64)
+WHOLE_FILE_MAX_SIZE     = 256 << 20 # файлы крупнее кодируются блоками (F_BLOCKS) независимо от --block-size
+
+# =================================================================================================
+
+# Flags (ArchiveHeader.flags / HeaderFile.flags / BlockHeader.flags)
+F_HUFFMAN               = 1 << 0
+F_HAMMING               = 1 << 1
+F_CRC32                 = 1 << 2
+F_SHA256                = 1 << 3
+F_INDEX_TABLE           = 1 << 4
+F_BLOCKS                = 1 << 5    # данные файла разбиты на независимые блоки
+F_SOLID                 = 1 << 6    # общая модель Хаффмана в ArchiveHeader.code_table
+F_STREAM                = 1 << 7    # потоковый архив: метаданные в конце (только ArchiveHeader.flags)
 
 # =================================================================================================
 
 # Archive header constants
 H_SIGNATURE_SIZE        = 16
 H_SIGNATURE             = b"DBP-OTIK-HFHM" + b"\x00" * 3
-VERSION                 = 5
+VERSION                 = 7
 HEADER_SIZE             = 96
 CODE_TABLE_SIZE         = 256
 META_SIZE               = HEADER_SIZE + CODE_TABLE_SIZE
@@ -55,29 +97,66 @@ H_OFF_ALIGN             = 39 # uint8
 H_OFF_FILECOUNT         = 40 # uint32
 H_OFF_DATASECT_OFFSET   = 44 # uint64
 H_OFF_INDEXSECT_OFFSET  = 52 # uint64
-H_OFF_RESERVED          = 60 # up to 96
+H_OFF_DATATABLE_OFFSET  = 60 # uint64, 0 — DataTable сразу после CodeTable
+H_OFF_RESERVED          = 68 # up to 96
 
 # =================================================================================================
 
 # File header constants
 FH_SIGNATURE_SIZE       = 4
 FH_SIGNATURE            = b"DPFH"
-FH_FIXED_SIZE           = 30  # bytes before Name
+FH_FIXED_SIZE           = 38  # bytes before Name
 # Each file header starts at current offset; after Name, next header starts at next 8-byte aligned offset.
 
 # Offsets
 FH_OFF_SIGNATURE        = 0 # char[4]
 FH_OFF_HEADERCRC32      = 4 # uint32
 #FH_OFF_DATACRC32        = 8 # uint32
-FH_OFF_ORIGINAL_SIZE    = 8 # uint32
-FH_OFF_COMPRESSED_SIZE  = 12 # uint32
-FH_OFF_DATA_OFFSET      = 16 # uint64
-FH_OFF_FLAGS            = 24 # uint8
-FH_OFF_CONTROL_BITS     = 25 # uint8
-FH_OFF_PADDING_HUFF     = 26 # uint8
-FH_OFF_PADDING_HAMM     = 27 # uint8
-FH_OFF_NAME_LEN         = 28 # uint16
+FH_OFF_ORIGINAL_SIZE    = 8 # uint64
+FH_OFF_COMPRESSED_SIZE  = 16 # uint64
+FH_OFF_DATA_OFFSET      = 24 # uint64
+FH_OFF_FLAGS            = 32 # uint8
+FH_OFF_CONTROL_BITS     = 33 # uint8
+FH_OFF_PADDING_HUFF     = 34 # uint8
+FH_OFF_PADDING_HAMM     = 35 # uint8
+FH_OFF_NAME_LEN         = 36 # uint16
  
+# =================================================================================================
+
+# Block header constants
+BH_FIXED_SIZE           = 16
+DEFAULT_BLOCK_SIZE      = 128 << 10 # 128 KiB
+MAX_BLOCK_SIZE          = 16 << 20  # 16 MiB
+
+# Offsets
+BH_OFF_RAW_SIZE         = 0 # uint32
+BH_OFF_PAYLOAD_SIZE     = 4 # uint32
+BH_OFF_CRC32            = 8 # uint32
+BH_OFF_FLAGS            = 12 # uint8
+BH_OFF_CONTROL_BITS     = 13 # uint8
+BH_OFF_PADDING_HUFF     = 14 # uint8
+BH_OFF_PADDING_HAMM     = 15 # uint8
+
+# =================================================================================================
+
+# Index section constants
+IX_SIGNATURE_SIZE       = 4
+IX_SIGNATURE            = b"DPIX"
+IX_FIXED_SIZE           = 16
+IX_ENTRY_SIZE           = 40
+
+# Offsets
+IX_OFF_SIGNATURE        = 0 # char[4]
+IX_OFF_COUNT            = 4 # uint32
+IX_OFF_CRC32            = 8 # uint32, CRC32 по записям индекса
+IX_OFF_RESERVED         = 12 # uint32
+
+IE_OFF_NAME_HASH        = 0 # uint64
+IE_OFF_TABLE_OFFSET     = 8 # uint64, смещение записи DataTable
+IE_OFF_DATA_OFFSET      = 16 # uint64
+IE_OFF_ORIGINAL_SIZE    = 24 # uint64
+IE_OFF_COMPRESSED_SIZE  = 32 # uint64
+
 # =================================================================================================================
 
 # Helpers for endian prefix
@@ -89,6 +168,10 @@ def _unpack(format, blob, offset):
 
 def _pack(format, blob, offset, data):
     struct.pack_into(format, blob, offset, data)
+
+def _name_hash(name: str) -> int:
+    """Хэш имени файла для IndexSection: первые 8 байт BLAKE2b."""
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "big")
  
 # =================================================================================================================
 
@@ -104,7 +187,8 @@ class ArchiveHeader:
     file_count: int             = 0
     data_section_offset: int    = 0
     index_section_offset: int   = 0
-    reserved: bytes             = b"\x00" * (HEADER_SIZE - H_OFF_RESERVED)  # from offset 60..95 (inclusive)
+    datatable_offset: int       = 0  # 0 -> OFF_DATATABLE
+    reserved: bytes             = b"\x00" * (HEADER_SIZE - H_OFF_RESERVED)  # from offset 68..95 (inclusive)
     code_table: bytes           = b"\x00" * CODE_TABLE_SIZE     # 256 bytes
 
     def to_bytes(self) -> bytes:
@@ -122,9 +206,9 @@ class ArchiveHeader:
 
         prefix = _endian_prefix(self.bytes_order)
         
-        # version uint32 at 16
-        _pack(f"{prefix}I", buf, H_OFF_VERSION, self.version)
-        # flags uint32 at 20
+        # version uint16 at 16
+        _pack(f"{prefix}H", buf, H_OFF_VERSION, self.version)
+        # flags uint32 at 18
         _pack(f"{prefix}I", buf, H_OFF_FLAGS, self.flags)
         # archive_size uint64 at 24
         _pack(f"{prefix}Q", buf, H_OFF_ARCHIVESIZE, self.archive_size)
@@ -140,10 +224,12 @@ class ArchiveHeader:
         _pack(f"{prefix}I", buf, H_OFF_FILECOUNT, self.file_count)
         # data_section_offset uint64 at 46
         _pack(f"{prefix}Q", buf, H_OFF_DATASECT_OFFSET, self.data_section_offset)
-        # index_section_offset uint64 at 54
+        # index_section_offset uint64 at 52
         _pack(f"{prefix}Q", buf, H_OFF_INDEXSECT_OFFSET, self.index_section_offset)
+        # datatable_offset uint64 at 60
+        _pack(f"{prefix}Q", buf, H_OFF_DATATABLE_OFFSET, self.datatable_offset)
         
-        # reserved (62..95) - copy up to len(reserved)
+        # reserved (68..95) - copy up to len(reserved)
         buf[H_OFF_RESERVED:OFF_CODETABLE] = self.reserved
         
         # header done (96 bytes)
@@ -165,7 +251,7 @@ class ArchiveHeader:
         prefix                  = _endian_prefix(bytes_order)
         
         H = cls(
-            version                 = _unpack(f"{prefix}I", header, H_OFF_VERSION),
+            version                 = _unpack(f"{prefix}H", header, H_OFF_VERSION),
             flags                   = _unpack(f"{prefix}I", header, H_OFF_FLAGS),
             archive_size            = _unpack(f"{prefix}Q", header, H_OFF_ARCHIVESIZE),
             data_crc32              = _unpack(f"{prefix}I", header, H_OFF_DATACRC32),
@@ -175,17 +261,16 @@ class ArchiveHeader:
             file_count              = _unpack(f"{prefix}I", header, H_OFF_FILECOUNT),
             data_section_offset     = _unpack(f"{prefix}Q", header, H_OFF_DATASECT_OFFSET),
             index_section_offset    = _unpack(f"{prefix}Q", header, H_OFF_INDEXSECT_OFFSET),
-            reserved                = header[H_OFF_RESERVED:HEADER_SIZE],
-            code_table              = code_table
+            datatable_offset        = _unpack(f"{prefix}Q", header, H_OFF_DATATABLE_OFFSET),
+            reserved                = bytes(header[H_OFF_RESERVED:HEADER_SIZE]),
+            code_table              = bytes(code_table)
         )
         H.validate_header(ImportError)                
 
         return H
 
     def validate_header(self, type):            
-        if int(self.data_crc32) < 1:                        # int(self.header_crc32) < 1 or
-            raise type("Ошибка чтения CRC32 архива")
-        
+        # data_crc32 == 0 допустим: CRC32 пустой секции данных равен 0
         if self.data_section_offset < META_SIZE:
             raise type("Ошибка ссылки на секцию файлов")
         
@@ -198,17 +283,37 @@ class ArchiveHeader:
         if self.index_section_offset != 0 and self.index_section_offset < self.data_section_offset:
             raise type("Неправильная ссылка на индексную таблицу")
         
+        if self.datatable_offset != 0 and self.datatable_offset < self.data_section_offset:
+            raise type("Неправильная ссылка на таблицу файлов")
+        
         if self.reserved != b"\x00" * (HEADER_SIZE - H_OFF_RESERVED):
             raise ImportWarning("Обнаружен мусор в зарезервированной зоне")
         
         if len(self.code_table) < CODE_TABLE_SIZE:
             raise type("Неправильный размер кодовой таблицы")
         
+        # в начале потокового архива размер ещё неизвестен — итоговый заголовок в трейлере
+        if self.flags & F_STREAM and self.archive_size == 0:
+            return
+        
         # Потенциально наибольший размер файла - сумма мета данных, репозитория и секции данных
-        max_size = META_SIZE + self.file_count * (MAX_FILE_NAME_LEN+FH_FIXED_SIZE) + self.file_count * MAX_FILE_SIZE 
+        max_entry_size = FH_FIXED_SIZE + MAX_FILE_NAME_LEN + CODE_TABLE_SIZE + 7
+        max_size = META_SIZE + self.file_count * max_entry_size + self.file_count * MAX_FILE_SIZE 
         
         if self.archive_size < META_SIZE or self.archive_size > max_size:
-            raise type
+            raise type("Неверный размер архива")
+    
+    def get_datatable_bounds(self) -> tuple[int, int]:
+        """Начало и конец DataTable: после CodeTable или, после дозаписи и в потоковом архиве, после DataSection."""
+        if self.datatable_offset:
+            # в потоковом архиве за DataTable (и IndexSection) следует трейлер
+            trailer = META_SIZE if self.flags & F_STREAM else 0
+            return self.datatable_offset, self.index_section_offset or self.archive_size - trailer
+        return OFF_DATATABLE, self.data_section_offset
+    
+    def get_data_section_end(self) -> int:
+        """Конец DataSection (по нему считается data_crc32)."""
+        return self.datatable_offset or self.index_section_offset or self.archive_size
     
     def compute_header_crc32(self) -> int:
         """Вычисляет CRC32 по заголовку (поля HeaderCrc32 = 0 при вычислении)."""
@@ -241,7 +346,7 @@ class HeaderFile:
     padding_Huff: int           = 0
     padding_Hamm: int           = 0
     name: str                   = ""
-    lengths_codes: bytes        = b"\x00" * CODE_TABLE_SIZE     # 256 bytes
+    lengths_codes: bytes        = b"\x00" * CODE_TABLE_SIZE     # 256 bytes, хранится после Name (см. has_code_table)
     #----------------------
     total_padd : int            = 0 # Вспомогательная переменная при записи
     
@@ -256,7 +361,7 @@ class HeaderFile:
         name_b = self.name.encode("utf-8")
         name_len = len(name_b)
         
-        # fixed layout size 30
+        # fixed layout size 38
         blob = bytearray(FH_FIXED_SIZE)
         # Signature (0..4)
         blob[FH_OFF_SIGNATURE:FH_OFF_SIGNATURE + FH_SIGNATURE_SIZE] = FH_SIGNATURE
@@ -266,9 +371,9 @@ class HeaderFile:
         # data_crc32
         #_pack(f"{prefix}I", blob, FH_OFF_DATACRC32, self.data_crc32)
         # original_size
-        _pack(f"{prefix}I", blob, FH_OFF_ORIGINAL_SIZE, self.original_size)
+        _pack(f"{prefix}Q", blob, FH_OFF_ORIGINAL_SIZE, self.original_size)
         # compressed_size
-        _pack(f"{prefix}I", blob, FH_OFF_COMPRESSED_SIZE, self.compressed_size)
+        _pack(f"{prefix}Q", blob, FH_OFF_COMPRESSED_SIZE, self.compressed_size)
         # data_offset (uint64)
         _pack(f"{prefix}Q", blob, FH_OFF_DATA_OFFSET, self.data_offset)
         # flags (uint8)
@@ -279,9 +384,11 @@ class HeaderFile:
         _pack("B", blob, FH_OFF_PADDING_HUFF, self.padding_Huff & 0xFF)
         # padding_Hamm (uint8)
         _pack("B", blob, FH_OFF_PADDING_HAMM, self.padding_Hamm & 0xFF)
-        # name_len (uint16) at offset 28
+        # name_len (uint16) at offset 36
         _pack(f"{prefix}H", blob, FH_OFF_NAME_LEN, name_len)
 
+        if self.has_code_table():
+            return bytes(blob) + name_b + self.lengths_codes
         return bytes(blob) + name_b
     
     @classmethod
@@ -296,8 +403,8 @@ class HeaderFile:
         H = cls(
             crc32           = _unpack(f"{prefix}I", data, FH_OFF_HEADERCRC32),
             #data_crc32      = _unpack(f"{prefix}I", data, FH_OFF_DATACRC32),
-            original_size   = _unpack(f"{prefix}I", data, FH_OFF_ORIGINAL_SIZE),
-            compressed_size = _unpack(f"{prefix}I", data, FH_OFF_COMPRESSED_SIZE),
+            original_size   = _unpack(f"{prefix}Q", data, FH_OFF_ORIGINAL_SIZE),
+            compressed_size = _unpack(f"{prefix}Q", data, FH_OFF_COMPRESSED_SIZE),
             data_offset     = _unpack(f"{prefix}Q", data, FH_OFF_DATA_OFFSET),
             flags           = data[FH_OFF_FLAGS],
             control_bits    = data[FH_OFF_CONTROL_BITS],
@@ -317,7 +424,8 @@ class HeaderFile:
         if name_len > MAX_FILE_NAME_LEN:
             raise ValueError("file name too long for uint16")
         
-        if self.data_offset < META_SIZE:
+        # у пустых файлов данных нет и data_offset == 0
+        if self.data_offset < META_SIZE and not (self.data_offset == 0 and self.compressed_size == 0):
             raise type("Ошибка ссылки на секцию данных")
         
         if self.compressed_size != 0 and self.original_size != 0:
@@ -331,8 +439,20 @@ class HeaderFile:
         if self.control_bits > MAX_CONTROL_BITS:
             raise type(f"Превышено максимальное количество контрольных бит для Хэмминга: {MAX_CONTROL_BITS}")
         
-        if self.padding_Huff > MAX_PADDING or self.padding_Hamm > MAX_PADDING:
+        if self.padding_Huff > MAX_PADDING:
             raise type(f"Превышен максимальный padding блоков данных: {MAX_PADDING}")
+        
+        # padding Хэмминга добивает поток до целого числа информационных блоков (k бит)
+        if self.flags & F_HAMMING and self.padding_Hamm >= (1 << self.control_bits):
+            raise type("Неверный padding блока Хэмминга")
+        
+        if self.has_code_table() and len(self.lengths_codes) != CODE_TABLE_SIZE:
+            raise type("Неправильный размер кодовой таблицы")
+    
+    def has_code_table(self) -> bool:
+        """Хранится ли в записи своя таблица длин кодов (в блочном режиме таблицы лежат в заголовках блоков,
+        в solid-режиме — одна таблица в заголовке архива)."""
+        return bool(self.flags & F_HUFFMAN) and not self.flags & (F_BLOCKS | F_SOLID)
     
     def compute_header_crc32(self, prefix:str) -> int:
         """
@@ -358,6 +478,166 @@ class HeaderFile:
     
     def get_size(self):
         name_b = self.name.encode("utf-8")
-        return FH_FIXED_SIZE +  len(name_b)
+        size = FH_FIXED_SIZE + len(name_b)
+        if self.has_code_table():
+            size += CODE_TABLE_SIZE
+        return size
+    
+# =================================================================================================================
+
+@dataclass
+class BlockHeader:
+    raw_size: int               = 0
+    payload_size: int           = 0
+    crc32: int                  = 0 # CRC32 по payload
+    flags: int                  = 0 # F_HUFFMAN | F_HAMMING
+    control_bits: int           = 0
+    padding_Huff: int           = 0
+    padding_Hamm: int           = 0
+    lengths_codes: bytes        = b"\x00" * CODE_TABLE_SIZE     # 256 bytes, только при F_HUFFMAN
+    
+    def to_bytes(self, prefix: str) -> bytes:
+        """Собирает заголовок блока (вместе с кодовой таблицей, если блок сжат Хаффманом)."""
+        
+        self.validate_header(RuntimeError)
+        
+        blob = bytearray(BH_FIXED_SIZE)
+        _pack(f"{prefix}I", blob, BH_OFF_RAW_SIZE, self.raw_size)
+        _pack(f"{prefix}I", blob, BH_OFF_PAYLOAD_SIZE, self.payload_size)
+        _pack(f"{prefix}I", blob, BH_OFF_CRC32, self.crc32)
+        _pack("B", blob, BH_OFF_FLAGS, self.flags & 0xFF)
+        _pack("B", blob, BH_OFF_CONTROL_BITS, self.control_bits & 0xFF)
+        _pack("B", blob, BH_OFF_PADDING_HUFF, self.padding_Huff & 0xFF)
+        _pack("B", blob, BH_OFF_PADDING_HAMM, self.padding_Hamm & 0xFF)
+        
+        if self.flags & F_HUFFMAN:
+            return bytes(blob) + self.lengths_codes
+        return bytes(blob)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes, offset: int, prefix: str) -> "BlockHeader":
+        """Парсит заголовок блока, начинающийся с data[offset]."""
+        
+        if len(data) - offset < BH_FIXED_SIZE:
+            raise EOFError("Unexpected EOF while reading block header")
+        
+        H = cls(
+            raw_size        = _unpack(f"{prefix}I", data, offset + BH_OFF_RAW_SIZE),
+            payload_size    = _unpack(f"{prefix}I", data, offset + BH_OFF_PAYLOAD_SIZE),
+            crc32           = _unpack(f"{prefix}I", data, offset + BH_OFF_CRC32),
+            flags           = data[offset + BH_OFF_FLAGS],
+            control_bits    = data[offset + BH_OFF_CONTROL_BITS],
+            padding_Huff    = data[offset + BH_OFF_PADDING_HUFF],
+            padding_Hamm    = data[offset + BH_OFF_PADDING_HAMM],
+        )
+        
+        if H.flags & F_HUFFMAN:
+            start = offset + BH_FIXED_SIZE
+            if len(data) - start < CODE_TABLE_SIZE:
+                raise EOFError("Unexpected EOF while reading block code table")
+            H.lengths_codes = bytes(data[start:start + CODE_TABLE_SIZE])
+        
+        H.validate_header(ImportError)
+        
+        return H
+    
+    def validate_header(self, type):
+        
+        if self.raw_size > MAX_BLOCK_SIZE:
+            raise type(f"Превышен максимальный размер блока: {MAX_BLOCK_SIZE}")
+        
+        if self.control_bits > MAX_CONTROL_BITS:
+            raise type(f"Превышено максимальное количество контрольных бит для Хэмминга: {MAX_CONTROL_BITS}")
+        
+        if self.padding_Huff > MAX_PADDING:
+            raise type(f"Превышен максимальный padding блоков данных: {MAX_PADDING}")
+        
+        # padding Хэмминга добивает поток до целого числа информационных блоков (k бит)
+        if self.flags & F_HAMMING and self.padding_Hamm >= (1 << self.control_bits):
+            raise type("Неверный padding блока Хэмминга")
+    
+    def get_size(self):
+        return BH_FIXED_SIZE + (CODE_TABLE_SIZE if self.flags & F_HUFFMAN else 0)
+    
+# =================================================================================================================
+
+@dataclass
+class IndexEntry:
+    name_hash: int              = 0
+    table_offset: int           = 0 # смещение записи файла в DataTable
+    data_offset: int            = 0
+    original_size: int          = 0
+    compressed_size: int        = 0
+    
+    def to_bytes(self, prefix: str) -> bytes:
+        blob = bytearray(IX_ENTRY_SIZE)
+        _pack(f"{prefix}Q", blob, IE_OFF_NAME_HASH, self.name_hash)
+        _pack(f"{prefix}Q", blob, IE_OFF_TABLE_OFFSET, self.table_offset)
+        _pack(f"{prefix}Q", blob, IE_OFF_DATA_OFFSET, self.data_offset)
+        _pack(f"{prefix}Q", blob, IE_OFF_ORIGINAL_SIZE, self.original_size)
+        _pack(f"{prefix}Q", blob, IE_OFF_COMPRESSED_SIZE, self.compressed_size)
+        return bytes(blob)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes, offset: int, prefix: str) -> "IndexEntry":
+        """Парсит запись индекса, начинающуюся с data[offset]."""
+        
+        if len(data) - offset < IX_ENTRY_SIZE:
+            raise EOFError("Unexpected EOF while reading index entry")
+        
+        return cls(
+            name_hash       = _unpack(f"{prefix}Q", data, offset + IE_OFF_NAME_HASH),
+            table_offset    = _unpack(f"{prefix}Q", data, offset + IE_OFF_TABLE_OFFSET),
+            data_offset     = _unpack(f"{prefix}Q", data, offset + IE_OFF_DATA_OFFSET),
+            original_size   = _unpack(f"{prefix}Q", data, offset + IE_OFF_ORIGINAL_SIZE),
+            compressed_size = _unpack(f"{prefix}Q", data, offset + IE_OFF_COMPRESSED_SIZE),
+        )
+
+# =================================================================================================================
+
+@dataclass
+class IndexSection:
+    count: int                  = 0
+    crc32: int                  = 0 # CRC32 по записям
+    entries: List[IndexEntry]   = field(default_factory=list)
+    
+    def to_bytes(self, prefix: str) -> bytes:
+        """Собирает индекс: записи сортируются по хэшу имени, CRC32 считается по ним."""
+        
+        self.entries.sort(key=lambda e: e.name_hash)
+        body = b"".join(e.to_bytes(prefix) for e in self.entries)
+        self.count = len(self.entries)
+        self.crc32 = zlib.crc32(body) & 0xFFFFFFFF
+        
+        blob = bytearray(IX_FIXED_SIZE)
+        blob[IX_OFF_SIGNATURE:IX_OFF_SIGNATURE + IX_SIGNATURE_SIZE] = IX_SIGNATURE
+        _pack(f"{prefix}I", blob, IX_OFF_COUNT, self.count)
+        _pack(f"{prefix}I", blob, IX_OFF_CRC32, self.crc32)
+        return bytes(blob) + body
+    
+    @classmethod
+    def from_bytes(cls, data: bytes, prefix: str) -> "IndexSection":
+        """Парсит заголовок индекса (16 байт); записи не читаются — их ищут двоичным поиском по смещению."""
+        
+        if len(data) < IX_FIXED_SIZE:
+            raise EOFError("Unexpected EOF while reading index section")
+        
+        if data[IX_OFF_SIGNATURE:IX_SIGNATURE_SIZE] != IX_SIGNATURE:
+            raise ValueError("Invalid index section signature")
+        
+        H = cls(
+            count           = _unpack(f"{prefix}I", data, IX_OFF_COUNT),
+            crc32           = _unpack(f"{prefix}I", data, IX_OFF_CRC32),
+        )
+        H.validate_header(ImportError)
+        
+        return H
+    
+    def validate_header(self, type):
+        if self.count > MAX_FILES:
+            raise type(f"Превышен лимит максимального кол-ва файлов в архиве. Максимум: {MAX_FILES}")
+    
+    def get_size(self):
+        return IX_FIXED_SIZE + self.count * IX_ENTRY_SIZE
     
 # =================================================================================================================
@@ -3,10 +3,14 @@
 # =================================================================================================================
 
 from __future__ import annotations
+import argparse
+import dataclasses
+import itertools
+import mmap as mmap_mod
 import os
 import tempfile
 import zlib
-from typing import BinaryIO, List, Tuple, Iterator
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Iterator, Union
 
 from Archive_Formats import *
 
@@ -14,50 +18,162 @@ import Archive_Formats as otik
 
 # =================================================================================================================
 
-_MAX_FILES = 1000
-
-# =================================================================================================================
-
 def _align_up(value: int, align: int) -> int:
     return ((value + align - 1) // align) * align
 
 def _pad_to8(n: int) -> int:
     return _align_up(n, 8)
 
+def _parse_file_header(table: Union[bytes, memoryview], pos: int, prefix: str, code_table: bytes) -> HeaderFile:
+    """Разбирает одну запись DataTable (или локальную запись потокового архива), начинающуюся с table[pos].
+
+    Args:
+        table: данные DataTable (или её фрагмента)
+        pos (int): смещение записи в table
+        prefix (str): порядок байт архива
+        code_table (bytes): общая таблица длин кодов из заголовка архива (для solid-записей)
+
+    Returns:
+        HeaderFile: заголовок файла вместе с его кодовой таблицей
+            (для solid-записей — общей таблицей из заголовка архива)
+    """
+    hdr_blob = table[pos:pos + FH_FIXED_SIZE]
+    if len(hdr_blob) < FH_FIXED_SIZE:
+        raise EOFError("Unexpected EOF while reading file header")
+    
+    name_len = otik._unpack(f"{prefix}H", hdr_blob, FH_OFF_NAME_LEN)
+    name_b = bytes(table[pos + FH_FIXED_SIZE:pos + FH_FIXED_SIZE + name_len])
+    if len(name_b) < name_len:
+        raise EOFError("Unexpected EOF while reading file name")
+               
+    header = HeaderFile.from_bytes(hdr_blob, name_b, prefix)
+    
+    # кодовая таблица файла хранится сразу после имени
+    if header.has_code_table():
+        start = pos + FH_FIXED_SIZE + name_len
+        header.lengths_codes = bytes(table[start:start + CODE_TABLE_SIZE])
+        if len(header.lengths_codes) < CODE_TABLE_SIZE:
+            raise EOFError("Unexpected EOF while reading file code table")
+    elif header.flags & F_SOLID:
+        header.lengths_codes = code_table
+    
+    return header
+
 # =================================================================================================================
 
 class ArchiveWriter:
     """
     ArchiveWriter: записывает архив в файл по твоему формату.
-    - entries: список записей вида (name: str, data: bytes, metadata: dict)
-    - code_table: 256 bytes (заглушка, будет заменена после получения формата кодовой таблицы Хаффмана)
+    
+    Потоковый режим (передан список имён names): место под Header и DataTable
+    резервируется заранее, данные каждого файла сразу дописываются во временный файл
+    с накоплением CRC32 секции данных; finalize возвращается к началу, записывает
+    DataTable и Header и атомарно заменяет архив (os.replace).
+    Без names данные копятся в памяти до finalize.
+    
+    Режим дозаписи (append=True, см. open_for_append): существующий архив не переписывается —
+    новые данные, новая DataTable и IndexSection дописываются в конец файла, заголовок
+    перезаписывается последним, поэтому до этого момента архив остаётся прежним.
+    
+    Дедупликация (add_file с digest + add_duplicate): запись файла с уже добавленным содержимым
+    ссылается на данные первой такой записи.
+    
+    Потоковый режим (передан stream, флаг F_STREAM): архив пишется за один проход в поток без
+    перемотки (например, stdout): заголовок-заготовка, для каждого файла локальная запись HeaderFile
+    и данные, затем DataTable, IndexSection и трейлер с итоговым заголовком (см. Archive_Formats).
+    
+    Args:
+        args: параметры архивации (output, bytes_order, mode)
+        names (Iterable[str]): имена всех файлов архива в порядке добавления
+        append (bool): дописать файлы в существующий архив args.output
+        stream (BinaryIO): поток для записи потокового архива (требует names); writer его не закрывает
     """
-    def __init__(self, args):
+    def __init__(self, args, names: Optional[Iterable[str]] = None, append: bool = False,
+                 stream: Optional[BinaryIO] = None):
         self.path = args.output
         self._tmp_path = None
+        self._file: Optional[BinaryIO] = None
+        self._append = append
+        self._stream = stream
+        self._started = False           # потоковый режим: заголовок-заготовка уже записан
         
         self.header = ArchiveHeader(
             bytes_order     = args.bytes_order & 0xFFFFFFFF,
             flags           = args.mode & 0xFFFFFFFF
         )
-        self._entries: List[tuple[HeaderFile, bytes]] = []
+        self._entries: List[tuple[HeaderFile, Optional[bytes]]] = []
+        self._names: set = set()
+        self._by_digest: Dict[bytes, HeaderFile] = {}                   # дайджест содержимого → первая запись
+        self._links: List[tuple[HeaderFile, HeaderFile]] = []          # (дубликат, запись с данными)
+        
+        self._datatable_size = 0        # зарезервированный размер DataTable
+        self._data_end = 0              # смещение конца записанной DataSection
+        self._data_crc32 = 0            # CRC32 секции данных, накапливается при записи
+        self._append_start = 0          # размер архива до дозаписи
+        
+        if stream is not None:
+            if append or names is None:
+                raise ValueError("Stream archive requires the list of names and cannot be appended to")
+            self.header.flags |= F_STREAM
+            self.header.file_count = len(list(names))
+            self.header.data_section_offset = otik.META_SIZE
+            self._file = stream
+            self._data_end = otik.META_SIZE
+        elif append:
+            self._open_append(args.mode)
+        elif names is not None:
+            # размер записи зависит от наличия в ней кодовой таблицы
+            flags = args.mode | (F_BLOCKS if args.block_size else 0)
+            self._open_tmp(self._calc_datatable_size(HeaderFile(name=name, flags=flags) for name in names))
+
+    @classmethod
+    def open_for_append(cls, path: str, flags: int = 0) -> "ArchiveWriter":
+        """Открывает существующий архив для дозаписи файлов.
+
+        Args:
+            path (str): путь к архиву
+            flags (int): флаги архива, добавляемые к существующим (учитывается F_INDEX_TABLE)
+
+        Returns:
+            ArchiveWriter: писатель в режиме дозаписи
+        """
+        return cls(argparse.Namespace(output=path, bytes_order=0, mode=flags, block_size=0), append=True)
 
-    # def set_code_table(self, lengths: bytes) -> None:
-    #     """Установить canonical code table: 256 bytes (length per symbol)."""
-    #     if len(lengths) != CODE_TABLE_SIZE:
-    #         raise ValueError("code_table must be 256 bytes")
-    #     self.header.code_table = lengths
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # при ошибке архив не создаётся, временный файл удаляется
+        if exc_type is not None:
+            self.abort()
+
+    def set_code_table(self, lengths: bytes) -> None:
+        """Устанавливает общую таблицу длин кодов solid-архива: 256 bytes (length per symbol).
+
+        Raises:
+            ValueError: Если размер таблицы не 256 байт или в дозаписываемом архиве уже другая таблица.
+        """
+        if len(lengths) != CODE_TABLE_SIZE:
+            raise ValueError("code_table must be 256 bytes")
+        if self._started:
+            raise ValueError("Stream archive header is already written")
+        if self._append_start and self.header.flags & F_SOLID and self.header.code_table != lengths:
+            raise ValueError("Solid archive already has a different code table")
+        self.header.code_table = bytes(lengths)
+        self.header.flags |= F_SOLID
         
-    def add_file(self, name: str, meta_data: dict) -> None:
+    def add_file(self, name: str, meta_data: dict, digest: Optional[bytes] = None) -> None:
         """Добавляет файл в архив. compressed_bytes — уже закодированные (сжатые) данные.
            Для отсутствия содержимого передай compressed_bytes=b'' и compressed_size==0.
+           В потоковом режиме данные сразу записываются на диск и не хранятся.
+           meta_data["data"] может быть итератором порций (блоков крупного файла): тогда
+           compressed_size и CRC считаются по мере записи, файл целиком в памяти не собирается.
+           digest — хэш исходного содержимого: по нему дубликаты добавляются через add_duplicate.
+           meta_data["raw_size"] перечитывается после записи данных: размер данных, читаемых
+           из потока (stdin), известен только в конце.
         """         
         
-        if len(self._entries) > 1:
-            raise NotImplementedError("Поддержа более 1 файла в архиве не поддерживается!")
-                        
-        if len(self._entries) > _MAX_FILES:
-            raise RuntimeError(f"Превышен лимит максимального кол-ва архивируемых файлов. Максимум: {_MAX_FILES}")
+        self._check_new_name(name)
                 
         entry = HeaderFile(
             name            = name,
@@ -68,125 +184,372 @@ class ArchiveWriter:
             padding_Hamm    = meta_data["padding_hamm"],
             original_size   = meta_data["raw_size"],
             compressed_size = meta_data["compressed_size"],
-            crc32           = zlib.crc32(bytes(meta_data["data"])) & 0xFFFFFFFF,    
             # -------------------------------------------
             data_offset     = 0
         )
         
-        self.header.code_table = meta_data["lengths_codes"]             #TODO: костыль, убрать в шапку файла
-        self._entries.append((entry, meta_data["data"]))
+        data = meta_data["data"]
+        if self._file is None:
+            if not isinstance(data, (bytes, bytearray, memoryview)):
+                data = b"".join(data)
+                entry.compressed_size = len(data)
+            entry.crc32 = zlib.crc32(data) & 0xFFFFFFFF
+            self._entries.append((entry, data))
+        else:
+            if self._stream is not None:
+                self._write_local_header(entry)
+                if entry.flags & F_BLOCKS:
+                    # читатель потока находит конец данных по пустому блоку
+                    prefix = otik._endian_prefix(self.header.bytes_order)
+                    data = itertools.chain((data,) if isinstance(data, (bytes, bytearray, memoryview)) else data,
+                                           (BlockHeader().to_bytes(prefix),))
+            self._write_data(entry, data)
+            self._entries.append((entry, None))
+        entry.original_size = meta_data["raw_size"]
+        
+        if digest is not None:
+            self._by_digest.setdefault(digest, entry)
+
+    def find_duplicate(self, digest: bytes) -> Optional[HeaderFile]:
+        """Запись с таким же исходным содержимым, добавленная ранее (см. add_file), или None."""
+        return self._by_digest.get(digest)
+
+    def add_duplicate(self, name: str, digest: bytes) -> None:
+        """Добавляет файл, содержимое которого уже есть в архиве: запись DataTable ссылается
+        на данные (data_offset) ранее добавленного файла, повторно данные не пишутся.
+
+        Args:
+            name (str): имя файла в архиве
+            digest (bytes): хэш исходного содержимого, переданный в add_file для оригинала
+
+        Raises:
+            KeyError: файла с таким содержимым в архиве нет
+            ValueError: потоковый архив (читатель потока не может вернуться к данным оригинала)
+        """
+        if self._stream is not None:
+            raise ValueError("Stream archive cannot reference data of another file")
+        source = self._by_digest[digest]
+        self._check_new_name(name)
+        
+        entry = dataclasses.replace(source, name=name)
+        self._entries.append((entry, None))
+        self._links.append((entry, source))
+
+    def has_file(self, name: str) -> bool:
+        """Есть ли в архиве (включая уже записанные при дозаписи) файл с таким именем."""
+        return name in self._names
 
     def finalize(self) -> None:
         """
-        Собирает Archive Header + DataTable + DataSection и записывает весь архив атомарно.
+        Дописывает DataTable и Archive Header в зарезервированное место и атомарно заменяет архив.
         """
         
         if self.header is None:
             raise RuntimeError("Header not initialized")
         
-        if len(self._entries) > _MAX_FILES:
-            raise RuntimeError(f"Превышен лимит максимального кол-ва архивируемых файлов. Максимум: {_MAX_FILES}")
+        if len(self._entries) > MAX_FILES:
+            raise RuntimeError(f"Превышен лимит максимального кол-ва архивируемых файлов. Максимум: {MAX_FILES}")
         
         if len(self.header.code_table) != CODE_TABLE_SIZE:
             raise RuntimeError("Кодовая таблица не установлена")
         
+        if self._stream is not None:
+            self._start_stream()
+            if len(self._entries) != self.header.file_count:
+                raise RuntimeError("Число добавленных файлов не совпадает с заявленным в заголовке потокового архива")
+        
         # Build header (initial)
         self.header.file_count = len(self._entries)
         prefix = otik._endian_prefix(self.header.bytes_order)
         
-        # =============================== STAGE 1. Вычисление размера таблицы файлов ================================
+        # ================================ STAGE 1. Запись DataSection (буферный режим) =============================
         
-        datatable_size = 0
-        for hdr, compressed in self._entries:
-            # 8-byte align — смещение к следующей записи
-            size = hdr.get_size()
-            hdr.total_padd = _pad_to8(size) - size
-            datatable_size += size + hdr.total_padd
-
-        # ================================ STAGE 2. Разметка data_offset всех файлов ================================
-
-        # Смещение начала DataSection
-        data_section_offset =  otik.OFF_DATATABLE + datatable_size
-        self.header.data_section_offset = data_section_offset
-
-        real_data_offsets: list[int] = []
+        datatable_size = self._calc_datatable_size(hdr for hdr, _ in self._entries)
+        
+        # метаданные дописываются за данными: при дозаписи и в потоковом архиве
+        trailing = self._append or self._stream is not None
+        
+        if self._file is None:
+            self._open_tmp(datatable_size)
+            for hdr, compressed in self._entries:
+                if compressed is not None:
+                    self._write_data(hdr, compressed)
+        elif trailing:
+            # новая DataTable пишется сразу за дописанными данными
+            self._datatable_size = datatable_size
+        elif datatable_size > self._datatable_size:
+            self.abort()
+            raise RuntimeError("DataTable не помещается в зарезервированное место: имена файлов не совпадают с заявленными")
+        
+        # дубликаты ссылаются на данные оригиналов
+        for entry, source in self._links:
+            entry.data_offset = source.data_offset
+            entry.crc32 = source.crc32
+            entry.compressed_size = source.compressed_size
 
-        cur_data_offset = 0
-        for hdr, compressed in self._entries:
-            if hdr.compressed_size == 0:
-                hdr.data_offset = 0
-                real_data_offsets.append(0)
-                continue
+        # ===================================== STAGE 2. Cборка DataTable ==========================================
 
-            hdr.data_offset = data_section_offset + cur_data_offset
-            real_data_offsets.append(cur_data_offset)            
-            cur_data_offset += len(compressed)
+        datatable_offset = self._data_end if trailing else otik.OFF_DATATABLE
+        
+        datatable_bin = bytearray()
+        index = IndexSection()
+        for hdr, _ in self._entries:
+            index.entries.append(IndexEntry(
+                name_hash       = otik._name_hash(hdr.name),
+                table_offset    = datatable_offset + len(datatable_bin),
+                data_offset     = hdr.data_offset,
+                original_size   = hdr.original_size,
+                compressed_size = hdr.compressed_size
+            ))
+            datatable_bin.extend(hdr.to_bytes(prefix))
+            if hdr.total_padd > 0:
+                datatable_bin.extend(b"\x00" * hdr.total_padd)
+        
+        # неиспользованный резерв заполняется нулями
+        datatable_bin.extend(b"\x00" * (self._datatable_size - len(datatable_bin)))
 
-        data_section_size = cur_data_offset 
+        # ====================== STAGE 3. CRC32 по DataSection и фиксация размера всего архива =======================
 
-        # ================================= STAGE 3. Cборка DataTable и DataSection =================================
+        self.header.data_crc32 = self._data_crc32 & 0xFFFFFFFF
+        
+        meta_offset = self._data_end
+        if trailing:
+            # DataSection остаётся на месте, DataTable — после неё
+            self.header.datatable_offset = datatable_offset
+            meta_offset += len(datatable_bin)
+        else:
+            self.header.data_section_offset = otik.OFF_DATATABLE + self._datatable_size
+        
+        # IndexSection — сразу за DataSection (или за DataTable после дозаписи)
+        index_bin = b""
+        self.header.index_section_offset = 0
+        if self.header.flags & F_INDEX_TABLE:
+            index_bin = index.to_bytes(prefix)
+            self.header.index_section_offset = meta_offset
+        
+        self.header.archive_size = meta_offset + len(index_bin)
+        if self._stream is not None:
+            # итоговый заголовок — трейлер в конце потока
+            self.header.archive_size += otik.META_SIZE
 
-        datatable_bin = bytearray()
-        data_section_bin = bytearray()
+        # ==================== STAGE 4. Финальная сборка Header с учётом header_crc32 + CodeTable ====================
+        
+        header_blob = self._seal_header(self.header)
 
-        for hdr, compressed in self._entries:
-            header_bin = hdr.to_bytes(prefix)
+        # ============================= STAGE 5. Запись метаданных в начало и замена архива ==========================
+        
+        f = self._file
+        if self._stream is not None:
+            f.write(datatable_bin)
+            f.write(index_bin)
+            f.write(header_blob)
+            f.flush()
+            self._file = None
+            return
+        
+        try:
+            if self._append:
+                f.seek(self._data_end)
+                f.write(datatable_bin)
+                f.write(index_bin)
+                f.truncate()
+                
+                # заголовок — только после того, как всё остальное на диске
+                f.flush()
+                os.fsync(f.fileno())
+                f.seek(0)
+                f.write(header_blob)
+                f.close()
+                self._file = None
+                return
             
-            datatable_bin.extend(header_bin)
-            if hdr.total_padd  > 0:
-                datatable_bin.extend(b"\x00" * hdr.total_padd )                
+            f.seek(self._data_end)
+            f.write(index_bin)
             
-            if hdr.compressed_size != 0:
-                data_section_bin.extend(compressed)
-                
-        data_section_bytes = bytes(data_section_bin)
-        datatable_bytes = bytes(datatable_bin)
+            f.seek(0)
+            # Header (96 bytes) with CodeTable (256 bytes)
+            f.write(header_blob)
+            f.write(datatable_bin)
+            f.close()
+        except BaseException:
+            self.abort()
+            raise
+        
+        self._file = None
+        os.replace(self._tmp_path, self.path)
+        self._tmp_path = None
 
-        # ====================== STAGE 4. CRC32 по DataSection и фиксация размера всего архива =======================
+    def abort(self) -> None:
+        """Прерывает запись: закрывает и удаляет временный файл.
+        При дозаписи отбрасывает дописанный хвост, исходный архив не меняется.
+        Поток потокового архива не закрывается: записанное в него не отзывается, трейлера у архива не будет."""
+        if self._stream is not None:
+            self._file = None
+            return
+        if self._file is not None:
+            if self._append:
+                self._file.truncate(self._append_start)
+            self._file.close()
+            self._file = None
+        if self._tmp_path is not None:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+            self._tmp_path = None
 
-        self.header.data_crc32 = zlib.crc32(data_section_bytes) & 0xFFFFFFFF
-        self.header.archive_size = otik.OFF_DATATABLE + datatable_size + data_section_size
+    def _open_tmp(self, datatable_size: int) -> None:
+        """Создаёт временный файл рядом с архивом и резервирует место под Header и DataTable.
 
-        # ==================== STAGE 5. Финальная сборка Header с учётом header_crc32 + CodeTable ====================
+        Args:
+            datatable_size (int): размер DataTable с учётом выравнивания записей
+        """
+        dir_path = os.path.dirname(os.path.abspath(self.path))     # Обрезка названия файла
+        name = os.path.basename(self.path)                          # Выделение названия файла
+        os.makedirs(dir_path, exist_ok=True)                        # Создать директорию, если нет.
         
+        fd, self._tmp_path = tempfile.mkstemp(dir=dir_path, prefix=name+".tmp_")
+        self._file = os.fdopen(fd, "w+b")
+        
+        self._datatable_size = datatable_size
+        self._data_end = otik.OFF_DATATABLE + datatable_size
+        self._file.seek(self._data_end)
+    
+    def _start_stream(self) -> None:
+        """Пишет в поток заголовок-заготовку потокового архива (один раз, перед первой записью)."""
+        if self._started:
+            return
+        self._started = True
+        self._file.write(self._seal_header(dataclasses.replace(self.header)))
+    
+    def _write_local_header(self, hdr: HeaderFile) -> None:
+        """Потоковый режим: пишет перед данными файла локальную запись HeaderFile (выровнена по 8 байт).
+        CRC32 данных в ней 0, размер сжатых данных — 0, если он заранее неизвестен (блочный режим);
+        data_offset указывает на начало данных сразу за записью."""
+        self._start_stream()
+        
+        local = dataclasses.replace(hdr, crc32=0, compressed_size=hdr.compressed_size or 0)
+        size = local.get_size()
+        local.data_offset = self._data_end + _pad_to8(size)
+        blob = local.to_bytes(otik._endian_prefix(self.header.bytes_order)) + b"\x00" * (_pad_to8(size) - size)
+        
+        self._file.write(blob)
+        self._data_crc32 = zlib.crc32(blob, self._data_crc32)
+        self._data_end += len(blob)
+    
+    @staticmethod
+    def _seal_header(header: ArchiveHeader) -> bytes:
+        """Вычисляет header_crc32 и возвращает байты Header + CodeTable."""
         # Для вычисления header_crc32 поле header_crc32 должно быть 0
-        self.header.header_crc32 = 0                    # дубль на всякий случай
-        header_blob = self.header.to_bytes()
+        header.header_crc32 = 0
+        header_blob = header.to_bytes()
         # CRC только по header_blob
-        self.header.header_crc32 = zlib.crc32(header_blob) & 0xFFFFFFFF
-
+        header.header_crc32 = zlib.crc32(header_blob) & 0xFFFFFFFF
+        
         # Теперь финальное дерево байтов заголовка
-        header_blob = self.header.to_bytes()
+        return header.to_bytes()
+    
+    def _check_new_name(self, name: str) -> None:
+        """Проверяет лимит числа файлов и уникальность имени, регистрирует имя."""
+        if len(self._entries) >= MAX_FILES:
+            raise RuntimeError(f"Превышен лимит максимального кол-ва архивируемых файлов. Максимум: {MAX_FILES}")
+        
+        if name in self._names:
+            raise ValueError(f"Файл с именем {name} уже добавлен в архив")
+        self._names.add(name)
+    
+    def _open_append(self, flags: int) -> None:
+        """Загружает заголовок и DataTable существующего архива и встаёт на его конец.
+
+        Байты между концом DataSection и концом архива (старые DataTable и IndexSection)
+        становятся частью DataSection, поэтому CRC продолжается по ним, а затем по новым данным.
 
-        # ===================================== STAGE 6. Запись итогового архива =====================================
+        Args:
+            flags (int): флаги архива, добавляемые к существующим (учитывается F_INDEX_TABLE)
+        """
+        with ArchiveReader(self.path) as reader:
+            self.header = reader.open()
+            for hdr in reader.iter_headers():
+                self._entries.append((hdr, None))
+                self._names.add(hdr.name)
+            
+            data_end = self.header.get_data_section_end()
+            tail = reader._read(data_end, self.header.archive_size - data_end)
         
-        # Atomic write to disk
-        dir_path = os.path.dirname(self.path)           # Обрезка названия файла
-        name = os.path.basename(self.path)              # Выделение названия файла
-        os.makedirs(dir_path, exist_ok=True)            # Создать директорию, если нет.
+        self.header.flags |= flags & F_INDEX_TABLE
+        # потоковый архив становится обычным: заголовок в начале перезаписывается итоговым,
+        # локальные записи и старый трейлер остаются внутри DataSection как неиспользуемые байты
+        self.header.flags &= ~F_STREAM
+        self._data_crc32 = zlib.crc32(tail, self.header.data_crc32)
+        self._data_end = self._append_start = self.header.archive_size
         
-        fd, tmp = tempfile.mkstemp(dir=dir_path, prefix=name+".tmp_")
-        os.close(fd)
-        with open(tmp, "wb") as f:
-            # Header (96 bytes) with CodeTable (256 bytes)
-            f.write(header_blob)
-            
-            f.write(datatable_bytes)
-            
-            # DataSection
-            f.write(data_section_bytes)
+        self._file = open(self.path, "r+b")
+        self._file.seek(self._data_end)
+    
+    def _write_data(self, hdr: HeaderFile, compressed: Union[bytes, Iterable[bytes]]) -> None:
+        """Дописывает данные файла в конец DataSection, фиксирует data_offset, размер и CRC32 записи.
+
+        Args:
+            hdr (HeaderFile): заголовок файла
+            compressed: закодированные данные или итератор их порций
+        """
+        if isinstance(compressed, (bytes, bytearray, memoryview)):
+            compressed = (compressed,)
         
-        os.replace(tmp, self.path)
+        hdr.data_offset = self._data_end
+        crc = 0
+        for chunk in compressed:
+            self._file.write(chunk)
+            crc = zlib.crc32(chunk, crc)
+            self._data_crc32 = zlib.crc32(chunk, self._data_crc32)
+            self._data_end += len(chunk)
+        
+        hdr.crc32 = crc & 0xFFFFFFFF
+        hdr.compressed_size = self._data_end - hdr.data_offset
+        if hdr.compressed_size == 0:
+            hdr.data_offset = 0
+    
+    @staticmethod
+    def _calc_datatable_size(headers: Iterable[HeaderFile]) -> int:
+        """Размер DataTable: записи выравниваются по 8 байт (total_padd)."""
+        datatable_size = 0
+        for hdr in headers:
+            size = hdr.get_size()
+            hdr.total_padd = _pad_to8(size) - size
+            datatable_size += size + hdr.total_padd
+        return datatable_size
 
 class ArchiveReader:
     """
-    ArchiveReader: читает заголовок, code_table и позволяет итерировать по записям.
-    Реализованы парсинг заголовка и заглушечный парсинг DataTable.
+    ArchiveReader: читает заголовок, DataTable (с кодовыми таблицами файлов) и позволяет итерировать по записям.
+    
+    При mmap=True архив отображается в память один раз: заголовок и DataTable
+    разбираются прямо из отображения, данные записей отдаются срезами memoryview
+    без копирования, CRC проверяется по тем же срезам. Срезы действительны до close().
+    
+    Если в архиве есть IndexSection, DataTable разбирается лениво: поиск файла по имени
+    идёт двоичным поиском по индексу с чтением только найденной записи DataTable.
+    
+    Args:
+        path (str): путь к архиву
+        mmap (bool): отобразить архив в память вместо чтения через seek/read
     """
-    def __init__(self, path: str):
+    def __init__(self, path: str, mmap: bool = False):
         self.path = path
-        self.header: ArchiveHeader
-        self._local_file_headers :List[HeaderFile] = []
+        self.header: Optional[ArchiveHeader] = None
+        self._local_file_headers :Optional[List[HeaderFile]] = None    # None — DataTable ещё не разобран
+        self._by_name: Optional[dict] = None
+        self._index: Optional[IndexSection] = None
+        
+        self._use_mmap = mmap
+        self._file: Optional[BinaryIO] = None
+        self._map: Optional[mmap_mod.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._slices: List[memoryview] = []     # срезы, выданные _read; освобождаются в close()
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
 
     def open(self) -> ArchiveHeader:
         """Открывает файл с архивом
@@ -196,91 +559,252 @@ class ArchiveReader:
         Returns:
             ArchiveHeader: возвращает заголовок всего архива
         """        
-        with open(self.path, "rb") as f:
-            # read header + code_table
-            head = f.read(otik.META_SIZE)
-            
-            if head[:H_SIGNATURE_SIZE] != H_SIGNATURE:
-                raise ImportError(f"File signature is differs from the archive")
-            if len(head) < otik.META_SIZE:
-                raise ImportError(f"File too small to be valid {H_SIGNATURE} archive")
-            
-            self.header = ArchiveHeader.from_bytes(head)
-            # verify header CRC
-            self.header.validate_crc32()
+        # read header + code_table
+        head = self._read(0, otik.META_SIZE)
+        
+        if head[:H_SIGNATURE_SIZE] != H_SIGNATURE:
+            raise ImportError(f"File signature is differs from the archive")
+        if len(head) < otik.META_SIZE:
+            raise ImportError(f"File too small to be valid {H_SIGNATURE} archive")
+        
+        self.header = ArchiveHeader.from_bytes(head)
+        # verify header CRC
+        self.header.validate_crc32()
         
-            if self.header.file_count > _MAX_FILES:
-                raise RuntimeError(f"Превышен лимит максимального кол-ва файлов в архиве. Максимум: {_MAX_FILES}")
-                    
-            # parse file table (DataTable) lazily
-            self._parse_datatable(f)
+        if self.header.flags & F_STREAM:
+            # потоковый архив: итоговый заголовок — в трейлере
+            self.header = self._read_trailer()
+    
+        if self.header.file_count > MAX_FILES:
+            raise RuntimeError(f"Превышен лимит максимального кол-ва файлов в архиве. Максимум: {MAX_FILES}")
+        
+        self._local_file_headers = None
+        self._by_name = None
+        self._index = None
+        
+        if self.header.flags & F_INDEX_TABLE and self.header.index_section_offset:
+            # с индексом DataTable разбирается только по требованию
+            prefix = otik._endian_prefix(self.header.bytes_order)
+            self._index = IndexSection.from_bytes(self._read(self.header.index_section_offset, IX_FIXED_SIZE), prefix)
+            if self._index.count != self.header.file_count:
+                raise ImportError("Число записей индекса не совпадает с числом файлов архива")
+        else:
+            # parse file table (DataTable)
+            self._parse_datatable()
         
         return self.header
 
-    def _parse_datatable(self, f: BinaryIO) -> None:
-        """Парсит локальный репозиторий DataTable - массив заголовков архивированных файлов.
+    def close(self) -> None:
+        """Закрывает архив и снимает отображение; выданные срезы memoryview становятся недействительны.
 
-        Args:
-            f (BinaryIO): Поток чтения текучего архива
+        Raises:
+            BufferError: Если снаружи живут производные от выданных срезов memoryview
+                (срез среза, memoryview(...), np.frombuffer) — отображение остаётся открытым,
+                close() можно повторить после их освобождения.
+        """
+        for view in self._slices:
+            view.release()
+        self._slices.clear()
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        try:
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError as exc:
+                    raise BufferError(f"Archive {self.path} is still mapped: release memoryviews derived "
+                                      f"from entry data before close()") from exc
+                self._map = None
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _read(self, offset: int, size: int) -> Union[bytes, memoryview]:
+        """Читает size байт архива с позиции offset (при mmap — срез без копирования).
+        Файл открывается при первом чтении, поэтому read_data работает и без open()."""
+        if self._file is None:
+            self._file = open(self.path, "rb")
+            if self._use_mmap:
+                self._map = mmap_mod.mmap(self._file.fileno(), 0, access=mmap_mod.ACCESS_READ)
+                self._view = memoryview(self._map)
+        
+        if self._view is not None:
+            view = self._view[offset:offset + size]
+            self._slices.append(view)
+            return view
+        
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def _read_trailer(self) -> ArchiveHeader:
+        """Читает и проверяет итоговый заголовок потокового архива из его последних META_SIZE байт."""
+        size = len(self._view) if self._view is not None else os.fstat(self._file.fileno()).st_size
+        trailer = self._read(size - otik.META_SIZE, otik.META_SIZE) if size >= 2 * otik.META_SIZE else b""
+        if trailer[:H_SIGNATURE_SIZE] != H_SIGNATURE:
+            raise ImportError("Stream archive trailer is missing: the archive is truncated")
+        
+        header = ArchiveHeader.from_bytes(trailer)
+        header.validate_crc32()
+        if header.archive_size != size or not header.flags & F_STREAM:
+            raise ImportError("Stream archive trailer does not match the archive")
+        return header
+    
+    def _parse_datatable(self) -> None:
+        """Парсит локальный репозиторий DataTable - массив заголовков архивированных файлов.
+        DataTable занимает место от OFF_DATATABLE до начала DataSection (после дозаписи — от
+        datatable_offset до IndexSection или конца архива) и читается целиком.
         """        
         
         if self.header is None:
             raise RuntimeError("Header not loaded")
-        f.seek(otik.OFF_DATATABLE)
         
-        lengths_codes = self.header.code_table
+        start, end = self.header.get_datatable_bounds()
+        table = self._read(start, end - start)
+        
         prefix = otik._endian_prefix(self.header.bytes_order)
+        self._local_file_headers = []
+        self._by_name = None
 
+        pos = 0
         for i in range(self.header.file_count):
-            hdr_blob = f.read(FH_FIXED_SIZE)
-            if len(hdr_blob) < FH_FIXED_SIZE:
-                raise EOFError("Unexpected EOF while reading file header")
-            
-            name_len = otik._unpack(f"{prefix}H", hdr_blob, 28)
-            name_b = f.read(name_len)
-            if len(name_b) < name_len:
-                raise EOFError("Unexpected EOF while reading file name")
-                       
-            header = HeaderFile.from_bytes(hdr_blob, name_b, prefix)
-            header.lengths_codes = lengths_codes
+            header = _parse_file_header(table, pos, prefix, self.header.code_table)
             self._local_file_headers.append(header)
                         
-            # after name, move to next 8-byte aligned offset
-            cur_pos = f.tell()
-            next_aligned = _align_up(cur_pos, 8)
-            if next_aligned > cur_pos:
-                f.seek(next_aligned)
+            # after name (and code table), move to next 8-byte aligned offset
+            pos = _align_up(pos + header.get_size(), 8)
+    
+    def iter_headers(self) -> Iterator[HeaderFile]:
+        """Итератор по заголовкам файлов из DataTable; DataSection не читается.
+
+        Yields:
+            Iterator[HeaderFile]: заголовки файлов в порядке DataTable
+        """
+        if self.header is None:
+            self.open()
+        
+        if self._local_file_headers is None:
+            self._parse_datatable()
+        yield from self._local_file_headers
     
-    def iter_files(self) -> Iterator[Tuple[HeaderFile, bytes]]:
+    def iter_files(self) -> Iterator[Tuple[HeaderFile, Union[bytes, memoryview]]]:
         """Итератор по заголовкам из DataTable и упакованным данным. 
         Для файлов с compressed_size==0 возвращает empty bytes and data_offset==0.
                 
         Raises:
-            RuntimeError: _description_
-            ValueError: _description_
+            ValueError: CRC данных файла не совпадает с заголовком
 
         Yields:
             Iterator[Tuple[FileEntry, bytes]]: Итератор с заголовком файла и упакованными данными архива
+            (при mmap — memoryview на отображение архива)
         """        
+        for hdr in self.iter_headers():
+            yield hdr, self.read_data(hdr)
+    
+    def get(self, name: str) -> Tuple[HeaderFile, Union[bytes, memoryview]]:
+        """Возвращает заголовок и упакованные данные одного файла: читается только его срез DataSection.
+
+        Args:
+            name (str): имя файла в архиве
+
+        Raises:
+            KeyError: файла с таким именем нет в архиве
+
+        Returns:
+            Tuple[HeaderFile, bytes]: заголовок файла и упакованные данные
+        """
+        hdr = self.find(name)
+        if hdr is None:
+            raise KeyError(f"Файл {name} не найден в архиве")
+        return hdr, self.read_data(hdr)
+    
+    def extract(self, names: Iterable[str]) -> Iterator[Tuple[HeaderFile, Union[bytes, memoryview]]]:
+        """Итератор по выбранным файлам в порядке names (см. get).
+
+        Args:
+            names (Iterable[str]): имена файлов в архиве
+
+        Raises:
+            KeyError: файла с таким именем нет в архиве
+
+        Yields:
+            Iterator[Tuple[HeaderFile, bytes]]: заголовок файла и упакованные данные
+        """
+        for name in names:
+            yield self.get(name)
+    
+    def find(self, name: str) -> Optional[HeaderFile]:
+        """Ищет заголовок файла по имени; None — если файла нет.
+        При наличии индекса и неразобранной DataTable — двоичный поиск по IndexSection.
+        """
         if self.header is None:
             self.open()
         
-        if self.header is None:
-            raise RuntimeError("Header not loaded")
-                
-        with open(self.path, "rb") as f:
-            for hdr in self._local_file_headers:
-                if hdr.compressed_size == 0 or hdr.data_offset == 0:
-                    yield hdr, b""
-                else:
-                    f.seek(hdr.data_offset)
-                    data = f.read(hdr.compressed_size)
-                    
-                    # optional: validate per-file crc32
-                    if zlib.crc32(data) & 0xFFFFFFFF != hdr.crc32:
-                        raise ValueError(f"CRC mismatch for file {hdr.name}")
-                    
-                    yield hdr, data
+        if self._local_file_headers is None:
+            return self._find_indexed(name)
+        
+        if self._by_name is None:
+            self._by_name = {hdr.name: hdr for hdr in self._local_file_headers}
+        return self._by_name.get(name)
+    
+    def _find_indexed(self, name: str) -> Optional[HeaderFile]:
+        """Двоичный поиск по хэшу имени в IndexSection: O(log n) чтений записей индекса
+        и чтение одной записи DataTable (плюс по одной на каждую коллизию хэша)."""
+        prefix = otik._endian_prefix(self.header.bytes_order)
+        base = self.header.index_section_offset + IX_FIXED_SIZE
+        target = otik._name_hash(name)
+        
+        def entry_hash(i: int) -> int:
+            return otik._unpack(f"{prefix}Q", self._read(base + i * IX_ENTRY_SIZE + IE_OFF_NAME_HASH, 8), 0)
+        
+        # первая запись с хэшем >= target
+        lo, hi = 0, self._index.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if entry_hash(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        
+        max_entry_size = FH_FIXED_SIZE + MAX_FILE_NAME_LEN + CODE_TABLE_SIZE
+        while lo < self._index.count:
+            entry = IndexEntry.from_bytes(self._read(base + lo * IX_ENTRY_SIZE, IX_ENTRY_SIZE), 0, prefix)
+            if entry.name_hash != target:
+                break
+            hdr = _parse_file_header(self._read(entry.table_offset, max_entry_size), 0, prefix, self.header.code_table)
+            if hdr.name == name:
+                return hdr
+            lo += 1
+        
+        return None
+    
+    def read_data(self, hdr: HeaderFile) -> Union[bytes, memoryview]:
+        """Читает упакованные данные файла по data_offset и проверяет их CRC.
+        Заголовок архива не нужен: достаточно заголовка файла, полученного ранее.
+
+        Args:
+            hdr (HeaderFile): заголовок файла из DataTable
+
+        Raises:
+            EOFError: данные обрезаны
+            ValueError: CRC данных файла не совпадает с заголовком
+
+        Returns:
+            bytes: упакованные данные (при mmap — memoryview на отображение архива)
+        """
+        if hdr.compressed_size == 0 or hdr.data_offset == 0:
+            return b""
+        
+        data = self._read(hdr.data_offset, hdr.compressed_size)
+        if len(data) < hdr.compressed_size:
+            raise EOFError(f"Unexpected EOF while reading data of {hdr.name}")
+        
+        # optional: validate per-file crc32
+        if zlib.crc32(data) & 0xFFFFFFFF != hdr.crc32:
+            raise ValueError(f"CRC mismatch for file {hdr.name}")
+        
+        return data
 
     def verify_data_crc(self) -> bool:
         """Проверка DataCrc32: вычисляет CRC32 по секции данных и сравнивает с полем в заголовке.
@@ -289,33 +813,220 @@ class ArchiveReader:
             bool: True - если вычисленный crc32 для секции данных едентичен хранимому в шапке архива
         """        
         
-        # TODO: нужно тестироваать!
+        if self.header is None:
+            self.open()
+        
+        start = self.header.data_section_offset
+        end = self.header.get_data_section_end()
+        
+        if start == 0 or end <= start:
+            # нет данных — CRC32(b'') == 0
+            computed = zlib.crc32(b"") & 0xFFFFFFFF
+            return computed == self.header.data_crc32
         
-        with open(self.path, "rb") as f:
-            start = self.header.data_section_offset
-            end = self.header.archive_size
+        if self._view is not None:
+            return zlib.crc32(self._view[start:end]) & 0xFFFFFFFF == self.header.data_crc32
+        
+        self._file.seek(start)
+        to_read = end - start
+        crc = 0
+        # read in chunks
+        chunk_size = 2 << 16
+        
+        while to_read > 0:
+            chunk = self._file.read(min(chunk_size, to_read))
+            if not chunk:
+                break
+            
+            crc = zlib.crc32(chunk, crc)
+            to_read -= len(chunk)
+            
+        crc &= 0xFFFFFFFF
+        return crc == self.header.data_crc32
+
+    def verify_index(self) -> bool:
+        """Проверка CRC32 записей IndexSection; True, если индекса нет.
+
+        Returns:
+            bool: True - если вычисленный crc32 записей индекса совпадает с хранимым
+        """
+        if self.header is None:
+            self.open()
+        
+        if self._index is None:
+            return True
+        
+        entries = self._read(self.header.index_section_offset + IX_FIXED_SIZE, self._index.count * IX_ENTRY_SIZE)
+        return zlib.crc32(entries) & 0xFFFFFFFF == self._index.crc32
+
+class ArchiveStreamReader:
+    """
+    ArchiveStreamReader: читает потоковый архив (F_STREAM) за один проход из потока без перемотки
+    (например, stdin): заголовок-заготовка, затем для каждого файла локальная запись HeaderFile
+    и данные порциями, в конце — DataTable, IndexSection и трейлер с итоговым заголовком.
+    
+    CRC секции данных и данных каждого файла считается по мере чтения; finish() сверяет их
+    и размеры с трейлером и DataTable.
+    
+    Args:
+        src (BinaryIO): поток, открытый на чтение
+        chunk_size (int): размер порции данных файла
+    """
+    def __init__(self, src: BinaryIO, chunk_size: int = 1 << 20):
+        self._src = src
+        self.chunk_size = chunk_size
+        self.header: Optional[ArchiveHeader] = None
+        self._local_file_headers: List[HeaderFile] = []    # локальные записи с CRC и размерами по факту
+        
+        self._pos = 0                   # прочитано байт от начала архива
+        self._data_crc32 = 0            # CRC32 секции данных
+        self._entry_crc32 = 0           # CRC32 данных текущего файла
+        self._done = False              # все записи прочитаны (см. iter_entries)
+
+    def open(self) -> ArchiveHeader:
+        """Читает заголовок-заготовку потокового архива и проверяет его CRC.
+
+        Raises:
+            ImportError: поток не является потоковым архивом
+
+        Returns:
+            ArchiveHeader: заголовок-заготовка (archive_size = 0; итоговый заголовок — см. finish)
+        """
+        head = self._read_exact(otik.META_SIZE)
+        if head[:H_SIGNATURE_SIZE] != H_SIGNATURE:
+            raise ImportError("File signature differs from the archive")
+        
+        self.header = ArchiveHeader.from_bytes(head)
+        self.header.validate_crc32()
+        if not self.header.flags & F_STREAM:
+            raise ImportError("Archive is not a stream archive: it can be read from a file only")
+        
+        if self.header.file_count > MAX_FILES:
+            raise RuntimeError(f"Превышен лимит максимального кол-ва файлов в архиве. Максимум: {MAX_FILES}")
+        
+        return self.header
+    
+    def iter_entries(self) -> Iterator[Tuple[HeaderFile, Iterator[bytes]]]:
+        """Итератор по файлам архива в порядке записи. Данные файла отдаются итератором порций
+        (в блочном режиме порция — блок целиком, включая завершающий пустой блок); недочитанные
+        данные пропускаются при переходе к следующему файлу.
+
+        Yields:
+            Iterator[Tuple[HeaderFile, Iterator[bytes]]]: локальная запись файла и порции его данных
+        """
+        if self.header is None:
+            self.open()
+        
+        prefix = otik._endian_prefix(self.header.bytes_order)
+        for _ in range(self.header.file_count):
+            record = self._read_data(FH_FIXED_SIZE)
+            name_len = otik._unpack(f"{prefix}H", record, FH_OFF_NAME_LEN)
+            flags = record[FH_OFF_FLAGS]
+            size = FH_FIXED_SIZE + name_len
+            if flags & F_HUFFMAN and not flags & (F_BLOCKS | F_SOLID):
+                size += CODE_TABLE_SIZE
+            record += self._read_data(_pad_to8(size) - FH_FIXED_SIZE)
             
-            if start == 0 or end <= start:
-                # нет данных — CRC по пустому блоку == CRC32(b'') == 0?
-                # CRC32(b'') == 0, так что сравниваем
-                computed = zlib.crc32(b"") & 0xFFFFFFFF
-                return computed == self.header.data_crc32
+            hdr = _parse_file_header(record, 0, prefix, self.header.code_table)
+            if hdr.data_offset != self._pos:
+                raise ImportError("Ошибка ссылки на секцию данных")
             
-            f.seek(start)
-            to_read = end - start
-            crc = 0
-            # read in chunks
-            chunk_size = 2 << 16
+            self._entry_crc32 = 0
+            payload = self._iter_blocks(prefix) if hdr.flags & F_BLOCKS else self._iter_payload(hdr.compressed_size)
+            yield hdr, payload
+            for _ in payload:
+                pass
             
-            while to_read > 0:
-                chunk = f.read(min(chunk_size, to_read))
-                if not chunk:
-                    break
-                
-                crc = zlib.crc32(chunk, crc)
-                to_read -= len(chunk)
-                
-            crc &= 0xFFFFFFFF
-            return crc == self.header.data_crc32
+            hdr.crc32 = self._entry_crc32 & 0xFFFFFFFF
+            hdr.compressed_size = self._pos - hdr.data_offset
+            if hdr.compressed_size == 0:
+                hdr.data_offset = 0
+            self._local_file_headers.append(hdr)
+        
+        self._done = True
+    
+    def finish(self) -> List[HeaderFile]:
+        """Дочитывает DataTable, IndexSection и трейлер; сверяет CRC секции данных, CRC и размеры файлов.
+
+        Raises:
+            RuntimeError: записи прочитаны не все (см. iter_entries)
+            ImportError: трейлер отсутствует или не соответствует архиву
+            ValueError: CRC данных не совпадает с трейлером или DataTable
+
+        Returns:
+            List[HeaderFile]: заголовки файлов из DataTable (с итоговыми размерами)
+        """
+        if not self._done:
+            raise RuntimeError("Stream archive entries are not read to the end")
+        
+        datatable_offset = self._pos
+        rest = b"".join(iter(lambda: self._src.read(self.chunk_size), b""))
+        self._pos += len(rest)
+        
+        trailer = rest[-otik.META_SIZE:]
+        if len(trailer) < otik.META_SIZE or trailer[:H_SIGNATURE_SIZE] != H_SIGNATURE:
+            raise ImportError("Stream archive trailer is missing: the archive is truncated")
+        
+        header = ArchiveHeader.from_bytes(trailer)
+        header.validate_crc32()
+        if (header.archive_size != self._pos or header.datatable_offset != datatable_offset
+                or header.file_count != len(self._local_file_headers)):
+            raise ImportError("Stream archive trailer does not match the archive")
+        if header.data_crc32 != self._data_crc32 & 0xFFFFFFFF:
+            raise ValueError("CRC mismatch for data section")
+        self.header = header
+        
+        prefix = otik._endian_prefix(header.bytes_order)
+        table = memoryview(rest)[:header.get_datatable_bounds()[1] - datatable_offset]
+        headers = []
+        pos = 0
+        for local in self._local_file_headers:
+            hdr = _parse_file_header(table, pos, prefix, header.code_table)
+            if (hdr.name, hdr.data_offset, hdr.compressed_size, hdr.crc32) != \
+                    (local.name, local.data_offset, local.compressed_size, local.crc32):
+                raise ValueError(f"CRC mismatch for file {hdr.name}")
+            headers.append(hdr)
+            pos = _align_up(pos + hdr.get_size(), 8)
+        
+        return headers
+    
+    def _iter_payload(self, size: int) -> Iterator[bytes]:
+        """Данные файла целиком (размер известен из локальной записи) порциями по chunk_size."""
+        while size > 0:
+            chunk = self._read_data(min(self.chunk_size, size))
+            size -= len(chunk)
+            yield chunk
+    
+    def _iter_blocks(self, prefix: str) -> Iterator[bytes]:
+        """Блоки данных файла (заголовок + данные) до завершающего пустого блока включительно."""
+        while True:
+            block_b = self._read_data(BH_FIXED_SIZE)
+            if block_b[BH_OFF_FLAGS] & F_HUFFMAN:
+                block_b += self._read_data(CODE_TABLE_SIZE)
+            block = BlockHeader.from_bytes(block_b, 0, prefix)
+            
+            yield block_b + self._read_data(block.payload_size)
+            if block.raw_size == 0 and block.payload_size == 0:
+                return
+    
+    def _read_data(self, size: int) -> bytes:
+        """Читает size байт секции данных с накоплением CRC32 секции и текущего файла."""
+        data = self._read_exact(size)
+        self._data_crc32 = zlib.crc32(data, self._data_crc32)
+        self._entry_crc32 = zlib.crc32(data, self._entry_crc32)
+        return data
+    
+    def _read_exact(self, size: int) -> bytes:
+        """Читает ровно size байт из потока (read может вернуть меньше, например из pipe)."""
+        parts = []
+        remaining = size
+        while remaining > 0:
+            chunk = self._src.read(remaining)
+            if not chunk:
+                raise EOFError("Unexpected EOF while reading stream archive")
+            parts.append(chunk)
+            remaining -= len(chunk)
+        self._pos += size
+        return b"".join(parts)
 
 # End of module
\ No newline at end of file
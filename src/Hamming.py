@@ -1,5 +1,5 @@
 
-from typing import List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from utils import *
 
 """
@@ -23,8 +23,11 @@ from utils import *
 | ------- | ------------------- | ----------------------------------------------- |
 | 0       | 0                   | Нет ошибок                                      |
 | ≠0      | 1                   | Одиночная ошибка даннных → исправляется         |
-| ≠0      | 0                   | Ошибка в самом общем бите → исправляется        |
-| 0       | 1                   | ДВОЙНАЯ ошибка → обнаружена, но не исправляется |
+| 0       | 1                   | Ошибка в самом общем бите → исправляется        |
+| ≠0      | 0                   | ДВОЙНАЯ ошибка → обнаружена, но не исправляется |
+
+Синдром считается по информационным и контрольным битам; «глобальная чётность» —
+чётность всего кодового слова вместе с общим битом.
 
 Структура кодового слова:
     [ информационные биты ] + [ контрольные биты ] + [ общий бит четности ]
@@ -33,15 +36,30 @@ from utils import *
     r (int): Количество проверочных битов.
     n (int): Длина кодового слова.
     k (int): Количество информационных бит соответственно.
-    control_bits (List[int]): Позиции проверочных битов.
-    col (Dict[int,int]): Синдромы для всех позиций кодового слова.
-    syndrome2pos (Dict[int,int]): Отображение синдром → позиция ошибки.
+    H (List[List[int]]): Проверочная матрица r x n.
+    data_masks (List[int]): Строки P^T как маски над k-битным блоком.
+    syndrome_masks (List[int]): Строки [P^T | I_r] как маски над n-битным кодовым словом.
+    syndrome_table (List[int]): Синдром → маска ошибки (-1 — неисправимая ошибка).
+    corrected, uncorrectable (int): Счётчики ошибок последнего iter_unpack.
 
 API:
     Hamming(r).pack(data) → (encoded_bytes, padding)
     Hamming(r).unpack(encoded, padding) → (decoded_bytes, corrected, uncorrectable)
+    Hamming(r).iter_pack(chunks) / iter_unpack(chunks, size, padding) — то же порциями
 """
 
+# Статусы декодирования кодового слова
+OK              = 0
+CORRECTED       = 1
+UNCORRECTABLE   = 2
+
+# Таблицы кодирования/декодирования целиком строятся, если в них не больше элементов
+LUT_MAX_ENTRIES = 1 << 16   # r <= 4: n = 16, k = 11
+
+# Кэш таблиц на уровне модуля, строятся один раз на процесс: r → таблица
+_ENCODE_TABLES: Dict[int, List[int]] = {}
+_DECODE_TABLES: Dict[int, List[Tuple[int, int]]] = {}
+
 class Hamming:
 # -------------------------------------------------------------------------------------------------        
 
@@ -66,15 +84,27 @@ class Hamming:
         # g — столбец глобальной четности (все единицы)
         self.H = self._build_parity_matrix()
         
+        # Строки P^T как битовые маски над k-битным блоком данных (первый бит — старший)
+        self.data_masks = self._build_data_masks()
+        
+        # Маски синдрома над кодовым словом и таблица исправления одиночных ошибок
+        self.syndrome_masks = self._build_syndrome_masks()
+        self.syndrome_table = self._build_syndrome_table()
+        
+        # Счётчики ошибок потокового декодирования (iter_unpack)
+        self.corrected = 0
+        self.uncorrectable = 0
+        
 # -------------------------------------------------------------------------------------------------   
 
     def pack(self, data: bytes) -> tuple[bytes, int]:
         """Упаковывает поток байт с помощью кода Хэмминга.
 
         Последовательность действий:
-            1. Преобразуем входные байты в битовый массив.
-            2. Разбиваем поток на блоки по k бит.
-            3. Каждый блок кодируется в n бит.
+            1. Поток читается BitReader группами по 8 блоков по k бит (k байт).
+            2. Каждый блок как целое число кодируется в n-битное слово
+               (поиском в таблице при 2^n <= LUT_MAX_ENTRIES, иначе _encode_word).
+            3. 8 кодовых слов (n байт) дописываются в BitWriter одной записью.
             4. В конце добавляется padding, если поток не кратен k.
 
         Args:
@@ -86,24 +116,47 @@ class Hamming:
             - padding (int): Количество добитых нулевых бит в конце.
         """      
         
-        bits = bytes_to_bits(data)
+        if self.n == 8:
+            return self._pack_bytewise(data), 0
+        
+        k, n = self.k, self.n
+        k_mask = (1 << k) - 1
+        table = self._encode_table()
+        encode_word = table.__getitem__ if table else self._encode_word
         
-        # Нарезка искодного массива данных на блоки размером k
-        padding = (self.k - (len(bits) % self.k)) % self.k
-        if padding:
-            bits += [0]*padding
+        total_bits = len(data) * 8
+        padding = (k - total_bits % k) % k
+        blocks_total = (total_bits + padding) // k
+        
+        reader = BitReader(data)
+        writer = BitWriter(blocks_total * n // 8 + 1)
+        read_bytes, write_bytes = reader.read_bytes, writer.write_bytes
+        
+        def encode_group(group: int, blocks: int) -> int:
+            words = 0
+            for shift in range((blocks - 1) * k, -1, -k):
+                words = (words << n) | encode_word((group >> shift) & k_mask)
+            return words
+        
+        # k байт = 8 информационных блоков по k бит → 8 кодовых слов = n байт;
+        # группы выровнены по байтам, поэтому копируются целиком
+        for _ in range(blocks_total // 8):
+            write_bytes(encode_group(int.from_bytes(read_bytes(k), "big"), 8).to_bytes(n, "big"))
             
-        encoded_blocks = []
-        for i in range(0, len(bits), self.k):
-            block = bits[i:i+self.k]
-            encoded_blocks += self._encode_block(block)
-                    
-        encoded_data = bits_to_bytes(encoded_blocks)
-        return encoded_data, padding
+        # Хвост: чтение за концом данных даёт нули — это и есть padding
+        tail_blocks = blocks_total % 8
+        if tail_blocks:
+            writer.write(encode_group(reader.read(tail_blocks * k), tail_blocks), tail_blocks * n)
+        
+        return writer.getvalue(), padding
     
     def unpack(self, data: bytes, padding: int) -> tuple[bytes, int, int]:
         """Декодирует поток байт, закодированный Хэммингом.
 
+        Кодовые слова извлекаются BitReader как целые числа группами по 8
+        (n байт), информационные блоки дописываются в BitWriter. При 2^n <= LUT_MAX_ENTRIES слово декодируется одним поиском
+        в таблице, иначе — по таблице синдромов (_decode_word).
+
         Args:
             data (bytes): Закодированные данные.
             padding (int): Количество добитых нулевых бит, добавленных при pack().
@@ -115,37 +168,135 @@ class Hamming:
             - uncorrectable (int): Число необрабатываемых (двойных) ошибок
         """     
         
-        bits = bytes_to_bits(data)
+        if self.n == 8 and len(data) % 2 == 0 and padding == 0:
+            return self._unpack_bytewise(data)
         
-        # process n-bit codewords
-        if len(bits) % self.n != 0:
-            # allow trailing zeros
-            pass
+        k, n = self.k, self.n
+        n_mask = (1 << n) - 1
+        table = self._decode_table()
+        decode_word = table.__getitem__ if table else self._decode_word
         
-        decoded_bits = []
         corrected = 0
         uncorrectable = 0
         
-        for i in range(0, len(bits), self.n):
-            block = bits[i:i+self.n]
-            
-            if len(block) < self.n:
-                break
-            
-            info_bits, was_corrected, pos, was_uncorrectable = self._decode_block(block)
-            decoded_bits += info_bits
+        # неполное кодовое слово в конце потока отбрасывается
+        words_total = len(data) * 8 // n
+        
+        reader = BitReader(data)
+        writer = BitWriter(words_total * k // 8 + 1)
+        read_bytes, write_bytes = reader.read_bytes, writer.write_bytes
+        
+        def decode_group(group: int, words: int) -> int:
+            nonlocal corrected, uncorrectable
+            blocks = 0
+            for shift in range((words - 1) * n, -1, -n):
+                block, status = decode_word((group >> shift) & n_mask)
+                blocks = (blocks << k) | block
+                if status == CORRECTED:
+                    corrected += 1
+                elif status == UNCORRECTABLE:
+                    uncorrectable += 1
+            return blocks
+        
+        # n байт = 8 кодовых слов → 8 информационных блоков = k байт
+        for _ in range(words_total // 8):
+            write_bytes(decode_group(int.from_bytes(read_bytes(n), "big"), 8).to_bytes(k, "big"))
+        
+        tail_words = words_total % 8
+        if tail_words:
+            writer.write(decode_group(reader.read(tail_words * n), tail_words), tail_words * k)
             
-            if was_corrected:
-                corrected += 1
-            if was_uncorrectable:
-                uncorrectable += 1
-                
         # trim padding
-        if padding:
-            decoded_bits = decoded_bits[: -padding]
-            
-        decoded_data = bits_to_bytes(decoded_bits)
-        return decoded_data, corrected, uncorrectable
+        out = writer.getvalue()
+        return out[:max(words_total * k - padding, 0) // 8], corrected, uncorrectable
+
+    def encoded_size(self, size: int) -> Tuple[int, int]:
+        """Размер результата pack для входа из size байт.
+
+        Returns:
+            tuple:
+            - int: Размер кода в байтах.
+            - int: padding (как вернёт pack).
+        """
+        if self.n == 8:
+            return 2 * size, 0
+        
+        total_bits = size * 8
+        padding = (self.k - total_bits % self.k) % self.k
+        return ((total_bits + padding) // self.k * self.n + 7) // 8, padding
+    
+    def decoded_size(self, size: int, padding: int) -> int:
+        """Размер результата unpack для кода из size байт с заданным padding."""
+        return max(size * 8 // self.n * self.k - padding, 0) // 8
+    
+    def iter_pack(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Потоковый pack: порции перенарезаются по k байт (целые группы из 8 блоков),
+        поэтому результат совпадает с pack всех данных одним куском.
+
+        Args:
+            chunks (Iterable[bytes]): Порции входных данных.
+
+        Yields:
+            Iterator[bytes]: Закодированные порции (padding — см. encoded_size).
+        """
+        for piece in iter_aligned(chunks, self.k):
+            yield self.pack(piece)[0]
+    
+    def iter_unpack(self, chunks: Iterable[bytes], size: int, padding: int) -> Iterator[bytes]:
+        """Потоковый unpack: порции перенарезаются по n байт (целые группы из 8 кодовых слов).
+        Счётчики исправленных и неисправимых ошибок накапливаются в self.corrected / self.uncorrectable.
+
+        Args:
+            chunks (Iterable[bytes]): Порции закодированного потока.
+            size (int): Размер всего закодированного потока в байтах.
+            padding (int): Количество добитых нулевых бит, добавленных при pack().
+
+        Yields:
+            Iterator[bytes]: Раскодированные порции.
+        """
+        self.corrected = self.uncorrectable = 0
+        remaining = self.decoded_size(size, padding)
+        
+        for piece in iter_aligned(chunks, self.n):
+            out, corrected, uncorrectable = self.unpack(piece, 0)
+            self.corrected += corrected
+            self.uncorrectable += uncorrectable
+            # padding отбрасывается по известному размеру результата
+            yield out[:remaining]
+            remaining -= min(len(out), remaining)
+    
+    def _pack_bytewise(self, data: bytes) -> bytes:
+        """pack для r = 3 (n = 8, k = 4): каждый полубайт входа — одно кодовое слово-байт.
+
+        Старшие и младшие полубайты переводятся в кодовые слова через bytes.translate
+        и чередуются срезами; padding всегда 0.
+        """
+        table = self._encode_table()
+        high = bytes(table[b >> 4] for b in range(256))
+        low = bytes(table[b & 0xF] for b in range(256))
+        
+        out = bytearray(2 * len(data))
+        out[0::2] = data.translate(high)
+        out[1::2] = data.translate(low)
+        return bytes(out)
+    
+    def _unpack_bytewise(self, data: bytes) -> tuple[bytes, int, int]:
+        """unpack для r = 3 (n = 8, k = 4): каждый байт потока — одно кодовое слово.
+
+        Кодовые слова переводятся в исправленные полубайты и статусы через bytes.translate;
+        пары полубайтов не пересекаются по битам и объединяются одним ИЛИ над целыми.
+        """
+        table = self._decode_table()
+        data = bytes(data)
+        high = bytes(table[w][0] << 4 for w in range(256))
+        low = bytes(table[w][0] for w in range(256))
+        status = bytes(table[w][1] for w in range(256))
+        
+        size = len(data) // 2
+        out = int.from_bytes(data[0::2].translate(high), "big") | int.from_bytes(data[1::2].translate(low), "big")
+        statuses = data.translate(status)
+        
+        return out.to_bytes(size, "big"), statuses.count(CORRECTED), statuses.count(UNCORRECTABLE)
 
 # -------------------------------------------------------------------------------------------------     
 
@@ -164,8 +315,24 @@ class Hamming:
         if len(data_bits) != self.k:
             raise ValueError("data_bits length must equal k")
         
-        parity_bits, g = self._calc_parity_bits(data_bits)
-        return data_bits + parity_bits + [g]
+        block = 0
+        for bit in data_bits:
+            block = (block << 1) | bit
+            
+        word = self._encode_word(block)
+        return [(word >> i) & 1 for i in range(self.n - 1, -1, -1)]
+    
+    def _encode_word(self, block: int) -> int:
+        """Кодирует k-битный блок, заданный целым числом, в n-битное кодовое слово.
+
+        Args:
+            block (int): Информационные биты (первый бит блока — старший).
+
+        Returns:
+            int: [ информационные биты | контрольные биты | глобальный бит ]
+        """
+        parity, g = self._calc_parity_bits(block)
+        return (((block << self.r) | parity) << 1) | g
                     
 # -------------------------------------------------------------------------------------------------  
 
@@ -185,110 +352,98 @@ class Hamming:
 
         if len(encoded_bits) != self.n:
             raise ValueError("recv_bits length must equal n")
-                
-        s, syndrome_val, double_error = self._check_errors_block(encoded_bits)
-            
-        # ---- Обработка ошибок ----
-        return self._handler_decoded_errors(encoded_bits, double_error, syndrome_val)
-
-# -------------------------------------------------------------------------------------------------  
-
-    def _calc_parity_bits(self, data_bits: List[int]) -> Tuple[List[int], int]:
-        """Вычисляет r контрольных бит и 1 глобальный.
-
-        Args:
-            data_bits (List[int]): _description_
-
-        Raises:
-            ValueError: _description_
-
-        Returns:
-            Tuple[List[int], int]: _description_
-        """        
-
-        if len(data_bits) != self.k:
-            raise ValueError("Expected k data bits")
-
-        # Контрольные биты
-        parity_bits = []
-        for row in self.H:
-            s = 0
-            for i in range(self.k):
-                s ^= data_bits[i] & row[i]
-            parity_bits.append(s)
-
-        # Глобальная четность по всему слову: d + p
-        global_parity = sum(data_bits) ^ sum(parity_bits)
-        global_parity &= 1
+        
+        word = 0
+        for bit in encoded_bits:
+            word = (word << 1) | bit
+        
+        block, status = self._decode_word(word)
+        data_bits = [(block >> i) & 1 for i in range(self.k - 1, -1, -1)]
+        
+        # Позиция исправленного бита (1-based, слева) по маске ошибки
+        pos = -1
+        if status == CORRECTED:
+            pos = self.n - self.syndrome_table[self._syndrome(word)].bit_length() + 1
+        return data_bits, status == CORRECTED, pos, status == UNCORRECTABLE
 
-        return parity_bits, global_parity
+    def _decode_word(self, word: int) -> Tuple[int, int]:
+        """Декодирует n-битное кодовое слово, заданное целым числом.
 
-    def _check_errors_block(self, encoded_bits: List[int]) -> tuple[List[int], int, bool]:
-        """Проверяет кодовое слово на ошибки при декодировании
+        Одиночная ошибка исправляется одним XOR с маской из syndrome_table.
 
         Args:
-            encoded_bits (List[int]): Проверяемое кодовое слово
+            word (int): Кодовое слово (первый бит — старший).
 
         Returns:
-            tuple[List[int], int, bool]: _description_
-        """        
-        
-        # ---- синдром r бит ----
-        syndrome = []
-        for row in self.H:
-            s = 0
-            for i in range(self.n):
-                s ^= encoded_bits[i] & row[i]
-            syndrome.append(s)
-
-        syndrome_val = 0
-        for i, b in enumerate(syndrome):
-            syndrome_val |= (b << i)
+            Tuple[int, int]: k информационных бит и статус (OK / CORRECTED / UNCORRECTABLE).
+        """
+        syndrome = self._syndrome(word)
         
-        g_recv = encoded_bits[-1]
-        # ---- проверка глобальной четности ----
-        global_parity_calc = sum(encoded_bits[:-1]) & 1
-        double_error = (global_parity_calc != g_recv)
+        if not word.bit_count() & 1:
+            # Чётное число ошибок: нет ошибок или двойная ошибка
+            return word >> (self.r + 1), (OK if syndrome == 0 else UNCORRECTABLE)
         
-        return syndrome, syndrome_val, double_error
+        # Нечётное число ошибок: считаем ошибку одиночной
+        error = self.syndrome_table[syndrome]
+        if error < 0:
+            return word >> (self.r + 1), UNCORRECTABLE
+        return (word ^ error) >> (self.r + 1), CORRECTED
     
-    def _handler_decoded_errors(self, encoded_bits: List[int], double_error: bool, syndrome_val: int) -> Tuple[List[int], bool, int, bool]:
-        """Обработчик ошибок, возникших при декодировании кодового слова
+    def _syndrome(self, word: int) -> int:
+        """Синдром кодового слова: бит i соответствует строке i матрицы H."""
+        syndrome = 0
+        for mask in reversed(self.syndrome_masks):
+            syndrome = (syndrome << 1) | ((word & mask).bit_count() & 1)
+        return syndrome
+
+# -------------------------------------------------------------------------------------------------  
+
+    def _calc_parity_bits(self, block: int) -> Tuple[int, int]:
+        """Вычисляет r контрольных бит и 1 глобальный.
+
+        Контрольный бит j — чётность пересечения блока с маской j-й строки H.
 
         Args:
-            encoded_bits (List[int]): _description_
-            double_error (bool): _description_
-            syndrome_val (int): _description_
+            block (int): k информационных бит (первый бит блока — старший).
 
         Returns:
-            Tuple[List[int], bool, int, bool]: _description_
+            Tuple[int, int]: контрольные биты (бит строки 0 — старший) и глобальный бит чётности.
         """        
-        
-        data = encoded_bits[:self.k]
-        
-        # ---- случаи обработки ----
-        # 1) Нет ошибок: синдром 0, глобальная четность верна
-        if syndrome_val == 0 and not double_error:
-            return data, False, -1, False
 
-        # 2) Двойная ошибка: синдром != 0 и глобальная четность неверна
-        if syndrome_val != 0 and double_error:
-            return data, False, -1, True
+        # Контрольные биты
+        parity = 0
+        for mask in self.data_masks:
+            parity = (parity << 1) | ((block & mask).bit_count() & 1)
 
-        # 3) Одиночная ошибка: синдром указывает позицию (1-based)
-        # Позиции соответствуют столбцам H: 1..n
-        if not (1 <= syndrome_val <= self.k):
-            # Неверный синдром — двойная ошибка
-            return data, False,  -1, True
+        # Глобальная четность по всему слову: d + p
+        global_parity = (block.bit_count() + parity.bit_count()) & 1
 
-        # Исправляем
-        encoded_bits[syndrome_val - 1] ^= 1
+        return parity, global_parity
 
-        # После исправления извлекаем данные
-        corrected_data = encoded_bits[:self.k]
+    def _encode_table(self) -> Optional[List[int]]:
+        """Таблица блок → кодовое слово на все 2^k блоков (кэшируется по r).
 
-        return corrected_data, True, syndrome_val, False  
+        Returns:
+            Optional[List[int]]: таблица или None, если 2^n > LUT_MAX_ENTRIES.
+        """
+        if (1 << self.n) > LUT_MAX_ENTRIES:
+            return None
+        if self.r not in _ENCODE_TABLES:
+            _ENCODE_TABLES[self.r] = [self._encode_word(block) for block in range(1 << self.k)]
+        return _ENCODE_TABLES[self.r]
+    
+    def _decode_table(self) -> Optional[List[Tuple[int, int]]]:
+        """Таблица кодовое слово → (исправленный блок, статус) на все 2^n слов (кэшируется по r).
 
+        Returns:
+            Optional[List[Tuple[int, int]]]: таблица или None, если 2^n > LUT_MAX_ENTRIES.
+        """
+        if (1 << self.n) > LUT_MAX_ENTRIES:
+            return None
+        if self.r not in _DECODE_TABLES:
+            _DECODE_TABLES[self.r] = [self._decode_word(word) for word in range(1 << self.n)]
+        return _DECODE_TABLES[self.r]
+    
     def _build_parity_matrix(self) -> List[List[int]]:
         """
         Строит матрицу проверок H размером r x n:
@@ -298,19 +453,24 @@ class Hamming:
 
         Где:
             P — произвольная матрица, удовлетворяющая 2^r >= k + r + 1.
-            В данной реализации P строится как столбцы бинарных номеров.
+            В данной реализации P строится как столбцы бинарных номеров, не являющихся
+            степенями двойки (3, 5, 6, 7, 9, ...): степени двойки — столбцы I_r,
+            так что все столбцы H различны и синдром однозначно указывает бит.
 
         Возвращает матрицу H: список строк, каждая строка — r-я проверка.
         """
 
         H = []
+        
+        # Синдромы информационных бит: k чисел 1..2^r-1, не являющихся степенями двойки
+        data_syndromes = [pos for pos in range(1, 1 << self.r) if pos & (pos - 1)]
 
         # Строим r строк
         for parity_row in range(self.r):
             row = []
 
-            # Информационные биты: бинарный номер позиции
-            for pos in range(1, self.k + 1):
+            # Информационные биты: бинарный номер столбца
+            for pos in data_syndromes:
                 row.append((pos >> parity_row) & 1)
 
             # Контрольные биты: единичная диагональ
@@ -324,4 +484,55 @@ class Hamming:
 
         return H
     
+    def _build_data_masks(self) -> List[int]:
+        """Переводит информационную часть строк H в битовые маски.
+
+        Returns:
+            List[int]: маска для каждой строки H; бит k-1-i соответствует i-му биту блока.
+        """
+        masks = []
+        for row in self.H:
+            mask = 0
+            for bit in row[:self.k]:
+                mask = (mask << 1) | bit
+            masks.append(mask)
+        return masks
+    
+    def _build_syndrome_masks(self) -> List[int]:
+        """Маски строк [P^T | I_r] над n-битным кодовым словом (общий бит не входит).
+
+        Returns:
+            List[int]: маски в порядке строк H.
+        """
+        masks = []
+        for j, data_mask in enumerate(self.data_masks):
+            # контрольный бит строки j — (r-1-j)-й в поле контрольных бит, которое стоит перед общим
+            masks.append((data_mask << (self.r + 1)) | (1 << (self.r - j)))
+        return masks
+    
+    def _build_syndrome_table(self) -> List[int]:
+        """Строит таблицу синдром → маска ошибки для случая нечётного числа ошибок.
+
+        Синдром 0 — ошибка в общем бите. Синдромы столбцов H дают маску
+        соответствующего бита: столбцы попарно различны, поэтому каждый
+        ненулевой синдром указывает ровно один бит.
+        Остальные синдромы (-1) — неисправимая ошибка.
+
+        Returns:
+            List[int]: 2^r элементов, индекс — синдром (бит i — строка i матрицы H).
+        """
+        table = [-1] * (1 << self.r)
+        table[0] = 1
+        
+        # Столбцы контрольных бит: синдром 1 << j
+        for j in range(self.r):
+            table[1 << j] = 1 << (self.r - j)
+            
+        # Столбцы информационных бит: синдром = бинарный номер столбца P^T
+        for i in range(self.k):
+            syndrome = sum(self.H[row][i] << row for row in range(self.r))
+            table[syndrome] = 1 << (self.n - 1 - i)
+            
+        return table
+    
 # -------------------------------------------------------------------------------------------------  
\ No newline at end of file
@@ -1,10 +1,18 @@
 
+import math
+import sys
 from heapq import heappush, heappop
-from typing import Dict, Tuple
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Tuple
 from collections import Counter
 
 from utils import *
 
+try:
+    import numpy as np
+except ImportError:         # NumPy необязателен: остаётся чисто питоновский путь
+    np = None
+
 """Канонический кодек Хаффмана.
 
 Поддерживает:
@@ -19,26 +27,53 @@ from utils import *
     canonical_codes (Dict[int, Tuple[int, int]]): Канонические коды (код, длина).
 
 API:
-    - Huffman(): класс с методами pack/unpack.
+    - Huffman(max_code_len): класс с методами pack/unpack;
+      count/build_table/pack_with_table — общая модель для нескольких файлов (solid);
+      use_table/encoded_size/iter_pack/iter_unpack — потоковое кодирование порциями готовой моделью;
+      entropy/estimate_size — оценка сжимаемости по частотам без построения кода.
 """
 
+LOOKUP_BITS     = 10    # ширина первичной таблицы декодирования, бит
+REFILL_BYTES    = 32     # подкачка резервуара декодера, байт за шаг
+ENCODE_STEP     = 1 << 15   # сколько байт входа кодер переводит в одно целое за шаг
+PAIR_TABLE_MIN_INPUT = 1 << 16  # с какого размера входа кодировать пары символов
+MAX_CODE_LEN    = 15    # ограничение длины кода по умолчанию, бит
+MAX_CODE_LEN_LIMIT = 24    # допустимый максимум: подтаблица декодера — до 2^(24 - LOOKUP_BITS) ячеек
+NUMPY_MIN_INPUT = 1 << 16  # с какого размера входа кодировать через NumPy
+NUMPY_MAX_CODE_LEN = 57    # код со сдвигом должен помещаться в uint64
+
 class Huffman:
 # -------------------------------------------------------------------------------------------------        
     
-    def __init__(self):
+    def __init__(self, max_code_len: int = MAX_CODE_LEN, use_numpy: bool = True):
         """Инициализирует локальные СД
+
+        Args:
+            max_code_len (int): Максимальная длина кода при кодировании,
+                не более MAX_CODE_LEN_LIMIT (размер подтаблиц декодера растёт как 2^длина).
+            use_numpy (bool): Разрешить векторизованное кодирование через NumPy
+                для входов от NUMPY_MIN_INPUT байт (если NumPy установлен).
+
+        Raises:
+            ValueError: Если max_code_len вне диапазона 1..MAX_CODE_LEN_LIMIT.
         """        
+        if not 1 <= max_code_len <= MAX_CODE_LEN_LIMIT:
+            raise ValueError(f"max_code_len must be in 1..{MAX_CODE_LEN_LIMIT}")
+        
+        self.max_code_len = max_code_len
+        self.use_numpy = use_numpy and np is not None
         self.freqs: dict = dict()
         self.lengths : dict = dict()
         self.canonical_codes: dict[int, tuple[int,int]] = dict()
 
 # -------------------------------------------------------------------------------------------------   
 
-    def pack(self, data: bytes) -> tuple[bytes, bytes, int]:
+    def pack(self, data: bytes, freqs: Counter = None) -> tuple[bytes, bytes, int]:
         """Кодирует массив байтов с помощью канонического Хаффмана.
 
         Args:
             data (bytes): Входные данные.
+            freqs (Counter): Уже посчитанные частоты data (см. count); None — посчитать.
 
         Returns:
             tuple:
@@ -47,15 +82,183 @@ class Huffman:
             - padding (int): Количество незначимых бит в packed.
         """
         
-        self.freqs = Counter(data)
+        self.freqs = freqs if freqs is not None else self.count(data)
+        lengths_codes = self.build_table(self.freqs)
         
-        self._build_huffman_lengths()
+        packed, padding = self._encode_with_model(data)
+        return packed, lengths_codes, padding
+    
+    def pack_with_table(self, data: bytes, lengths_codes: bytes) -> tuple[bytes, int]:
+        """Кодирует массив байтов готовой таблицей длин (общей моделью нескольких файлов).
+
+        Args:
+            data (bytes): Входные данные.
+            lengths_codes (bytes): Таблица длин кодов (256 байт), см. build_table.
+
+        Returns:
+            tuple:
+            - packed (bytes): Кодированные данные.
+            - padding (int): Количество незначимых бит в packed.
+
+        Raises:
+            ValueError: Если во входе есть символ, которому таблица не назначила код.
+        """
+        
+        self.use_table(lengths_codes)
+        
+        self.freqs = self.count(data)
+        self.encoded_size(self.freqs)
+        
+        return self._encode_with_model(data)
+    
+    def use_table(self, lengths_codes: bytes) -> None:
+        """Устанавливает модель по готовой таблице длин кодов (256 байт).
+
+        Raises:
+            ValueError: Если длина кода больше MAX_CODE_LEN_LIMIT или длины нарушают
+                неравенство Крафта (таблица повреждена — префиксного кода с такими длинами нет).
+        """
+        lengths = lengths_from_bytes(lengths_codes)
+        if lengths and max(lengths.values()) > MAX_CODE_LEN_LIMIT:
+            raise ValueError(f"Code length {max(lengths.values())} exceeds the limit {MAX_CODE_LEN_LIMIT}")
+        if sum(1 << (MAX_CODE_LEN_LIMIT - l) for l in lengths.values()) > 1 << MAX_CODE_LEN_LIMIT:
+            raise ValueError("Code lengths violate the Kraft inequality")
+        self.lengths = lengths
+        self.canonical_codes = dict()
         self._canonical_codes_from_lengths()
+    
+    def encoded_size(self, freqs: Counter) -> Tuple[int, int]:
+        """Размер результата кодирования текущей моделью данных с частотами freqs.
+
+        Args:
+            freqs (Counter): Частоты символов кодируемых данных.
+
+        Returns:
+            tuple:
+            - int: Размер кода в байтах.
+            - int: padding (незначимых бит в последнем байте).
+
+        Raises:
+            ValueError: Если во входе есть символ, которому таблица не назначила код.
+        """
         
-        lengths_codes = lengths_to_bytes(self.lengths)
+        missing = [sym for sym in freqs if sym not in self.canonical_codes]
+        if missing:
+            raise ValueError(f"Symbol {missing[0]:#04x} has no code in the shared table")
         
-        packed, padding = self._encode_bytes(data)
-        return packed, lengths_codes, padding
+        total_bits = sum(self.canonical_codes[sym][1] * f for sym, f in freqs.items())
+        return (total_bits + 7) // 8, -total_bits % 8
+    
+    @staticmethod
+    def entropy(freqs: Counter) -> float:
+        """Энтропия Шеннона данных с частотами freqs.
+
+        Args:
+            freqs (Counter): Частоты символов.
+
+        Returns:
+            float: Бит на символ (0..8); 0 для пустых данных.
+        """
+        
+        total = sum(freqs.values())
+        if not total:
+            return 0.0
+        return -sum(f / total * math.log2(f / total) for f in freqs.values() if f)
+    
+    @classmethod
+    def estimate_size(cls, freqs: Counter) -> int:
+        """Нижняя оценка размера кода в байтах: средняя длина кода Хаффмана не меньше энтропии,
+        поэтому, если оценка не меньше исходного размера, строить код бессмысленно.
+
+        Args:
+            freqs (Counter): Частоты символов кодируемых данных.
+
+        Returns:
+            int: Оценка размера кода в байтах (без таблицы длин).
+        """
+        
+        return math.floor(cls.entropy(freqs) * sum(freqs.values()) / 8)
+    
+    def iter_pack(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Потоково кодирует порции данных текущей моделью (см. build_table).
+
+        Биты неполного последнего байта порции переносятся в следующую, поэтому
+        результат побайтно совпадает с кодированием всех данных одним куском.
+
+        Args:
+            chunks (Iterable[bytes]): Порции входных данных.
+
+        Yields:
+            Iterator[bytes]: Кодированные данные; последний байт потока добит нулями
+            (padding — см. encoded_size).
+        """
+        
+        writer = BitWriter()
+        numpy_codes = self.use_numpy and self.lengths and max(self.lengths.values()) <= NUMPY_MAX_CODE_LEN
+        code_strings = self._code_strings()
+        pair_strings = None     # строится один раз на поток, при первой большой порции
+        
+        for chunk in chunks:
+            if numpy_codes and len(chunk) >= NUMPY_MIN_INPUT:
+                packed, padding = self._encode_bytes_numpy(chunk)
+                writer.write_bytes(packed[:-1])
+                writer.write(packed[-1] >> padding, 8 - padding)
+            else:
+                if pair_strings is None and len(chunk) >= PAIR_TABLE_MIN_INPUT:
+                    pair_strings = self._pair_code_strings(code_strings)
+                self._encode_into(writer, chunk, code_strings, pair_strings)
+            yield writer.take()
+        
+        writer.align()
+        yield writer.take()
+    
+    def iter_unpack(self, chunks: Iterable[bytes], lengths_codes: bytes, total_bits: int) -> Iterator[bytes]:
+        """Потоково декодирует поток, поданный порциями произвольного размера.
+
+        Args:
+            chunks (Iterable[bytes]): Порции закодированного потока.
+            lengths_codes (bytes): Таблица длин кодов (256 байт).
+            total_bits (int): Количество значимых бит во всём потоке.
+
+        Yields:
+            Iterator[bytes]: Декодированные данные по мере поступления порций.
+        """
+        
+        self.use_table(lengths_codes)
+        
+        decode_table, max_len = self._build_decode_table_from_canonical()
+        return self._decode_bits_with_table(chunks, decode_table, max_len, total_bits)
+    
+    def count(self, data: bytes) -> Counter:
+        """Считает частоты символов (для больших входов — через NumPy).
+
+        Args:
+            data (bytes): Входные данные.
+
+        Returns:
+            Counter: символ -> число вхождений.
+        """
+        
+        if self.use_numpy and len(data) >= NUMPY_MIN_INPUT:
+            counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+            return Counter({sym: int(f) for sym, f in enumerate(counts.tolist()) if f})
+        return Counter(data)
+    
+    def build_table(self, freqs: Counter) -> bytes:
+        """Строит канонический код по частотам и возвращает сериализованную таблицу длин.
+
+        Args:
+            freqs (Counter): Частоты символов (например, сумма count по нескольким файлам).
+
+        Returns:
+            bytes: Таблица длин кодов (256 байт).
+        """
+        
+        self.freqs = freqs
+        self.lengths = dict()
+        self._build_huffman_lengths()
+        self._canonical_codes_from_lengths()
+        return lengths_to_bytes(self.lengths)
     
     def unpack(self, data_bytes: bytes, lengths_codes: bytes, padding: int) -> bytes:
         """Декодирует байты, закодированные каноническим кодом Хаффмана.
@@ -69,14 +272,12 @@ class Huffman:
             bytes: Декодированные исходные данные.
         """
 
-        self.lengths = lengths_from_bytes(lengths_codes)
-        self._canonical_codes_from_lengths()
+        self.use_table(lengths_codes)
         
-        decode_table = self._build_decode_table_from_canonical()
-        encoded_bits = bytes_to_bits(data_bytes)
-        total_bits = len(encoded_bits) - padding
+        decode_table, max_len = self._build_decode_table_from_canonical()
+        total_bits = len(data_bytes) * 8 - padding
         
-        return self._decode_bits_with_table(encoded_bits, decode_table, total_bits)
+        return b"".join(self._decode_bits_with_table((data_bytes,), decode_table, max_len, total_bits))
         
 # -------------------------------------------------------------------------------------------------        
 
@@ -85,6 +286,7 @@ class Huffman:
 
         Использует минимальную кучу для построения дерева.  
         Символы, отсутствующие во входных данных, не включаются.
+        Если дерево глубже max_code_len, длины пересчитываются через package-merge.
         """
 
         # Входной файл пуст
@@ -93,8 +295,9 @@ class Huffman:
 
         # Входной файл состоит из одного символа
         if len(self.freqs) == 1:
-            sym, _ = self.freqs.popitem()
-            return {sym:1} 
+            sym = next(iter(self.freqs))
+            self.lengths[sym] = 1
+            return self.lengths
 
         # Формирование стека
         # элемент кучи — это узел дерева Хаффмана вида
@@ -102,7 +305,9 @@ class Huffman:
         heap = []
         uniq_id = 0
 
-        for sym, w in self.freqs.items():
+        # порядок символов канонический: при равных весах дерево не зависит от порядка
+        # вставки в Counter (подсчёт через NumPy и через Counter(data) дают один код)
+        for sym, w in sorted(self.freqs.items()):
             heappush(heap, (w, uniq_id, sym))
             uniq_id += 1
 
@@ -125,6 +330,46 @@ class Huffman:
                 dfs(right, depth + 1)
 
         dfs(root, 0)  # Каждый символ получает длину кода равный его глубине в дереве
+
+        # Дерево слишком глубокое — перестраиваем длины с ограничением
+        if max(self.lengths.values()) > self.max_code_len:
+            self._limit_huffman_lengths()
+
+    def _limit_huffman_lengths(self):
+        """Вычисляет оптимальные длины кодов не длиннее max_code_len алгоритмом package-merge.
+
+        Каждая из max_code_len - 1 итераций объединяет соседние пары текущего списка
+        в «пакеты» и сливает их с исходными листьями по весу. Из итогового списка
+        берутся 2n - 2 самых лёгких элемента: длина кода символа равна числу
+        вхождений его листа в выбранные элементы.
+
+        Raises:
+            ValueError: Если символов больше, чем 2^max_code_len.
+        """
+        
+        if len(self.freqs) > (1 << self.max_code_len):
+            raise ValueError(f"Невозможно уложить {len(self.freqs)} символов в коды длиной {self.max_code_len}")
+
+        # Узел: (вес, символ) — лист, (вес, (узел, узел)) — пакет
+        leaves = sorted(((w, sym) for sym, w in self.freqs.items()), key=lambda x: (x[0], x[1]))
+        
+        current = leaves
+        for _ in range(self.max_code_len - 1):
+            packages = [(current[i][0] + current[i + 1][0], (current[i], current[i + 1]))
+                        for i in range(0, len(current) - 1, 2)]
+            # Устойчивая сортировка: при равном весе листья идут раньше пакетов
+            current = sorted(leaves + packages, key=lambda x: x[0])
+
+        lengths = dict.fromkeys(self.freqs, 0)
+        stack = current[:2 * len(leaves) - 2]
+        while stack:
+            _, node = stack.pop()
+            if isinstance(node, int):
+                lengths[node] += 1
+            else:
+                stack.extend(node)
+                
+        self.lengths = lengths
     
     def _canonical_codes_from_lengths(self):
         """Генерирует канонические коды Хаффмана по таблице длин.
@@ -170,8 +415,25 @@ class Huffman:
 
 # -------------------------------------------------------------------------------------------------
 
+    def _encode_with_model(self, data: bytes) -> Tuple[bytes, int]:
+        """Кодирует data текущими canonical_codes, выбирая векторизованный путь для больших входов.
+
+        Args:
+           data (bytes): Входные данные; self.freqs должны быть посчитаны по ним.
+
+        Returns:
+            tuple:
+            - bytes: Упакованные данные.
+            - int: padding bits to bytes.
+        """
+        
+        vectorized = self.use_numpy and len(data) >= NUMPY_MIN_INPUT
+        if vectorized and self.lengths and max(self.lengths.values()) <= NUMPY_MAX_CODE_LEN:
+            return self._encode_bytes_numpy(data)
+        return self._encode_bytes(data)
+    
     def _encode_bytes(self, data: bytes) -> Tuple[bytes, int]:
-        """Кодирует массив байтов, заменяя каждый символ его битовым кодом.
+        """Кодирует массив байтов, заменяя каждый символ его битовым кодом (см. _encode_into).
 
         Args:
            data (bytes): Входные данные.
@@ -182,74 +444,268 @@ class Huffman:
             - int: padding bits to bytes.
         """
 
-        bitbuf = []
-        for b in data:
-            new_code, l = self.canonical_codes[b]
-            byte_to_bits(bitbuf, new_code, l)
+        code_strings = self._code_strings()
+        freqs = self.freqs if self.freqs else Counter(data)
+        total_bits = sum(len(code_strings[sym]) * f for sym, f in freqs.items())
+        
+        # буфер выделяется заранее: итоговая длина известна по частотам
+        writer = BitWriter((total_bits + 7) // 8)
+        self._encode_into(writer, data, code_strings)
+        padding = writer.align()
+        return writer.getvalue(), padding
+    
+    def _encode_into(self, writer: BitWriter, data: bytes, code_strings: List[str] = None,
+                     pair_strings: List[str] = None) -> None:
+        """Дописывает в writer коды символов data (без выравнивания по байту).
+
+        Коды склеиваются в строку из '0'/'1' через str.join по таблице (цикл идёт внутри
+        интерпретатора, а не в байт-коде), и каждые ENCODE_STEP байт входа строка
+        переводится в целое int(s, 2) и передаётся в BitWriter одной записью.
+        Для больших входов символы кодируются парами по таблице на 2^16 элементов.
 
-        # собираем из бит байты, заполняя старшие биты первыми
-        out = bits_to_bytes(bitbuf)
-        return out, 8 - len(bitbuf) % 8
+        Args:
+           writer (BitWriter): Выходной поток.
+           data (bytes): Входные данные.
+           code_strings: Результат _code_strings (если уже построен).
+           pair_strings: Результат _pair_code_strings (если уже построен).
+        """
+
+        if code_strings is None:
+            code_strings = self._code_strings()
         
-# -------------------------------------------------------------------------------------------------
+        write = writer.write
+        view = memoryview(data)
+
+        # Большие входы: пары символов читаются как uint16 в нативном порядке байт
+        body = 0
+        if len(data) >= PAIR_TABLE_MIN_INPUT:
+            if pair_strings is None:
+                pair_strings = self._pair_code_strings(code_strings)
+            lookup = pair_strings.__getitem__
+            body = len(data) & ~1
+            for start in range(0, body, ENCODE_STEP):
+                bits = "".join(map(lookup, view[start:min(start + ENCODE_STEP, body)].cast("H")))
+                write(int(bits, 2), len(bits))
+
+        lookup = code_strings.__getitem__
+        for start in range(body, len(data), ENCODE_STEP):
+            bits = "".join(map(lookup, view[start:start + ENCODE_STEP]))
+            if bits:
+                write(int(bits, 2), len(bits))
+    
+    def _encode_bytes_numpy(self, data: bytes) -> Tuple[bytes, int]:
+        """Векторизованный вариант _encode_bytes, результат побайтно совпадает.
 
-    def _build_decode_table_from_canonical(self) -> Dict[int, Dict[int, int]]:
-        """Создаёт таблицу для быстрого декодирования канонических кодов.
+        Коды и длины символов выбираются индексированием массивов, начальные позиции
+        кодов в битовом потоке — накопленной суммой длин. Каждый код сдвигается
+        к своей позиции внутри окна из width байт, и окна раскладываются в выходной
+        буфер по байтовым дорожкам через np.bincount: коды не пересекаются по битам,
+        поэтому сумма равна побитовому ИЛИ.
+
+        Args:
+           data (bytes): Входные данные.
 
-        Таблица строится в формате:
-            length → {code → symbol}
-            
         Returns:
-            Dict[int, Dict[int, int]]: Cловарь таблицы декодирования {длина_кода: {битовый_код: символ}}
-        
-        Пример:
-            Вход: {65: (0b00, 2), 66: (0b01, 2), 67: (0b110, 3)}
-            Выход: {2: {0: 65, 1: 66}, 3: {6: 67}}
+            tuple:
+            - bytes: Упакованные данные.
+            - int: padding bits to bytes.
         """
         
-        # Создаем пустую таблицу декодирования
-        table = {}
+        codes = self._code_array()
+        code_by_sym = np.array([code for code, _ in codes], dtype=np.uint64)
+        len_by_sym = np.array([l for _, l in codes], dtype=np.int64)
+        
+        symbols = np.frombuffer(data, dtype=np.uint8)
+        sym_lens = len_by_sym[symbols]
+        ends = np.cumsum(sym_lens)
+        starts = ends - sym_lens
+        
+        total_bits = int(ends[-1])
+        out_len = (total_bits + 7) // 8
+        
+        # Окно: код длиной до max_len со сдвигом до 7 бит внутри первого байта
+        width = (int(len_by_sym.max()) + 7 + 7) // 8
+        shifts = (width * 8 - sym_lens - (starts & 7)).astype(np.uint64)
+        windows = code_by_sym[symbols] << shifts
+        byte_idx = starts >> 3
+        
+        out = np.zeros(out_len + width, dtype=np.float64)
+        for lane in range(width):
+            lane_bytes = (windows >> np.uint64(8 * (width - 1 - lane))) & np.uint64(0xFF)
+            out += np.bincount(byte_idx + lane, weights=lane_bytes, minlength=len(out))
+        
+        padding = (8 - total_bits % 8) % 8
+        return out[:out_len].astype(np.uint8).tobytes(), padding
+    
+    def _code_array(self) -> List[Tuple[int, int]]:
+        """Переупаковывает canonical_codes в массив из 256 элементов (код, длина).
 
-        # Проходим по всем символам и их кодам
-        for sym, (code, code_length) in self.canonical_codes.items():
-            # Для каждой длины кода создаем подтаблицу, если её еще нет
-            # setdefault(l, {}) возвращает словарь для длины l, создает пустой если нет
-            subtable_for_length = table.setdefault(code_length, {})
+        Returns:
+            List[Tuple[int, int]]: индекс = символ; отсутствующие символы — (0, 0).
+        """
+        codes = [(0, 0)] * 256
+        for sym, code_len in self.canonical_codes.items():
+            codes[sym] = code_len
+        return codes
+    
+    def _code_strings(self) -> List[str]:
+        """Переупаковывает canonical_codes в массив из 256 строк из '0'/'1' для _encode_into.
 
-            # Добавляем в подтаблицу соответствие: битовый_код -> символ
-            subtable_for_length[code] = sym
+        Returns:
+            List[str]: индекс = символ; отсутствующие символы — "".
+        """
+        return [format(code, f"0{l}b") if l else "" for code, l in self._code_array()]
+    
+    def _pair_code_strings(self, code_strings: List[str]) -> List[str]:
+        """Строит таблицу кодов для пар символов, индексируемую uint16 из memoryview.cast("H").
+
+        Args:
+            code_strings (List[str]): коды символов из _code_strings.
 
+        Returns:
+            List[str]: 65536 строк (код первого символа + код второго).
+        """
+        present = [sym for sym in range(256) if code_strings[sym]]
+        little = sys.byteorder == "little"
+        
+        table = [""] * (1 << 16)
+        for first in present:
+            c1 = code_strings[first]
+            for second in present:
+                key = first | (second << 8) if little else (first << 8) | second
+                table[key] = c1 + code_strings[second]
         return table
+        
+# -------------------------------------------------------------------------------------------------
 
-    def _decode_bits_with_table(self, encoded_bits, decode_table_by_length, total_bits: int):
-        """Декодирование битового потока по таблице по длине.
+    def _build_decode_table_from_canonical(self) -> Tuple[List[Tuple[int, int]], int]:
+        """Создаёт двухуровневую таблицу для табличного декодирования канонических кодов.
+
+        Первичная таблица индексируется следующими LOOKUP_BITS битами потока.
+        Для кода длины l <= LOOKUP_BITS заполняются все 2^(LOOKUP_BITS - l) ячеек
+        с его префиксом значением (символ, длина). Коды длиннее LOOKUP_BITS
+        группируются по первым LOOKUP_BITS битам: ячейка первичной таблицы хранит
+        (подтаблица, -ширина_подтаблицы), а подтаблица индексируется оставшимися битами.
+        Пустые ячейки (неполный код) хранят (0, 0).
 
-        Args:
-            encoded_bits:
-            decode_table_by_length: dict length -> dict(code_bits -> symbol)
-            total_bits: количество декодируемых бит
-            
         Returns:
-            byteArray: раскодированный массив байт
+            tuple:
+            - List[Tuple[int, int]]: первичная таблица декодирования.
+            - int: максимальная длина кода (сколько бит нужно иметь в резервуаре).
+
+        Пример (LOOKUP_BITS = 3):
+            Вход: {65: (0b0, 1), 66: (0b10, 2), 67: (0b11, 2)}
+            Выход: [(65,1)]*4 + [(66,2)]*2 + [(67,2)]*2, 2
         """
-        out = bytearray()
-        cur = 0
-        cur_len = 0
 
-        bits_consumed = 0
-        
-        for bit in encoded_bits:        
-            cur = (cur << 1) | bit
-            cur_len += 1
-            bits_consumed += 1
+        invalid = (0, 0)
+        table: list = [invalid] * (1 << LOOKUP_BITS)
+        if not self.canonical_codes:
+            return table, 0
+
+        max_len = max(l for _, l in self.canonical_codes.values())
+
+        # Ширина подтаблицы для каждого префикса длинных кодов
+        sub_bits: Dict[int, int] = {}
+        for code, l in self.canonical_codes.values():
+            if l > LOOKUP_BITS:
+                prefix = code >> (l - LOOKUP_BITS)
+                sub_bits[prefix] = max(sub_bits.get(prefix, 0), l - LOOKUP_BITS)
+
+        for prefix, bits in sub_bits.items():
+            table[prefix] = ([invalid] * (1 << bits), -bits)
+
+        for sym, (code, l) in self.canonical_codes.items():
+            if l <= LOOKUP_BITS:
+                # Все индексы, начинающиеся с данного кода
+                shift = LOOKUP_BITS - l
+                start = code << shift
+                table[start:start + (1 << shift)] = [(sym, l)] * (1 << shift)
+            else:
+                extra = l - LOOKUP_BITS
+                subtable, neg_bits = table[code >> extra]
+                shift = -neg_bits - extra
+                start = (code & ((1 << extra) - 1)) << shift
+                subtable[start:start + (1 << shift)] = [(sym, l)] * (1 << shift)
+
+        return table, max_len
+
+    def _decode_bits_with_table(self, chunks: Iterable[bytes], decode_table: List[Tuple[int, int]], max_len: int, total_bits: int) -> Iterator[bytes]:
+        """Табличное декодирование битового потока, поданного порциями.
+
+        Биты подкачиваются из BitReader текущей порции в локальный резервуар по REFILL_BYTES байт,
+        за один шаг по таблице декодируется целый символ. Если в резервуаре меньше бит,
+        чем нужно для поиска в таблице, а порция кончилась — остаток переносится в следующую.
+
+        Args:
+            chunks (Iterable[bytes]): закодированный поток по порциям.
+            decode_table: первичная таблица из _build_decode_table_from_canonical.
+            max_len (int): максимальная длина кода.
+            total_bits (int): количество значимых бит в потоке.
+
+        Yields:
+            Iterator[bytes]: раскодированные байты каждой порции
+
+        Raises:
+            ValueError: Если в потоке встречена последовательность, не являющаяся кодом,
+                или поток кончился раньше total_bits (последний код выходит за конец данных).
+        """
+        if total_bits <= 0 or max_len == 0:
+            return
+
+        need = max(max_len, LOOKUP_BITS)
+        mask = (1 << LOOKUP_BITS) - 1
+        refill_bits = REFILL_BYTES * 8
+
+        acc = 0             # резервуар бит
+        nbits = 0           # количество бит в резервуаре
+        consumed = 0        # декодировано бит
+        received = 0        # получено бит из порций
+        limit = total_bits  # до какого бита декодировать в текущей порции
+
+        # None — конец потока: BitReader за концом отдаёт нули — lookahead для последних кодов;
+        # сами коды не должны заходить в эти нули
+        for chunk in chain(chunks, (None,)):
+            if chunk is None:
+                read, avail = BitReader(b"").read, need
+                limit = min(total_bits, received)
+            else:
+                read, avail = BitReader(chunk).read, len(chunk) * 8
+                received += avail
             
-            if bits_consumed > total_bits:
-                break
+            out = bytearray()
+            append = out.append
             
-            table = decode_table_by_length.get(cur_len, None)
-            if table and cur in table:
-                out.append(table[cur])
-                cur = 0
-                cur_len = 0
-                
-        return bytes(out)
+            while consumed < limit:
+                while nbits < need:
+                    if avail <= 0:
+                        break
+                    take = refill_bits if avail >= refill_bits else avail
+                    acc = ((acc & ((1 << nbits) - 1)) << take) | read(take)
+                    nbits += take
+                    avail -= take
+                else:
+                    sym, l = decode_table[(acc >> (nbits - LOOKUP_BITS)) & mask]
+                    if l <= 0:
+                        if l == 0:
+                            raise ValueError("Повреждённый поток Хаффмана: неизвестный код")
+                        # Длинный код: дочитываем из подтаблицы
+                        sub_bits = -l
+                        sym, l = sym[(acc >> (nbits - LOOKUP_BITS - sub_bits)) & ((1 << sub_bits) - 1)]
+                        if l == 0:
+                            raise ValueError("Повреждённый поток Хаффмана: неизвестный код")
+
+                    nbits -= l
+                    consumed += l
+                    append(sym)
+                    continue
+                break       # порция кончилась
+            
+            if out:
+                yield bytes(out)
+            if consumed > limit:
+                raise ValueError("Повреждённый поток Хаффмана: код выходит за конец данных")
+            if consumed == total_bits:
+                return
+        
+        raise ValueError(f"Повреждённый поток Хаффмана: декодировано {consumed} бит из {total_bits}")
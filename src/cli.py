@@ -1,8 +1,10 @@
 
 import argparse
 
-from main import pack_archive, unpack_archive
+from main import pack_archive, unpack_archive, verify_archive, CHUNK_SIZE, MIN_GAIN
 from Archiver import ArchiveReader
+from Huffman import MAX_CODE_LEN, MAX_CODE_LEN_LIMIT
+from Archive_Formats import DEFAULT_BLOCK_SIZE, F_HUFFMAN
 
 # =================================================================================================================
 
@@ -16,12 +18,23 @@ def init() -> argparse.ArgumentParser:
     # pack
     # ------------------------------------------------------------
     p = sub.add_parser("pack", help="Создать архив")
-    p.add_argument("-i", "--input", nargs="+", required=True)
-    p.add_argument("-o", "--output", required=True)
+    p.add_argument("-i", "--input", nargs="+", required=True, help="Файлы; '-' — читать данные из stdin")
+    p.add_argument("-o", "--output", required=True, help="Архив; '-' — потоковый архив в stdout")
     p.add_argument("--bytes-order", default="little", choices=["little", "big"])
     p.add_argument("--huffman", action="store_true")
     p.add_argument("--hamming", action="store_true")
     p.add_argument("--r", type=int, default=4, help="r for Hamming (n=2^r-1). Default 4 => n=15,k=11")
+    p.add_argument("--max-code-len", type=int, default=MAX_CODE_LEN, choices=range(1, MAX_CODE_LEN_LIMIT + 1), metavar="N",
+                   help=f"Максимальная длина кода Хаффмана, 1..{MAX_CODE_LEN_LIMIT}. Default {MAX_CODE_LEN}")
+    p.add_argument("--block-size", type=int, default=0, help=f"Блочный режим: размер блока в байтах (например {DEFAULT_BLOCK_SIZE}). 0 — файл целиком")
+    p.add_argument("--jobs", type=int, default=1, help="Число процессов: файлы кодируются параллельно; для одного файла >1 включает блочный режим")
+    p.add_argument("--append", action="store_true", help="Дописать файлы в существующий архив без перезаписи его данных")
+    p.add_argument("--dedup", action="store_true", help="Хранить данные одинаковых по содержимому файлов один раз")
+    p.add_argument("--solid", action="store_true", help="Одна модель Хаффмана на все файлы (выгодно для множества мелких файлов)")
+    p.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"Размер порции потокового кодирования в байтах. Default {CHUNK_SIZE}")
+    p.add_argument("--min-gain", type=float, default=MIN_GAIN,
+                   help=f"Минимальная ожидаемая экономия (доля, по выборочной оценке энтропии), при которой файл сжимается Хаффманом. Default {MIN_GAIN}")
+    p.add_argument("--stdin-name", default="stdin", help="Имя файла в архиве для данных из stdin (-i -). Default stdin")
     p.add_argument("--verbose", action="store_true")
     p.add_argument("--stats", action="store_true")
     p.add_argument("--crc32", action="store_true")
@@ -37,8 +50,11 @@ def init() -> argparse.ArgumentParser:
     # unpack
     # ------------------------------------------------------------
     u = sub.add_parser("unpack", help="Распаковать архив")
-    u.add_argument("-i", "--input", required=True)
-    u.add_argument("-o", "--output", required=True)
+    u.add_argument("-i", "--input", required=True, help="Архив; '-' — потоковый архив из stdin")
+    u.add_argument("-o", "--output", required=True, help="Каталог; '-' — содержимое файлов в stdout")
+    u.add_argument("--jobs", type=int, default=1, help="Число процессов: файлы декодируются параллельно; для одного файла — его блоки")
+    u.add_argument("--only", nargs="+", metavar="NAME", help="Распаковать только указанные файлы")
+    u.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"Размер порции потокового декодирования в байтах. Default {CHUNK_SIZE}")
     u.add_argument("--verbose", action="store_true")
     u.set_defaults(func=unpack_archive)
 
@@ -54,6 +70,7 @@ def init() -> argparse.ArgumentParser:
     # ------------------------------------------------------------
     v = sub.add_parser("verify", help="Проверить CRC")
     v.add_argument("-i", "--input", required=True)
+    v.add_argument("--jobs", type=int, default=1, help="Число процессов для проверки файлов")
     v.set_defaults(func=verify_mode)
 
     # ------------------------------------------------------------
@@ -70,26 +87,29 @@ def init() -> argparse.ArgumentParser:
 def info_mode(args):
     """Печатает заголовок и информацию об архиве."""
     print("[info] Analyzing:", args.input)
-    reader = ArchiveReader(args.input)
-    hdr = reader.open()
-
-    print("Archive header:")
-    print(reader.header)
-
-    print("\nFiles:")
-    for header, _ in reader.iter_files():
-        print(f" • {header.name}")
-        print(f"   Original size: {header.original_size}")
-        print(f"   Compressed:    {header.compressed_size}")
-        print(f"   Flags:         {header.flags}")
-        print(f"   Hamming r:     {header.control_bits}")
+    with ArchiveReader(args.input, mmap=True) as reader:
+        hdr = reader.open()
+
+        print("Archive header:")
+        print(reader.header)
+
+        print("\nFiles:")
+        for header in reader.iter_headers():
+            print(f" • {header.name}")
+            print(f"   Original size: {header.original_size}")
+            print(f"   Compressed:    {header.compressed_size}")
+            print(f"   Flags:         {header.flags}")
+            # решение предварительной оценки: несжимаемые файлы хранятся без Хаффмана
+            print(f"   Huffman:       {'yes' if header.flags & F_HUFFMAN else 'no'}")
+            if header.original_size:
+                # фактическая экономия после упаковки, а не выборочная оценка estimate_gain,
+                # с которой сравнивается --min-gain (её печатает pack --stats)
+                print(f"   Achieved gain: {1 - header.compressed_size / header.original_size:.1%} (actual, not the --min-gain estimate)")
+            print(f"   Hamming r:     {header.control_bits}")
 
 def verify_mode(args):
     """Проверяет архив без распаковки."""
-    print("[verify]", args.input)
-    reader = ArchiveReader(args.input)
-    hdr = reader.open()
-    print("CRC:", reader.verify_data_crc())
+    verify_archive(args)
 
 # =================================================================================================================
 
@@ -112,6 +132,15 @@ def cli_mode():
         output = out
         mode = (use_huff, use_hamm)
         r = control_bits
+        max_code_len = MAX_CODE_LEN
+        block_size = 0
+        jobs = 1
+        append = False
+        dedup = False
+        solid = False
+        chunk_size = CHUNK_SIZE
+        stdin_name = "stdin"
+        min_gain = MIN_GAIN
         bytes_order = 0
         verbose = True
         stats = True
@@ -129,6 +158,11 @@ def prepare_pack_args(args):
     # Преобразуем mode
     args.mode = build_flags(args)
         
+    # Несколько файлов кодируются параллельно целиком; единственный файл —
+    # параллельно по независимым блокам
+    if args.jobs > 1 and len(args.input) == 1 and not args.block_size and not args.solid:
+        args.block_size = DEFAULT_BLOCK_SIZE
+        
     # Преобразуем bytes_order
     if hasattr(args, "bytes_order"):
         args.bytes_order = bytes_order_to_flag(args.bytes_order)
@@ -150,7 +184,8 @@ def build_flags(args):
         ((1 if args.hamming else 0) << 1) |
         ((1 if crc else 0) << 2) |
         ((1 if sha else 0) << 3) |
-        ((1 if idx else 0) << 4)
+        ((1 if idx else 0) << 4) |
+        ((1 if args.solid else 0) << 6)
     )
 
 # ==========================================
@@ -2,9 +2,19 @@
 CLI encoder:
 Usage example:
   py src/main.py pack -i file1.bin file2.jpg -o data.arc --stats --verbose
-  py src/main.py unpack -i data.arc -o out/
+  py src/main.py pack -i big.bin -o data.arc --huffman --block-size 131072
+  py src/main.py pack -i big.bin -o data.arc --huffman --hamming --jobs 16
+  py src/main.py pack -i logs/*.log -o logs.arc --huffman --jobs 8
+  py src/main.py pack -i today.log -o logs.arc --huffman --append
+  py src/main.py pack -i assets/* -o assets.arc --huffman --dedup
+  py src/main.py pack -i configs/*.json -o configs.arc --huffman --solid
+  py src/main.py pack -i media/* -o media.arc --huffman --min-gain 0.1 --stats
+  producer | py src/main.py pack -i - -o - --huffman --stdin-name dump.sql | ssh host "py src/main.py unpack -i - -o out/"
+  py src/main.py unpack -i data.arc -o out/ --jobs 16
+  py src/main.py unpack -i data.arc -o out/ --chunk-size 4194304
+  py src/main.py unpack -i data.arc -o out/ --only file2.jpg
   py src/main.py info -i data.arc
-  py src/main.py verify -i data.arc
+  py src/main.py verify -i data.arc --jobs 8
   py src/main.py cli
 
 mode: two-char string: bit0=huffman, bit1=hamming, e.g. "11" both.
@@ -13,7 +23,13 @@ r: parameter r for Hamming (default 4 -> n=15,k=11)
 
 # =================================================================================================================
 
+import argparse
 import cli
+import sys
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext, redirect_stdout
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
 
 from Huffman import *
 from Hamming import *
@@ -21,68 +37,354 @@ from Archiver import *
 
 # =================================================================================================================
 
+PIPELINE_WINDOW = 64    # сколько блоков/файлов одновременно находится в работе у пула
+CHUNK_SIZE      = 1 << 20   # порция потокового кодирования/декодирования по умолчанию (--chunk-size)
+READ_AHEAD      = 2         # сколько порций читается с диска заранее, пока кодируется текущая
+STDIO           = "-"       # -i - / -o -: стандартный ввод/вывод вместо файла
+SAMPLE_COUNT    = 16        # число выборок предварительной оценки сжимаемости
+SAMPLE_SIZE     = 16 << 10  # размер одной выборки, байт
+MIN_GAIN        = 0.05      # минимальная ожидаемая доля экономии, при которой файл сжимается Хаффманом (--min-gain)
+
+# =================================================================================================================
+
 def pack_archive(args):
     """Архивирует файлы в контейнер."""
     if args.verbose:
         print("[pack] preparing archive:", args.output)
         print("[pack] input files:", args.input)
-        
-    writer = ArchiveWriter(args)
     
+    if args.solid and (not args.huffman or args.block_size):
+        raise ValueError("--solid requires --huffman and is incompatible with --block-size")
+    
+    # -i -: данные читаются из stdin за один проход (блочный режим); -o -: потоковый архив в stdout
+    if STDIO in args.input and (len(args.input) > 1 or args.solid):
+        raise ValueError("-i - must be the only input and is incompatible with --solid")
+    to_stdout = args.output == STDIO
+    if to_stdout and (args.append or args.dedup):
+        raise ValueError("-o - is incompatible with --append and --dedup")
+        
+    files = []
     for f in args.input:
-        if not os.path.exists(f):
+        if f != STDIO and not os.path.exists(f):
             print(f"[ERROR] File not found: {f}")
             continue
+        files.append(f)
+    
+    # --append: существующие данные архива не переписываются
+    append = args.append and os.path.exists(args.output)
+    
+    # Имена известны заранее — место под DataTable резервируется, данные пишутся сразу на диск
+    names = [args.stdin_name if f == STDIO else os.path.basename(f) for f in files]
+    stream = sys.__stdout__.buffer if to_stdout else None
+    
+    with ArchiveWriter(args, names, append=append, stream=stream) as writer, _make_pool(args.jobs) as pool:
+        if append:
+            # заголовки блоков должны совпадать с порядком байт архива
+            args.bytes_order = writer.header.bytes_order
+            
+            kept = []
+            for f, name in zip(files, names):
+                if writer.has_file(name):
+                    print(f"[ERROR] File already in archive: {name}")
+                    continue
+                kept.append((f, name))
+            files, names = [f for f, _ in kept], [name for _, name in kept]
         
-        name = os.path.basename(f)
-        if args.verbose:
-            print(f"[pack] Encoding file: {name}")
+        # --dedup: файлы с одинаковым содержимым кодируются и записываются один раз
+        digests = [file_digest(f) if args.dedup and f != STDIO else None for f in files]
+        seen = set()
+        unique = []
+        for f, digest in zip(files, digests):
+            if digest is None or digest not in seen:
+                unique.append(f)
+                seen.add(digest)
+        
+        # --solid: первый проход строит одну модель по всем файлам, второй кодирует ею каждый файл;
+        # при дозаписи в solid-архив используется его модель
+        code_table = None
+        if args.solid:
+            if append and writer.header.flags & F_SOLID:
+                code_table = writer.header.code_table
+            else:
+                # несжимаемые файлы (см. use_huffman) в общую модель не входят
+                shared = [f for f in unique if use_huffman(f, args, shared=True)]
+                code_table = build_solid_table(shared, args.max_code_len, args.chunk_size)
+            writer.set_code_table(code_table)
         
-        res = encode_file(f, args)
-        writer.add_file(name, res)
+        # крупные файлы кодируются по одному (их блоки — параллельно) и пишутся в архив по мере готовности блоков
+        large = any(f == STDIO or os.path.getsize(f) > WHOLE_FILE_MAX_SIZE for f in unique)
         
-    writer.finalize()
+        if pool is not None and len(unique) > 1 and not large:
+            # Файлы кодируются параллельно, каждый целиком в своём процессе; результаты
+            # пишутся в архив в исходном порядке, в работе не более 2 * jobs файлов
+            options = _encode_options(args)
+            items = ((f, options, None, code_table) for f in unique)
+            results = _map_ordered(pool, encode_file, items, window=2 * args.jobs)
+        else:
+            # один файл — параллельно кодируются его блоки
+            results = (encode_file(f, args, pool, code_table, stream=True) for f in unique)
+        
+        for name, digest in zip(names, digests):
+            source = writer.find_duplicate(digest) if digest is not None else None
+            if source is not None:
+                writer.add_duplicate(name, digest)
+                if args.verbose:
+                    print(f"[pack] Duplicate of {source.name}: {name}")
+                continue
+            
+            res = next(results)
+            if args.verbose:
+                print(f"[pack] Encoded file: {name}")
+            if args.huffman and not res["flags"] & F_HUFFMAN:
+                print(f"Huffman skipped for {name}: data is incompressible")
+            writer.add_file(name, res, digest)
+        
+        writer.finalize()
     
     if args.stats:
         print("\n=== Statistics ===")
         for f in args.input:
+            if f == STDIO:
+                continue
             size = os.path.getsize(f)
-            print(f"• {os.path.basename(f)}: {size} bytes → compressed")
+            entropy, gain = estimate_gain(f, 0 if args.solid else CODE_TABLE_SIZE)
+            skipped = ", Huffman skipped" if args.huffman and gain < args.min_gain else ""
+            print(f"• {os.path.basename(f)}: {size} bytes → compressed "
+                  f"(entropy ≈ {entropy:.2f} bits/byte, expected gain {gain:.1%}{skipped})")
         print("Archive saved to:", args.output)
 
 def unpack_archive(args):
-    """Распаковывает архив."""
+    """Распаковывает архив. -i -: потоковый архив из stdin (см. unpack_stream);
+    -o -: содержимое файлов подряд пишется в stdout."""
+    if args.input == STDIO:
+        return unpack_stream(args)
+    
     print("[unpack] Reading archive:", args.input)
     
-    reader = ArchiveReader(args.input)
-    hdr = reader.open()
-    if args.verbose:
-        print("Header:", reader.header)
+    chunk_size = args.chunk_size
+    to_stdout = args.output == STDIO
+    with ArchiveReader(args.input, mmap=True) as reader, _make_pool(args.jobs) as pool:
+        hdr = reader.open()
+        if args.verbose:
+            print("Header:", reader.header)
+        
+        out_dir = args.output
+        if not to_stdout:
+            os.makedirs(out_dir, exist_ok=True)
+        
+        # --only: читаются только DataTable и данные выбранных файлов
+        if args.only:
+            headers = []
+            for name in args.only:
+                header = reader.find(name)
+                if header is None:
+                    print(f"[ERROR] File not found in archive: {name}")
+                    continue
+                headers.append(header)
+        else:
+            headers = list(reader.iter_headers())
+        
+        bytes_order = reader.header.bytes_order
+        
+        if pool is not None and len(headers) > 1 and not to_stdout and not any(h.original_size > WHOLE_FILE_MAX_SIZE for h in headers):
+            # Файлы независимы: каждый процесс читает свой срез по data_offset, декодирует
+            # и пишет результат сам; прогресс печатается в порядке архива
+            items = ((args.input, header, bytes_order, os.path.join(out_dir, header.name), chunk_size) for header in headers)
+            results = _map_ordered(pool, unpack_entry, items, window=2 * args.jobs)
+            for i, (header, (size, errors)) in enumerate(zip(headers, results), 1):
+                print(f" [{i}/{len(headers)}] {header.name} ({size} bytes) → Saved to", os.path.join(out_dir, header.name))
+                _report_errors(header, errors)
+        else:
+            for header in headers:
+                data = reader.read_data(header)
+                if args.verbose:
+                    print(f"[unpack] Entry: {header.name} ({len(data)} bytes)")
+                
+                errors = Counter()
+                if to_stdout:
+                    decode_to(sys.__stdout__.buffer, data, header, bytes_order, pool, chunk_size, errors)
+                    _report_errors(header, errors)
+                    continue
+                
+                outpath = os.path.join(out_dir, header.name)
+                
+                # порции записываются по мере декодирования, файл целиком в памяти не собирается
+                with open(outpath, "wb") as f:
+                    decode_to(f, data, header, bytes_order, pool, chunk_size, errors)
+                    print(" → Saved to", outpath)
+                _report_errors(header, errors)
+        
+        if to_stdout:
+            sys.__stdout__.buffer.flush()
+        
+        # CRC всей секции данных — только при полной распаковке (CRC выбранных файлов уже проверен)
+        if not args.only:
+            print("CRC ok:", reader.verify_data_crc())
+
+def unpack_stream(args):
+    """Распаковывает потоковый архив (pack -o -) из stdin за один проход: файлы декодируются
+    порциями по мере чтения; CRC данных и размеры сверяются с DataTable и трейлером в конце потока."""
+    print("[unpack] Reading stream archive from stdin")
     
-    out_dir = args.output
-    os.makedirs(out_dir, exist_ok=True)
+    to_stdout = args.output == STDIO
+    if not to_stdout:
+        os.makedirs(args.output, exist_ok=True)
+    only = set(args.only) if args.only else None
     
-    for header, data in reader.iter_files():
+    reader = ArchiveStreamReader(sys.stdin.buffer, args.chunk_size)
+    with _make_pool(args.jobs) as pool:
+        hdr = reader.open()
         if args.verbose:
-            print(f"[unpack] Entry: {header.name} ({len(data)} bytes)")
+            print("Header:", hdr)
         
-        raw_data = decode_file(data, header)
-        outpath = os.path.join(out_dir, header.name)
+        sizes = {}      # имя → размер раскодированного файла
+        for header, chunks in reader.iter_entries():
+            if only is not None and header.name not in only:
+                continue
+            
+            outpath = os.path.join(args.output, header.name)
+            errors = Counter()
+            with (nullcontext(sys.__stdout__.buffer) if to_stdout else open(outpath, "wb")) as f:
+                size = 0
+                for raw in iter_decoded_stream(chunks, header, hdr.bytes_order, pool, errors):
+                    f.write(raw)
+                    size += len(raw)
+            sizes[header.name] = size
+            if not to_stdout:
+                print(" → Saved to", outpath)
+            _report_errors(header, errors)
+        
+        if to_stdout:
+            sys.__stdout__.buffer.flush()
+        
+        for header in reader.finish():
+            if header.name in sizes and sizes[header.name] != header.original_size:
+                raise ValueError(f"{header.name} decoded to {sizes[header.name]} bytes, expected {header.original_size}")
+        
+        for name in (only or set()) - sizes.keys():
+            print(f"[ERROR] File not found in archive: {name}")
+        print("CRC ok:", True)
+
+def verify_archive(args):
+    """Проверяет архив без распаковки: CRC секций и декодирование каждого файла."""
+    print("[verify]", args.input)
+    
+    with ArchiveReader(args.input, mmap=True) as reader, _make_pool(args.jobs) as pool:
+        hdr = reader.open()
+        print("CRC:", reader.verify_data_crc())
+        if hdr.index_section_offset:
+            print("Index CRC:", reader.verify_index())
         
-        with open(outpath, "wb") as f:
-            f.write(raw_data)
-            print(" → Saved to", outpath)
+        headers = list(reader.iter_headers())
+        items = ((args.input, header, hdr.bytes_order) for header in headers)
+        failed = 0
+        for i, (header, error) in enumerate(zip(headers, _map_ordered(pool, verify_entry, items, window=2 * args.jobs)), 1):
+            print(f" [{i}/{len(headers)}] {header.name}: {error or 'ok'}")
+            failed += error is not None
         
-    print("CRC ok:", reader.verify_data_crc())
+        print("Files ok:", failed == 0)
+
+def _report_errors(header: HeaderFile, errors: Counter) -> None:
+    """Печатает счётчики Хэмминга файла, собранные при декодировании (для файлов с F_HAMMING или при ошибках)."""
+    if header.flags & F_HAMMING or errors:
+        print(f"{header.name}: corrected blocks={errors['corrected']}, uncorrectable={errors['uncorrectable']}")
+
+def unpack_entry(path: str, header: HeaderFile, bytes_order: int, outpath: Optional[str] = None,
+                 chunk_size: int = CHUNK_SIZE) -> Tuple[int, Counter]:
+    """Читает данные одного файла архива по data_offset, декодирует и (если задан outpath) записывает.
+    Выполняется в процессах пула: каждый вызов открывает архив сам.
+
+    Args:
+        path (str): путь к архиву
+        header (HeaderFile): заголовок файла из DataTable
+        bytes_order (int): порядок байт архива
+        outpath (str): куда записать раскодированный файл; None — только проверить
+        chunk_size (int): размер порции потокового декодирования
+
+    Raises:
+        ValueError: при несовпадении CRC или размера раскодированного файла
+
+    Returns:
+        Tuple[int, Counter]: размер раскодированного файла и счётчики Хэмминга corrected/uncorrectable
+    """
+    errors = Counter()
+    with ArchiveReader(path, mmap=True) as reader, (open(outpath, "wb") if outpath is not None else nullcontext()) as f:
+        size = decode_to(f, reader.read_data(header), header, bytes_order, chunk_size=chunk_size, errors=errors)
+    
+    if size != header.original_size:
+        raise ValueError(f"{header.name} decoded to {size} bytes, expected {header.original_size}")
+    
+    return size, errors
+
+def verify_entry(path: str, header: HeaderFile, bytes_order: int) -> Optional[str]:
+    """Проверка одного файла архива (см. unpack_entry): None — если файл раскодирован без ошибок, иначе текст ошибки."""
+    try:
+        unpack_entry(path, header, bytes_order)
+    except (ValueError, EOFError) as e:
+        return str(e)
+    return None
+
+def _encode_options(args) -> argparse.Namespace:
+    """Параметры кодирования для передачи в процессы пула (args может содержать несериализуемые поля)."""
+    return argparse.Namespace(
+        output          = args.output,
+        mode            = args.mode,
+        bytes_order     = args.bytes_order,
+        huffman         = args.huffman,
+        hamming         = args.hamming,
+        r               = args.r,
+        max_code_len    = args.max_code_len,
+        block_size      = args.block_size,
+        chunk_size      = args.chunk_size,
+        min_gain        = args.min_gain
+    )
+
+def _make_pool(jobs: int):
+    """Пул процессов для параллельной обработки файлов/блоков; при jobs <= 1 — пустой контекст (None)."""
+    if jobs > 1:
+        return ProcessPoolExecutor(max_workers=jobs)
+    return nullcontext()
+
+def _map_ordered(pool: Optional[Executor], fn, items: Iterable[tuple], window: int = PIPELINE_WINDOW) -> Iterator:
+    """Аналог map(fn, *args) с выполнением в пуле: результаты отдаются в порядке входа,
+    одновременно в работе не более window задач (память ограничена).
+
+    Args:
+        pool (Executor): пул; None — выполнение в текущем процессе
+        fn: функция верхнего уровня модуля (должна сериализоваться pickle)
+        items (Iterable[tuple]): аргументы вызовов
+        window (int): максимальное число задач в работе
+
+    Yields:
+        Iterator: результаты fn в порядке items
+    """
+    if pool is None:
+        for item in items:
+            yield fn(*item)
+        return
+    
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, *item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
 
 # =================================================================================================================
 
-def encode_file (file:str, args) -> dict:
-    """Выполняет кодирование с указанными параметрами
+def encode_file (file:str, args, pool: Optional[Executor] = None, code_table: Optional[bytes] = None,
+                 stream: bool = False) -> dict:
+    """Выполняет кодирование с указанными параметрами.
+    Файлы крупнее WHOLE_FILE_MAX_SIZE кодируются в блочном режиме даже без --block-size.
 
     Args:
-        file (str): путь к архивируемому файлу
+        file (str): путь к архивируемому файлу; "-" — стандартный ввод (блочный режим, см. encode_file_blocks)
         args (_type_): параметры для архивации
+        pool (Executor): пул процессов для блоков или None
+        code_table (bytes): общая таблица длин solid-архива (см. build_solid_table);
+            None — таблица строится по самому файлу
+        stream (bool): в блочном режиме вернуть data итератором блоков (см. encode_file_blocks)
 
     Returns:
         dict:
@@ -93,74 +395,551 @@ def encode_file (file:str, args) -> dict:
         - r (int): количество контрольных бит Хэмминга
         - paddingHamm (int): количество дополнительных нулей в блоке Хэмминга
     """    
-    with open(file, "rb") as f:
-        raw_data = f.read()
-            
-    tmp_data = raw_data
+    huffman_used = use_huffman(file, args, shared=code_table is not None)
+    
+    if args.block_size or file == STDIO or os.path.getsize(file) > WHOLE_FILE_MAX_SIZE:
+        return encode_file_blocks(file, args, pool, stream, huffman_used)
+    
+    raw_size = os.path.getsize(file)
+    size = raw_size
+    flags = args.mode if huffman_used else args.mode & ~F_HUFFMAN
     lengths_codes = bytes([0]*256)
     paddingHamm = 0
     paddingHuff = 0
     r = 0
+    stages = []         # преобразования потока порций: Хаффман, затем Хэмминг
     
-    if args.huffman:
-        huffman = Huffman()
-        tmp_data, lengths_codes, paddingHuff = huffman.pack(tmp_data)
+    if huffman_used:
+        huffman = Huffman(args.max_code_len)
+        # первый проход — частоты символов, второй (iter_pack) — кодирование порциями
+        with open(file, "rb") as f:
+            freqs = count_symbols(f, huffman, args.chunk_size)
+        model = choose_huffman(huffman, freqs, raw_size, code_table)
+        if model is not None:
+            lengths_codes = model
+            if model != code_table:
+                # своя таблица хранится в записи DataTable, общая модель к файлу не относится
+                flags &= ~F_SOLID
+            size, paddingHuff = huffman.encoded_size(freqs)
+            stages.append(huffman.iter_pack)
+        else:
+            # Хаффман не уменьшит данные — файл хранится без сжатия (сообщает pack_archive по flags)
+            flags &= ~F_HUFFMAN
     
     if args.hamming:
         r = args.r
         hamming = Hamming(r)
-        tmp_data, paddingHamm = hamming.pack(tmp_data)
+        size, paddingHamm = hamming.encoded_size(size)
+        stages.append(hamming.iter_pack)
+    
+    tmp_data = iter_encoded(file, stages, args.chunk_size)
+    if not stream:
+        tmp_data = b"".join(tmp_data)
             
     # definition earlier: bit0 (LSB) = huffman used, bit1 = hamming used
-    print(f"Encoded {len(tmp_data)} bytes -> archive {args.output}, mode {bin(args.mode)}")
+    print(f"Encoded {size} bytes -> archive {args.output}, mode {bin(args.mode)}")
     
     return {
         "data": tmp_data,
         "lengths_codes": lengths_codes,
-        "flags": args.mode & 0xFFFFFFFF,                 # Huffman, Hamming, crc32, SHA256, isIndexTable
+        "flags": flags & 0xFFFFFFFF,                     # Huffman, Hamming, crc32, SHA256, isIndexTable
         "padding_huff": paddingHuff,
         "r": r,
         "padding_hamm": paddingHamm,
-        "raw_size": len(raw_data),
-        "compressed_size": len(tmp_data)
+        "raw_size": raw_size,
+        "compressed_size": size
+    }
+
+def use_huffman (file: str, args, shared: bool = False) -> bool:
+    """Предварительная оценка по выборкам (estimate_gain): кодировать ли файл Хаффманом.
+    Уже сжатые файлы (jpg/pdf/zip) пропускаются без подсчёта частот по всему файлу.
+
+    Args:
+        file (str): путь к архивируемому файлу; "-" — stdin (оценка невозможна, решают блоки)
+        args (_type_): параметры для архивации (huffman, min_gain)
+        shared (bool): общая таблица solid-архива — своя таблица длин в размер не входит
+
+    Returns:
+        bool: True — ожидаемая экономия не меньше args.min_gain
+    """
+    if not args.huffman:
+        return False
+    if file == STDIO:
+        return True
+    return estimate_gain(file, 0 if shared else CODE_TABLE_SIZE)[1] >= args.min_gain
+
+def estimate_gain (file: str, overhead: int = CODE_TABLE_SIZE, sample_count: int = SAMPLE_COUNT,
+                   sample_size: int = SAMPLE_SIZE) -> Tuple[float, float]:
+    """Быстрая оценка сжимаемости: энтропия гистограммы байт по sample_count выборкам, равномерно
+    расставленным по файлу (файл меньше sample_count * sample_size читается целиком).
+
+    Args:
+        file (str): путь к файлу
+        overhead (int): байт на хранение модели (таблица длин кодов)
+        sample_count (int): число выборок
+        sample_size (int): размер выборки в байтах
+
+    Returns:
+        Tuple[float, float]: энтропия (бит на байт) и ожидаемая доля экономии (1 - код/исходный размер;
+        по энтропии — оценка сверху для кода Хаффмана); 0, если файл пуст
+    """
+    size = os.path.getsize(file)
+    if size == 0:
+        return 0.0, 0.0
+    
+    huffman = Huffman()
+    freqs = Counter()
+    with open(file, "rb") as f:
+        if size <= sample_count * sample_size:
+            freqs.update(huffman.count(f.read()))
+        else:
+            step = (size - sample_size) // (sample_count - 1)
+            for i in range(sample_count):
+                f.seek(i * step)
+                freqs.update(huffman.count(f.read(sample_size)))
+    
+    entropy = Huffman.entropy(freqs)
+    return entropy, 1 - entropy / 8 - overhead / size
+
+def choose_huffman (huffman: Huffman, freqs: Counter, raw_size: int, code_table: Optional[bytes] = None) -> Optional[bytes]:
+    """Адаптивный выбор сжатия: задаёт модель huffman, если код вместе с таблицей длин меньше исходных данных.
+    Сначала дешёвая нижняя оценка по энтропии частот (Huffman.estimate_size) — для несжимаемых данных
+    код не строится; затем точный размер кода по модели из тех же частот.
+
+    Args:
+        huffman (Huffman): кодек, которому устанавливается модель
+        freqs (Counter): частоты символов данных
+        raw_size (int): размер исходных данных
+        code_table (bytes): общая таблица длин solid-архива (хранится в заголовке архива и в размер
+            записи не входит); None — своя таблица (256 байт в записи DataTable или заголовке блока)
+
+    Returns:
+        Optional[bytes]: таблица длин кодов (256 байт); None — данные выгоднее хранить без Хаффмана.
+            С общей таблицей выбирается меньший результат: код общей таблицей или код своей таблицей
+            плюс её 256 байт. Своя таблица (и она же, если в общей нет кода для какого-то символа
+            данных) означает запись без F_SOLID.
+    """
+    if code_table is not None and any(not code_table[sym] for sym in freqs):
+        code_table = None
+
+    overhead = 0 if code_table is not None else CODE_TABLE_SIZE
+    if Huffman.estimate_size(freqs) + overhead >= raw_size:
+        return None
+    
+    # своя таблица по частотам файла — 256 байт в записи, зато без рассогласования модели
+    lengths_codes = huffman.build_table(freqs)
+    size = huffman.encoded_size(freqs)[0] + CODE_TABLE_SIZE
+    
+    if code_table is not None:
+        huffman.use_table(code_table)
+        shared_size = huffman.encoded_size(freqs)[0]
+        if shared_size <= size:
+            lengths_codes, size = code_table, shared_size
+        else:
+            huffman.use_table(lengths_codes)
+    
+    if size >= raw_size:
+        return None
+    return lengths_codes
+
+def iter_encoded (file: str, stages: list, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Конвейер кодирования: чтение порции → Хаффман → Хэмминг; порции отдаются по мере готовности,
+    поэтому память не зависит от размера файла.
+
+    Args:
+        file (str): путь к архивируемому файлу
+        stages (list): этапы кодирования — функции Iterable[bytes] → Iterator[bytes] (iter_pack кодеков)
+        chunk_size (int): размер читаемой порции
+
+    Yields:
+        Iterator[bytes]: закодированные порции
+    """
+    chunks = iter_file(file, chunk_size)
+    for stage in stages:
+        chunks = stage(chunks)
+    yield from chunks
+
+def iter_file (file: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Читает файл порциями по chunk_size байт (см. iter_chunks)."""
+    with open(file, "rb") as f:
+        yield from iter_chunks(f, chunk_size)
+
+def iter_chunks (src: BinaryIO, chunk_size: int = CHUNK_SIZE, read_ahead: int = READ_AHEAD) -> Iterator[bytes]:
+    """Читает файловый объект порциями по chunk_size байт. Следующие read_ahead порций
+    читает фоновый поток, пока текущая кодируется: чтение с диска отпускает GIL.
+
+    Args:
+        src (BinaryIO): файловый объект, открытый на чтение
+        chunk_size (int): размер порции
+        read_ahead (int): число порций, читаемых заранее
+
+    Yields:
+        Iterator[bytes]: порции в порядке файла
+    """
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending = deque(reader.submit(src.read, chunk_size) for _ in range(read_ahead))
+        while True:
+            chunk = pending.popleft().result()
+            if not chunk:
+                return
+            pending.append(reader.submit(src.read, chunk_size))
+            yield chunk
+
+def count_symbols (src: BinaryIO, huffman: Huffman, chunk_size: int = CHUNK_SIZE) -> Counter:
+    """Частоты символов файлового объекта, читаемого порциями (см. Huffman.count)."""
+    freqs = Counter()
+    for chunk in iter_chunks(src, chunk_size):
+        freqs.update(huffman.count(chunk))
+    return freqs
+
+def build_solid_table(files: Iterable[str], max_code_len: int = MAX_CODE_LEN, chunk_size: int = CHUNK_SIZE) -> bytes:
+    """Первый проход solid-режима: частоты символов по всем файлам и общая таблица длин кодов.
+
+    Args:
+        files (Iterable[str]): пути к архивируемым файлам
+        max_code_len (int): максимальная длина кода Хаффмана
+        chunk_size (int): размер читаемой порции
+
+    Returns:
+        bytes: таблица длин кодов (256 байт) для ArchiveHeader.code_table
+    """
+    huffman = Huffman(max_code_len)
+    freqs = Counter()
+    for file in files:
+        with open(file, "rb") as f:
+            freqs.update(count_symbols(f, huffman, chunk_size))
+    return huffman.build_table(freqs)
+
+def encode_file_blocks (file:str, args, pool: Optional[Executor] = None, stream: bool = False,
+                        huffman: Optional[bool] = None) -> dict:
+    """Кодирование в блочном режиме: файл читается блоками по args.block_size байт
+    (DEFAULT_BLOCK_SIZE, если не задан), каждый блок кодируется независимо со своей
+    таблицей длин кодов (см. encode_block).
+    Если передан пул, блоки кодируются параллельно и собираются в исходном порядке.
+    Стандартный ввод (file == "-") кодируется за один проход: raw_size считается по мере чтения.
+
+    Args:
+        file (str): путь к архивируемому файлу или "-"
+        args (_type_): параметры для архивации
+        pool (Executor): пул процессов или None
+        stream (bool): data — ленивый итератор блоков, compressed_size = None
+            (размер и CRC посчитает ArchiveWriter при записи); память не зависит от размера файла
+        huffman (bool): сжимать блоки Хаффманом (см. use_huffman); None — по args.huffman
+
+    Returns:
+        dict: те же поля, что и encode_file; flags дополнен F_BLOCKS,
+        кодовые таблицы и padding хранятся в заголовках блоков.
+    """    
+    block_size = args.block_size or DEFAULT_BLOCK_SIZE
+    if not 0 < block_size <= MAX_BLOCK_SIZE:
+        raise ValueError(f"Размер блока должен быть в пределах 1..{MAX_BLOCK_SIZE}")
+    if huffman is None:
+        huffman = args.huffman
+    
+    # блоки кодируются своими таблицами, общая модель solid-архива к ним не относится
+    flags = (args.mode | F_BLOCKS) & ~F_SOLID
+    if not huffman:
+        flags &= ~F_HUFFMAN
+    
+    meta = {
+        "data": None,
+        "lengths_codes": bytes(CODE_TABLE_SIZE),
+        "flags": flags & 0xFFFFFFFF,
+        "padding_huff": 0,
+        "r": args.r if args.hamming else 0,
+        "padding_hamm": 0,
+        "raw_size": 0,
+        "compressed_size": None
     }
+    
+    if file == STDIO:
+        # без фонового чтения (iter_chunks): процесс пула при запуске закрывает stdin и
+        # зависнет, если fork пришёлся на чтение stdin в другом потоке
+        src = sys.stdin.buffer
+        chunks = _iter_counted(iter(lambda: src.read(block_size), b""), meta)
+    else:
+        meta["raw_size"] = os.path.getsize(file)
+        chunks = iter_file(file, block_size)
+    
+    meta["data"] = iter_encoded_blocks(chunks, args, pool, huffman)
+    if not stream:
+        meta["data"] = b"".join(meta["data"])
+        meta["compressed_size"] = len(meta["data"])
+    
+    return meta
+
+def _iter_counted (chunks: Iterable[bytes], meta: dict) -> Iterator[bytes]:
+    """Пропускает порции, накапливая их размер в meta["raw_size"] (размер потока заранее неизвестен)."""
+    for chunk in chunks:
+        meta["raw_size"] += len(chunk)
+        yield chunk
 
-def decode_file (data: bytes, header: HeaderFile) -> bytes:
+def iter_encoded_blocks (chunks: Iterable[bytes], args, pool: Optional[Executor] = None,
+                         huffman: Optional[bool] = None) -> Iterator[bytes]:
+    """Кодирует порции исходных данных (блоки) и отдаёт закодированные блоки в исходном порядке;
+    в работе одновременно не более PIPELINE_WINDOW блоков.
+
+    Args:
+        chunks (Iterable[bytes]): блоки исходных данных (файла или потока)
+        args (_type_): параметры для архивации
+        pool (Executor): пул процессов или None
+        huffman (bool): сжимать блоки Хаффманом; None — по args.huffman
+
+    Yields:
+        Iterator[bytes]: BlockHeader (+ таблица длин) + закодированные данные блока
+    """
+    prefix = otik._endian_prefix(args.bytes_order)
+    size = count = 0
+    huffman = args.huffman if huffman is None else huffman
+    
+    items = ((chunk, huffman, args.hamming, args.r, args.max_code_len, prefix) for chunk in chunks)
+    for block in _map_ordered(pool, encode_block, items):
+        size += len(block)
+        count += 1
+        yield block
+    
+    print(f"Encoded {size} bytes in {count} blocks -> archive {args.output}, mode {bin(args.mode)}")
+
+def encode_block (raw: bytes, huffman_used: bool, hamming_used: bool, r: int, max_code_len: int, prefix: str) -> bytes:
+    """Кодирует один блок независимо от остальных: Хаффман со своей таблицей, затем Хэмминг.
+
+    Args:
+        raw (bytes): исходные данные блока
+        huffman_used (bool): сжимать Хаффманом
+        hamming_used (bool): защищать кодом Хэмминга
+        r (int): количество контрольных бит Хэмминга
+        max_code_len (int): ограничение длины кода Хаффмана
+        prefix (str): порядок байт заголовка блока
+
+    Returns:
+        bytes: BlockHeader (+ таблица длин) + закодированные данные
+    """    
+    block = BlockHeader(raw_size=len(raw))
+    data = raw
+    
+    if huffman_used:
+        # несжимаемый блок хранится без Хаффмана (и без таблицы длин), решение — в флагах блока
+        huffman = Huffman(max_code_len)
+        freqs = huffman.count(data)
+        if choose_huffman(huffman, freqs, len(raw)) is not None:
+            data, block.lengths_codes, block.padding_Huff = huffman.pack(data, freqs)
+            block.flags |= F_HUFFMAN
+    
+    if hamming_used:
+        data, block.padding_Hamm = Hamming(r).pack(data)
+        block.control_bits = r
+        block.flags |= F_HAMMING
+    
+    block.payload_size = len(data)
+    block.crc32 = zlib.crc32(data) & 0xFFFFFFFF
+    return block.to_bytes(prefix) + data
+
+def decode_file (data: bytes, header: HeaderFile, bytes_order: int = 0, pool: Optional[Executor] = None,
+                 errors: Optional[Counter] = None) -> bytes:
     """Автоматически определяет режим из заголовка и выполняет декодирование
 
     Args:
         data (bytes): _description_
         header (HdrFile): _description_
+        bytes_order (int): порядок байт архива (нужен для заголовков блоков)
+        pool (Executor): пул процессов для параллельного декодирования блоков или None
+        errors (Counter): сюда добавляются счётчики Хэмминга corrected/uncorrectable
 
     Returns:
         bytes: _description_
     """    
-    
-    lengths_codes = header.lengths_codes
-    raw_size = header.original_size
-    mode = header.flags 
+    return b"".join(iter_decoded(data, header, bytes_order, pool, errors=errors))[:header.original_size]
+
+def decode_to (dst: Optional[BinaryIO], data: bytes, header: HeaderFile, bytes_order: int = 0,
+               pool: Optional[Executor] = None, chunk_size: int = CHUNK_SIZE, errors: Optional[Counter] = None) -> int:
+    """Декодирует файл порциями и записывает их в файловый объект по мере готовности.
+
+    Args:
+        dst (BinaryIO): файловый объект, открытый на запись; None — только декодировать
+        data (bytes): данные файла из DataSection
+        header (HeaderFile): заголовок файла
+        bytes_order (int): порядок байт архива
+        pool (Executor): пул процессов для блоков или None
+        chunk_size (int): размер порции закодированных данных
+        errors (Counter): сюда добавляются счётчики Хэмминга corrected/uncorrectable
+
+    Returns:
+        int: размер раскодированных данных
+    """
+    size = 0
+    for raw in iter_decoded(data, header, bytes_order, pool, chunk_size, errors):
+        if dst is not None:
+            dst.write(raw)
+        size += len(raw)
+    return size
+
+def iter_decoded (data: bytes, header: HeaderFile, bytes_order: int = 0, pool: Optional[Executor] = None,
+                  chunk_size: int = CHUNK_SIZE, errors: Optional[Counter] = None) -> Iterator[bytes]:
+    """Конвейер декодирования: порция данных → Хэмминг → Хаффман. В блочном режиме порция — блок
+    (в пуле — не более PIPELINE_WINDOW блоков одновременно), иначе — chunk_size байт кода.
+
+    Args:
+        data (bytes): данные файла из DataSection
+        header (HeaderFile): заголовок файла
+        bytes_order (int): порядок байт архива
+        pool (Executor): пул процессов или None
+        chunk_size (int): размер порции закодированных данных
+        errors (Counter): сюда добавляются счётчики Хэмминга corrected/uncorrectable
+
+    Yields:
+        Iterator[bytes]: очередная порция исходных данных
+    """
+    if header.flags & F_BLOCKS:
+        prefix = otik._endian_prefix(bytes_order)
+        if pool is None:
+            yield from iter_decoded_blocks(data, prefix, errors)
+            return
         
-    huffman_used = bool(mode & 0x1)
-    hamming_used = bool(mode & 0x2)
+        # Каждому процессу передаётся только срез своего блока (копия — memoryview не сериализуется)
+        items = ((bytes(data[start:end]), 0, prefix) for start, end in iter_block_bounds(data, prefix))
+        for raw, _, counts in _map_ordered(pool, decode_block, items):
+            _count_errors(errors, counts)
+            yield raw
+        return
     
-    if hamming_used:
+    view = memoryview(data)
+    chunks = (view[i:i + chunk_size] for i in range(0, len(view), chunk_size))
+    yield from iter_decoded_chunks(chunks, len(view), header, errors)
+
+def iter_decoded_stream (chunks: Iterable[bytes], header: HeaderFile, bytes_order: int = 0,
+                         pool: Optional[Executor] = None, errors: Optional[Counter] = None) -> Iterator[bytes]:
+    """Декодирование данных файла, читаемых из потока порциями (см. ArchiveStreamReader.iter_entries):
+    в блочном режиме порция — блок целиком, иначе — часть кода файла.
+
+    Args:
+        chunks (Iterable[bytes]): порции данных файла
+        header (HeaderFile): локальная запись файла (compressed_size известен вне блочного режима)
+        bytes_order (int): порядок байт архива
+        pool (Executor): пул процессов для блоков или None
+        errors (Counter): сюда добавляются счётчики Хэмминга corrected/uncorrectable
+
+    Yields:
+        Iterator[bytes]: очередная порция исходных данных
+    """
+    if header.flags & F_BLOCKS:
+        prefix = otik._endian_prefix(bytes_order)
+        items = ((block, 0, prefix) for block in chunks)
+        for raw, _, counts in _map_ordered(pool, decode_block, items):
+            _count_errors(errors, counts)
+            yield raw
+        return
+    
+    yield from iter_decoded_chunks(chunks, header.compressed_size, header, errors)
+
+def iter_decoded_chunks (chunks: Iterable[bytes], size: int, header: HeaderFile,
+                         errors: Optional[Counter] = None) -> Iterator[bytes]:
+    """Конвейер декодирования файла целиком: порции кода → Хэмминг → Хаффман, результат
+    обрезается до original_size.
+
+    Args:
+        chunks (Iterable[bytes]): порции закодированных данных
+        size (int): размер закодированных данных
+        header (HeaderFile): заголовок файла
+        errors (Counter): сюда добавляются счётчики Хэмминга corrected/uncorrectable
+
+    Yields:
+        Iterator[bytes]: очередная порция исходных данных
+    """
+    hamming = None
+    if header.flags & F_HAMMING:
         hamming = Hamming(header.control_bits)
-        data, corrected, uncorrectable = hamming.unpack(data, header.padding_Hamm)
-        print(f"corrected blocks={corrected}, uncorrectable={uncorrectable}")
-                
-        if not huffman_used:
-            return data[:raw_size]
+        chunks = hamming.iter_unpack(chunks, size, header.padding_Hamm)
+        size = hamming.decoded_size(size, header.padding_Hamm)
     
-    if huffman_used:
-        huffman = Huffman()        
-        data = huffman.unpack(data, lengths_codes, header.padding_Huff)
-        return data[:raw_size]
-              
-    if not hamming_used and not huffman_used:
-        # raw copy
-        return data[:raw_size]   
+    if header.flags & F_HUFFMAN:
+        chunks = Huffman().iter_unpack(chunks, header.lengths_codes, size * 8 - header.padding_Huff)
+    
+    remaining = header.original_size
+    for chunk in chunks:
+        if remaining <= 0:
+            break
+        yield chunk[:remaining]
+        remaining -= len(chunk)
+    
+    if hamming is not None:
+        _count_errors(errors, (hamming.corrected, hamming.uncorrectable))
+
+def _count_errors (errors: Optional[Counter], counts: Tuple[int, int]) -> None:
+    """Добавляет счётчики Хэмминга (исправлено, неисправимо) в errors, если он задан."""
+    if errors is not None:
+        errors.update(corrected=counts[0], uncorrectable=counts[1])
+
+def iter_decoded_blocks (data: bytes, prefix: str, errors: Optional[Counter] = None) -> Iterator[bytes]:
+    """Итератор по раскодированным блокам данных файла в блочном режиме.
+
+    Args:
+        data (bytes): данные файла из DataSection (последовательность блоков)
+        prefix (str): порядок байт заголовков блоков
+        errors (Counter): сюда добавляются счётчики Хэмминга corrected/uncorrectable (см. decode_block)
+
+    Yields:
+        Iterator[bytes]: исходные данные очередного блока
+    """    
+    offset = 0
+    while offset < len(data):
+        raw, offset, counts = decode_block(data, offset, prefix)
+        _count_errors(errors, counts)
+        yield raw
+
+def iter_block_bounds (data: bytes, prefix: str) -> Iterator[Tuple[int, int]]:
+    """Итератор по границам блоков без их декодирования (читаются только заголовки).
+
+    Args:
+        data (bytes): поток блоков
+        prefix (str): порядок байт заголовков блоков
+
+    Yields:
+        Iterator[Tuple[int, int]]: смещения начала заголовка и конца данных блока
+    """    
+    offset = 0
+    while offset < len(data):
+        block = BlockHeader.from_bytes(data, offset, prefix)
+        end = offset + block.get_size() + block.payload_size
+        yield offset, end
+        offset = end
+
+def decode_block (data: bytes, offset: int, prefix: str) -> Tuple[bytes, int, Tuple[int, int]]:
+    """Декодирует один блок, начинающийся с data[offset].
+
+    Args:
+        data (bytes): поток блоков
+        offset (int): смещение заголовка блока
+        prefix (str): порядок байт заголовка блока
+
+    Raises:
+        ValueError: при несовпадении CRC или размера раскодированного блока
+
+    Returns:
+        Tuple[bytes, int, Tuple[int, int]]: исходные данные блока, смещение следующего блока
+            и счётчики Хэмминга (исправлено, неисправимо)
+    """    
+    block = BlockHeader.from_bytes(data, offset, prefix)
+    start = offset + block.get_size()
+    end = start + block.payload_size
+    if end > len(data):
+        raise EOFError("Unexpected EOF while reading block payload")
+    
+    payload = data[start:end]
+    if zlib.crc32(payload) & 0xFFFFFFFF != block.crc32:
+        raise ValueError(f"CRC mismatch for block at offset {offset}")
+    
+    corrected = uncorrectable = 0
+    if block.flags & F_HAMMING:
+        payload, corrected, uncorrectable = Hamming(block.control_bits).unpack(payload, block.padding_Hamm)
+    
+    if block.flags & F_HUFFMAN:
+        payload = Huffman().unpack(payload, block.lengths_codes, block.padding_Huff)
+    
+    raw = bytes(payload[:block.raw_size])
+    if len(raw) != block.raw_size:
+        raise ValueError(f"Block at offset {offset} decoded to {len(raw)} bytes, expected {block.raw_size}")
     
-    raise  
+    return raw, end, (corrected, uncorrectable)
 
 # =================================================================================================================
 
@@ -173,7 +952,9 @@ def main():
         parser.print_help()
         return
     
-    args.func(cli.prepare_pack_args(args))
+    # при выводе архива/данных в stdout сообщения о ходе работы уходят в stderr
+    with redirect_stdout(sys.stderr) if getattr(args, "output", None) == STDIO else nullcontext():
+        args.func(cli.prepare_pack_args(args))
 
 # =================================================================================================================
 
@@ -1,4 +1,5 @@
-from typing import List, Dict
+import hashlib
+from typing import Iterable, Iterator, List, Dict, Union
 
 def lengths_to_bytes(lengths: Dict[int,int]) -> bytes:
     """Сериализует таблицу длин кодов в компактный байтовый формат.
@@ -47,6 +48,44 @@ def lengths_from_bytes(data: bytes) -> Dict[int,int]:
             result[symbol_index] = length_value
     return result
 
+def file_digest(path: str, chunk_size: int = 1 << 20) -> bytes:
+    """Хэш содержимого файла (BLAKE2b, 32 байта); файл читается частями по chunk_size.
+
+    Args:
+        path (str): Путь к файлу.
+        chunk_size (int): Размер читаемой части в байтах.
+
+    Returns:
+        bytes: Дайджест содержимого.
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+def iter_aligned(chunks: Iterable[bytes], multiple: int) -> Iterator[bytes]:
+    """Перенарезает поток порций так, что длина каждой порции, кроме последней, кратна multiple байт.
+    Остаток порции (меньше multiple байт) переносится в начало следующей.
+
+    Args:
+        chunks (Iterable[bytes]): Порции данных произвольной длины.
+        multiple (int): Кратность длины порции в байтах.
+
+    Yields:
+        Iterator[bytes]: Порции с выровненной длиной; последняя — остаток.
+    """
+    rest = b""
+    for chunk in chunks:
+        if rest:
+            chunk = rest + chunk
+        cut = len(chunk) - len(chunk) % multiple
+        if cut:
+            yield chunk[:cut]
+        rest = bytes(chunk[cut:])
+    if rest:
+        yield rest
+
 def byte_to_bits(bits: List[int], byte: int, length: int):
     """Добавляет в битовый буфер двоичное представление числа фиксированной длины.
 
@@ -89,3 +128,155 @@ def bytes_to_bits(b: bytes) -> List[int]:
     for byte in b:
         byte_to_bits(bits, byte, 8)
     return bits
+
+# =================================================================================================================
+
+class BitWriter:
+    """Битовый писатель: целочисленный аккумулятор + bytearray (старшие биты первыми).
+
+    Целые байты сбрасываются из аккумулятора в буфер, поэтому память — порядка
+    размера результата, а не 1 объект на бит, как у List[int].
+
+    Args:
+        capacity (int): Ожидаемый размер результата в байтах (буфер выделяется заранее).
+    """
+    
+    FLUSH_BITS = 64     # порог сброса аккумулятора в буфер
+    
+    def __init__(self, capacity: int = 0):
+        self._buf = bytearray(capacity)
+        self._pos = 0       # байт записано в буфер
+        self._acc = 0       # аккумулятор бит
+        self._nbits = 0     # бит в аккумуляторе
+        
+    def write(self, value: int, nbits: int) -> None:
+        """Дописывает nbits младших бит value (value < 2^nbits)."""
+        self._acc = (self._acc << nbits) | value
+        self._nbits += nbits
+        if self._nbits >= self.FLUSH_BITS:
+            self._flush()
+            
+    def write_bytes(self, data: bytes) -> None:
+        """Дописывает байты; при выровненной позиции — одним копированием."""
+        if self._nbits:
+            if self._nbits % 8:
+                self.write(int.from_bytes(data, "big"), len(data) * 8)
+                return
+            self._flush()
+        pos = self._pos
+        self._pos = pos + len(data)
+        self._buf[pos:self._pos] = data
+    
+    def align(self) -> int:
+        """Добивает поток нулями до границы байта.
+
+        Returns:
+            int: количество добавленных бит (padding).
+        """
+        padding = (8 - self._nbits % 8) % 8
+        if padding:
+            self.write(0, padding)
+        return padding
+    
+    def getvalue(self) -> bytes:
+        """Возвращает записанные данные, последний байт добит нулями."""
+        self.align()
+        self._flush()
+        return bytes(self._buf[:self._pos])
+
+    def take(self) -> bytes:
+        """Забирает записанные целые байты и освобождает буфер (для потоковой записи порциями).
+        Неполный последний байт остаётся в аккумуляторе до следующей записи или align()."""
+        self._flush()
+        out = bytes(self._buf[:self._pos])
+        self._buf = bytearray(len(self._buf))
+        self._pos = 0
+        return out
+
+    @property
+    def bit_length(self) -> int:
+        """Количество записанных бит."""
+        return self._pos * 8 + self._nbits
+        
+    def _flush(self) -> None:
+        """Переносит целые байты из аккумулятора в буфер."""
+        nb = self._nbits >> 3
+        if nb:
+            self._nbits &= 7
+            self._buf[self._pos:self._pos + nb] = (self._acc >> self._nbits).to_bytes(nb, "big")
+            self._pos += nb
+            self._acc &= (1 << self._nbits) - 1
+
+
+class BitReader:
+    """Битовый читатель поверх bytes/bytearray/memoryview с целочисленным резервуаром.
+
+    Чтение за концом данных возвращает нули — это позволяет декодерам
+    заглядывать вперёд (peek) без проверки конца потока.
+
+    Args:
+        data: Исходные данные.
+        bit_offset (int): С какого бита начинать чтение.
+    """
+    
+    REFILL_BYTES = 8    # подкачка резервуара, байт за шаг
+    
+    def __init__(self, data: Union[bytes, bytearray, memoryview], bit_offset: int = 0):
+        self._data = memoryview(data).cast("B") if isinstance(data, memoryview) else data
+        self._pos = bit_offset >> 3     # следующий байт для подкачки
+        self._acc = 0                   # резервуар бит
+        self._nbits = 0                 # бит в резервуаре
+        if bit_offset & 7:
+            self.skip(bit_offset & 7)
+        
+    def peek(self, nbits: int) -> int:
+        """Возвращает следующие nbits бит, не сдвигая позицию."""
+        while self._nbits < nbits:
+            self._refill()
+        return (self._acc >> (self._nbits - nbits)) & ((1 << nbits) - 1)
+    
+    def skip(self, nbits: int) -> None:
+        """Пропускает nbits бит."""
+        while self._nbits < nbits:
+            self._refill()
+        self._nbits -= nbits
+        self._acc &= (1 << self._nbits) - 1
+        
+    def read(self, nbits: int) -> int:
+        """Читает nbits бит как беззнаковое число (старшие первыми)."""
+        while self._nbits < nbits:
+            self._refill()
+        self._nbits -= nbits
+        value = self._acc >> self._nbits
+        self._acc &= (1 << self._nbits) - 1
+        return value
+    
+    def read_bytes(self, size: int) -> Union[bytes, memoryview]:
+        """Читает size байт; при выровненной позиции — одним срезом исходных данных."""
+        if self._nbits % 8:
+            return self.read(size * 8).to_bytes(size, "big")
+        
+        if self._nbits:
+            # Возвращаем целые байты резервуара обратно в поток
+            self._pos -= self._nbits >> 3
+            self._acc = 0
+            self._nbits = 0
+        
+        pos = self._pos
+        chunk = self._data[pos:pos + size]
+        self._pos = pos + size
+        if len(chunk) < size:
+            return bytes(chunk) + bytes(size - len(chunk))
+        return chunk
+    
+    @property
+    def bits_consumed(self) -> int:
+        """Количество прочитанных бит от начала данных."""
+        return self._pos * 8 - self._nbits
+        
+    def _refill(self) -> None:
+        """Подкачивает REFILL_BYTES байт в резервуар (за концом данных — нули)."""
+        chunk = self._data[self._pos:self._pos + self.REFILL_BYTES]
+        self._acc = (self._acc << (self.REFILL_BYTES * 8)) | (int.from_bytes(chunk, "big") << ((self.REFILL_BYTES - len(chunk)) * 8))
+        self._nbits += self.REFILL_BYTES * 8
+        self._pos += self.REFILL_BYTES
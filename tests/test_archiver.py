@@ -23,12 +23,24 @@ from __future__ import annotations
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
+import argparse
+import io
 import random
+import tempfile
 import unittest
+from unittest import mock
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
 from src import Huffman as huffman_mod
 from src import Hamming as hamming_mod
 
+import cli  # cli импортирует main — так разрывается циклический импорт
+import main as main_mod
+import Archive_Formats
+from Archive_Formats import HeaderFile, F_BLOCKS, F_INDEX_TABLE, F_SOLID, F_STREAM, META_SIZE as otik_meta_size
+from Archiver import ArchiveWriter, ArchiveReader, ArchiveStreamReader
+
 class TestArchiverPipeline(unittest.TestCase):
     """Набор тестов для проверки корректности работы кодировщика/декодировщика."""
 
@@ -95,6 +107,626 @@ class TestArchiverPipeline(unittest.TestCase):
             self.assertIsInstance(code, int)
 
 
+def make_pack_args(**overrides) -> argparse.Namespace:
+    """Аргументы pack, как их формирует cli.prepare_pack_args."""
+    args = argparse.Namespace(
+        output="test.otik", bytes_order=0, huffman=True, hamming=True, r=4,
+        max_code_len=15, block_size=0, jobs=1, append=False, dedup=False, solid=False,
+        chunk_size=1 << 20, min_gain=main_mod.MIN_GAIN
+    )
+    for key, value in overrides.items():
+        setattr(args, key, value)
+    args.mode = (1 if args.huffman else 0) | ((1 if args.hamming else 0) << 1) | (F_SOLID if args.solid else 0)
+    return args
+
+
+def header_from_meta(meta: dict) -> HeaderFile:
+    """Заголовок файла, который ArchiveWriter.add_file построит по результату encode_file."""
+    return HeaderFile(
+        name="x", lengths_codes=meta["lengths_codes"], flags=meta["flags"],
+        padding_Huff=meta["padding_huff"], control_bits=meta["r"], padding_Hamm=meta["padding_hamm"],
+        original_size=meta["raw_size"], compressed_size=meta["compressed_size"]
+    )
+
+
+class TestBlockMode(unittest.TestCase):
+    """Блочный режим: каждый блок кодируется со своей таблицей длин."""
+
+    def setUp(self):
+        random.seed(5)
+        # текст, за которым следует случайный двоичный хвост — статистика меняется
+        text = b"id,value,comment\n" * 800
+        blob = bytes(random.getrandbits(8) for _ in range(5000))
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(text + blob)
+        self.data = text + blob
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_block_roundtrip(self):
+        for huffman, hamming in ((True, False), (False, True), (True, True), (False, False)):
+            for bytes_order in (0, 1):
+                args = make_pack_args(huffman=huffman, hamming=hamming, block_size=4096, bytes_order=bytes_order)
+                meta = main_mod.encode_file(self.path, args)
+                self.assertTrue(meta["flags"] & F_BLOCKS)
+
+                decoded = main_mod.decode_file(meta["data"], header_from_meta(meta), bytes_order)
+                self.assertEqual(decoded, self.data)
+
+    def test_blocks_decode_independently(self):
+        args = make_pack_args(block_size=4096)
+        meta = main_mod.encode_file(self.path, args)
+
+        # пропускаем первый блок и декодируем второй без него
+        _, second, _ = main_mod.decode_block(meta["data"], 0, "<")
+        raw, _, counts = main_mod.decode_block(meta["data"], second, "<")
+        self.assertEqual(counts, (0, 0))
+        self.assertEqual(raw, self.data[4096:8192])
+
+    def test_incompressible_blocks_stored_raw(self):
+        args = make_pack_args(hamming=False, block_size=4096)
+        meta = main_mod.encode_file(self.path, args)
+        prefix = "<"
+        blocks = [Archive_Formats.BlockHeader.from_bytes(meta["data"], start, prefix)
+                  for start, _ in main_mod.iter_block_bounds(meta["data"], prefix)]
+
+        # текстовые блоки сжаты, случайный хвост хранится без Хаффмана и без таблицы длин
+        self.assertTrue(blocks[0].flags & Archive_Formats.F_HUFFMAN)
+        self.assertFalse(blocks[-1].flags & Archive_Formats.F_HUFFMAN)
+        self.assertEqual(blocks[-1].payload_size, blocks[-1].raw_size)
+        self.assertEqual(main_mod.decode_file(meta["data"], header_from_meta(meta)), self.data)
+
+    def test_parallel_blocks_match_sequential(self):
+        args = make_pack_args(block_size=2048, jobs=2)
+        sequential = main_mod.encode_file(self.path, args)
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            parallel = main_mod.encode_file(self.path, args, pool)
+            self.assertEqual(parallel["data"], sequential["data"])
+
+            decoded = main_mod.decode_file(parallel["data"], header_from_meta(parallel), 0, pool)
+        self.assertEqual(decoded, self.data)
+
+    def test_hamming_counts_returned_to_caller(self):
+        meta = main_mod.encode_file(self.path, make_pack_args())
+        corrupted = bytearray(meta["data"])
+        corrupted[100] ^= 0x10
+
+        # счётчики Хэмминга возвращаются вызывающему, кодек в stdout не пишет
+        errors = Counter()
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as out:
+            decoded = main_mod.decode_file(bytes(corrupted), header_from_meta(meta), errors=errors)
+        self.assertEqual(decoded, self.data)
+        self.assertEqual(errors, Counter(corrected=1, uncorrectable=0))
+        self.assertEqual(out.getvalue(), "")
+
+
+class TestArchiveWriter(unittest.TestCase):
+    """Потоковая запись архива (данные пишутся на диск сразу, DataTable и Header — в finalize)
+    и чтение через отображение в память."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.dir.name, "data.csv")
+        self.data = b"id,value,comment\n" * 300 + bytes(range(256))
+        with open(self.src, "wb") as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def pack(self, **overrides) -> str:
+        args = make_pack_args(output=os.path.join(self.dir.name, "out", "a.otik"), **overrides)
+        meta = main_mod.encode_file(self.src, args)
+        with ArchiveWriter(args, ["data.csv"]) as writer:
+            # данные уже в файле, в памяти писателя хранится только заголовок
+            writer.add_file("data.csv", meta)
+            self.assertIsNone(writer._entries[0][1])
+            writer.finalize()
+        return args.output
+
+    def test_streamed_archive_roundtrip(self):
+        for bytes_order in (0, 1):
+            path = self.pack(bytes_order=bytes_order)
+            reader = ArchiveReader(path)
+            header = reader.open()
+            self.assertEqual(header.file_count, 1)
+            self.assertTrue(reader.verify_data_crc())
+
+            (entry, payload), = reader.iter_files()
+            self.assertEqual(main_mod.decode_file(payload, entry, bytes_order), self.data)
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["a.otik"])
+
+    def test_mmap_reader_zero_copy(self):
+        path = self.pack()
+        with ArchiveReader(path) as reader:
+            (_, copied), = reader.iter_files()
+
+        with ArchiveReader(path, mmap=True) as reader:
+            reader.open()
+            self.assertTrue(reader.verify_data_crc())
+            (entry, view), = reader.iter_files()
+            self.assertIsInstance(view, memoryview)
+            self.assertEqual(view, copied)
+            self.assertEqual(main_mod.decode_file(view, entry), self.data)
+            del view
+        self.assertIsNone(reader._map)
+
+    def test_mmap_close_releases_slices(self):
+        path = os.path.join(self.dir.name, "m.otik")
+        main_mod.pack_archive(make_pack_args(input=[self.src], output=path, verbose=False, stats=False))
+
+        with ArchiveReader(path, mmap=True) as reader:
+            (_, view), = reader.iter_files()
+        # выданный срез освобождён вместе с отображением
+        self.assertIsNone(reader._map)
+        with self.assertRaises(ValueError):
+            bytes(view)
+
+        reader = ArchiveReader(path, mmap=True)
+        (_, view), = reader.iter_files()
+        derived = view[:16]
+        with self.assertRaises(BufferError):
+            reader.close()
+        self.assertIsNotNone(reader._map)
+        derived.release()
+        reader.close()
+        self.assertIsNone(reader._map)
+
+    def test_multi_file_archive_keeps_per_file_tables(self):
+        files = {"a.txt": b"aaaaab" * 500, "b.bin": bytes(range(256)) * 8, "empty": b""}
+        paths = []
+        for name, data in files.items():
+            paths.append(os.path.join(self.dir.name, name))
+            with open(paths[-1], "wb") as f:
+                f.write(data)
+
+        args = make_pack_args(input=paths, output=os.path.join(self.dir.name, "m.otik"), verbose=False, stats=False)
+        main_mod.pack_archive(args)
+
+        with ArchiveReader(args.output, mmap=True) as reader:
+            self.assertEqual(reader.open().file_count, len(files))
+            entries = list(reader.iter_files())
+            self.assertEqual([hdr.name for hdr, _ in entries], list(files))
+            self.assertNotEqual(entries[0][0].lengths_codes, entries[1][0].lengths_codes)
+            for hdr, payload in entries:
+                self.assertEqual(main_mod.decode_file(payload, hdr), files[hdr.name])
+
+    def test_get_reads_only_requested_entry(self):
+        other = os.path.join(self.dir.name, "other.bin")
+        with open(other, "wb") as f:
+            f.write(bytes(range(256)) * 4)
+        args = make_pack_args(input=[other, self.src], output=os.path.join(self.dir.name, "g.otik"),
+                              verbose=False, stats=False)
+        main_mod.pack_archive(args)
+
+        with ArchiveReader(args.output) as reader:
+            first = next(reader.iter_headers())
+        # портим данные первого файла: чтение второго не должно их касаться
+        with open(args.output, "r+b") as f:
+            f.seek(first.data_offset)
+            f.write(b"\xff" * 16)
+
+        with ArchiveReader(args.output, mmap=True) as reader:
+            self.assertEqual([hdr.name for hdr in reader.iter_headers()], ["other.bin", "data.csv"])
+            hdr, payload = reader.get("data.csv")
+            self.assertEqual(main_mod.decode_file(payload, hdr), self.data)
+            self.assertEqual([hdr.name for hdr, _ in reader.extract(["data.csv"])], ["data.csv"])
+            with self.assertRaises(ValueError):
+                reader.get("other.bin")
+            with self.assertRaises(KeyError):
+                reader.get("missing")
+            del payload
+
+    def test_index_section_lookup(self):
+        paths = []
+        for i in range(40):
+            paths.append(os.path.join(self.dir.name, f"f{i:02}.txt"))
+            with open(paths[-1], "wb") as f:
+                f.write(f"file {i}\n".encode() * (i + 1))
+        args = make_pack_args(input=paths, output=os.path.join(self.dir.name, "i.otik"), verbose=False, stats=False)
+        args.mode |= F_INDEX_TABLE
+        main_mod.pack_archive(args)
+
+        for mmap in (False, True):
+            with ArchiveReader(args.output, mmap=mmap) as reader:
+                header = reader.open()
+                self.assertNotEqual(header.index_section_offset, 0)
+                self.assertTrue(reader.verify_index())
+                self.assertTrue(reader.verify_data_crc())
+
+                hdr, payload = reader.get("f17.txt")
+                self.assertEqual(main_mod.decode_file(payload, hdr), b"file 17\n" * 18)
+                self.assertIsNone(reader.find("missing"))
+                # DataTable целиком не разбиралась
+                self.assertIsNone(reader._local_file_headers)
+                self.assertEqual(len(list(reader.iter_headers())), 40)
+                del payload
+
+    def test_index_lookup_resolves_hash_collisions(self):
+        paths = [os.path.join(self.dir.name, name) for name in ("a", "b", "c")]
+        for path in paths:
+            with open(path, "wb") as f:
+                f.write(os.path.basename(path).encode() * 10)
+        args = make_pack_args(input=paths, output=os.path.join(self.dir.name, "c.otik"), verbose=False, stats=False)
+        args.mode |= F_INDEX_TABLE
+
+        original = Archive_Formats._name_hash
+        Archive_Formats._name_hash = lambda name: 7     # все имена сталкиваются
+        try:
+            main_mod.pack_archive(args)
+            with ArchiveReader(args.output) as reader:
+                for name in ("a", "b", "c"):
+                    hdr, payload = reader.get(name)
+                    self.assertEqual(main_mod.decode_file(payload, hdr), name.encode() * 10)
+                self.assertIsNone(reader.find("d"))
+        finally:
+            Archive_Formats._name_hash = original
+
+    def test_parallel_pack_matches_sequential(self):
+        paths = []
+        for i in range(6):
+            paths.append(os.path.join(self.dir.name, f"log{i}.txt"))
+            with open(paths[-1], "wb") as f:
+                f.write(self.data[i * 500:])
+
+        archives = []
+        for jobs in (1, 2):
+            args = make_pack_args(input=paths, output=os.path.join(self.dir.name, f"p{jobs}.otik"),
+                                  jobs=jobs, verbose=False, stats=False)
+            main_mod.pack_archive(args)
+            with open(args.output, "rb") as f:
+                archives.append(f.read())
+        self.assertEqual(archives[0], archives[1])
+
+    def test_parallel_unpack_and_verify(self):
+        paths = []
+        for i in range(5):
+            paths.append(os.path.join(self.dir.name, f"log{i}.txt"))
+            with open(paths[-1], "wb") as f:
+                f.write(self.data[i * 700:])
+        archive = os.path.join(self.dir.name, "u.otik")
+        main_mod.pack_archive(make_pack_args(input=paths, output=archive, verbose=False, stats=False))
+
+        out_dir = os.path.join(self.dir.name, "out")
+        main_mod.unpack_archive(argparse.Namespace(input=archive, output=out_dir, jobs=2, verbose=False, only=None,
+                                                      chunk_size=1 << 20))
+        for path in paths:
+            with open(path, "rb") as src, open(os.path.join(out_dir, os.path.basename(path)), "rb") as dst:
+                self.assertEqual(src.read(), dst.read())
+
+        with ArchiveReader(archive) as reader:
+            headers = list(reader.iter_headers())
+        self.assertIsNone(main_mod.verify_entry(archive, headers[2], 0))
+
+        # портим данные третьего файла — проверка сообщает об ошибке только для него
+        with open(archive, "r+b") as f:
+            f.seek(headers[2].data_offset + 10)
+            f.write(b"\x00\xff")
+        errors = [main_mod.verify_entry(archive, hdr, 0) for hdr in headers]
+        self.assertEqual([error is None for error in errors], [True, True, False, True, True])
+
+    def test_append_keeps_existing_data(self):
+        archive = self.pack()
+        with open(archive, "rb") as f:
+            before = f.read()
+        with ArchiveReader(archive) as reader:
+            data_end = reader.open().get_data_section_end()
+
+        args = make_pack_args(hamming=False)
+        more = b"appended entry\n" * 50
+        with open(self.src, "wb") as f:
+            f.write(more)
+        with ArchiveWriter.open_for_append(archive, F_INDEX_TABLE) as writer:
+            self.assertTrue(writer.has_file("data.csv"))
+            writer.add_file("more.txt", main_mod.encode_file(self.src, args))
+            writer.finalize()
+
+        with open(archive, "rb") as f:
+            after = f.read()
+        # заголовок перезаписан, DataSection исходного архива — на месте
+        self.assertEqual(after[otik_meta_size:data_end], before[otik_meta_size:data_end])
+
+        with ArchiveReader(archive, mmap=True) as reader:
+            self.assertEqual(reader.open().file_count, 2)
+            self.assertTrue(reader.verify_data_crc())
+            self.assertTrue(reader.verify_index())
+            decoded = {hdr.name: main_mod.decode_file(data, hdr) for hdr, data in reader.iter_files()}
+            self.assertEqual(decoded, {"data.csv": self.data, "more.txt": more})
+
+    def test_append_to_stream_archive(self):
+        archive = os.path.join(self.dir.name, "s.otik")
+        args = make_pack_args(output="-")
+        out = io.BytesIO()
+        with ArchiveWriter(args, ["data.csv"], stream=out) as writer:
+            writer.add_file("data.csv", main_mod.encode_file(self.src, args, stream=True))
+            writer.finalize()
+        with open(archive, "wb") as f:
+            f.write(out.getvalue())
+
+        more = os.path.join(self.dir.name, "more.txt")
+        with open(more, "wb") as f:
+            f.write(b"appended entry\n" * 50)
+        main_mod.pack_archive(make_pack_args(input=[more], output=archive, append=True, verbose=False, stats=False))
+
+        with ArchiveReader(archive) as reader:
+            self.assertFalse(reader.open().flags & F_STREAM)
+            self.assertTrue(reader.verify_data_crc())
+
+        out_dir = os.path.join(self.dir.name, "out")
+        main_mod.unpack_archive(argparse.Namespace(input=archive, output=out_dir, jobs=1, verbose=False, only=None,
+                                                      chunk_size=1 << 20))
+        with open(os.path.join(out_dir, "data.csv"), "rb") as f:
+            self.assertEqual(f.read(), self.data)
+        with open(os.path.join(out_dir, "more.txt"), "rb") as f:
+            self.assertEqual(f.read(), b"appended entry\n" * 50)
+
+    def test_failed_append_leaves_archive_unchanged(self):
+        archive = self.pack()
+        with open(archive, "rb") as f:
+            before = f.read()
+
+        meta = main_mod.encode_file(self.src, make_pack_args())
+        with self.assertRaises(KeyError):
+            with ArchiveWriter.open_for_append(archive) as writer:
+                writer.add_file("copy.csv", meta)
+                writer.add_file("broken", {})
+        with open(archive, "rb") as f:
+            self.assertEqual(f.read(), before)
+
+    def test_dedup_stores_identical_files_once(self):
+        paths = []
+        for name, data in (("a.txt", self.data), ("b.txt", b"other"), ("c.txt", self.data)):
+            paths.append(os.path.join(self.dir.name, name))
+            with open(paths[-1], "wb") as f:
+                f.write(data)
+
+        sizes = {}
+        for dedup in (False, True):
+            args = make_pack_args(input=paths, output=os.path.join(self.dir.name, f"d{dedup}.otik"),
+                                  dedup=dedup, verbose=False, stats=False)
+            main_mod.pack_archive(args)
+            sizes[dedup] = os.path.getsize(args.output)
+
+        with ArchiveReader(args.output) as reader:
+            headers = {hdr.name: hdr for hdr in reader.iter_headers()}
+            self.assertEqual(headers["a.txt"].data_offset, headers["c.txt"].data_offset)
+            self.assertNotEqual(headers["a.txt"].data_offset, headers["b.txt"].data_offset)
+            hdr, payload = reader.get("c.txt")
+            self.assertEqual(main_mod.decode_file(payload, hdr), self.data)
+        self.assertLess(sizes[True], sizes[False])
+
+    def test_solid_archive_shares_one_model(self):
+        paths = []
+        for i in range(20):
+            paths.append(os.path.join(self.dir.name, f"s{i}.csv"))
+            with open(paths[-1], "wb") as f:
+                f.write(self.data[i * 50:i * 50 + 120])
+
+        sizes = {}
+        for solid in (False, True):
+            args = make_pack_args(input=paths, output=os.path.join(self.dir.name, f"s{solid}.otik"),
+                                  hamming=False, solid=solid, verbose=False, stats=False)
+            main_mod.pack_archive(args)
+            sizes[solid] = os.path.getsize(args.output)
+
+        with ArchiveReader(args.output) as reader:
+            self.assertTrue(reader.open().flags & F_SOLID)
+            self.assertTrue(reader.verify_data_crc())
+            for path, (hdr, payload) in zip(paths, reader.iter_files()):
+                self.assertFalse(hdr.has_code_table())
+                with open(path, "rb") as f:
+                    self.assertEqual(main_mod.decode_file(payload, hdr), f.read())
+            self.assertIsNotNone(reader.find("s7.csv"))
+        # 256-байтная таблица хранится один раз вместо двадцати
+        self.assertLess(sizes[True], sizes[False] - 19 * 256)
+
+    def test_solid_append_with_new_symbols(self):
+        archive = os.path.join(self.dir.name, "s.otik")
+        text = b"id,value,comment\n" * 300
+        base = os.path.join(self.dir.name, "base.csv")
+        with open(base, "wb") as f:
+            f.write(text)
+        main_mod.pack_archive(make_pack_args(input=[base], output=archive, hamming=False, solid=True,
+                                             verbose=False, stats=False))
+
+        # байтов 'X' и 0xFE нет в общей таблице архива
+        extra = os.path.join(self.dir.name, "extra.csv")
+        content = b"XXXX,\xfe\xfe\n" * 100 + text[:500]
+        with open(extra, "wb") as f:
+            f.write(content)
+        main_mod.pack_archive(make_pack_args(input=[extra], output=archive, hamming=False, solid=True, append=True,
+                                             verbose=False, stats=False))
+
+        with ArchiveReader(archive) as reader:
+            self.assertTrue(reader.open().flags & F_SOLID)
+            self.assertTrue(reader.verify_data_crc())
+            hdr, payload = reader.get("extra.csv")
+            # файл закодирован своей таблицей, хранящейся в записи DataTable
+            self.assertFalse(hdr.flags & F_SOLID)
+            self.assertTrue(hdr.has_code_table())
+            self.assertEqual(main_mod.decode_file(payload, hdr), content)
+            hdr, payload = reader.get("base.csv")
+            self.assertTrue(hdr.flags & F_SOLID)
+            self.assertEqual(main_mod.decode_file(payload, hdr), text)
+
+    def test_solid_append_prefers_own_table_for_other_distribution(self):
+        archive = os.path.join(self.dir.name, "s.otik")
+        main_mod.pack_archive(make_pack_args(input=[self.src], output=archive, hamming=False, solid=True,
+                                             verbose=False, stats=False))
+
+        # все символы есть в общей таблице, но у байтов 0x01..0x04 там длинные коды
+        random.seed(9)
+        extra = os.path.join(self.dir.name, "extra.bin")
+        content = bytes(random.choice(b"\x01\x02\x03\x04") for _ in range(20000))
+        with open(extra, "wb") as f:
+            f.write(content)
+        main_mod.pack_archive(make_pack_args(input=[extra], output=archive, hamming=False, solid=True, append=True,
+                                             verbose=False, stats=False))
+
+        with ArchiveReader(archive) as reader:
+            hdr, payload = reader.get("extra.bin")
+            self.assertFalse(hdr.flags & F_SOLID)
+            self.assertTrue(hdr.has_code_table())
+            # 2 бита на символ своей таблицей
+            self.assertLessEqual(hdr.compressed_size, len(content) // 4)
+            self.assertEqual(main_mod.decode_file(payload, hdr), content)
+
+    def test_large_file_is_chunked_and_streamed(self):
+        with mock.patch.object(main_mod, "WHOLE_FILE_MAX_SIZE", 1000):
+            args = make_pack_args(input=[self.src], output=os.path.join(self.dir.name, "l.otik"),
+                                  verbose=False, stats=False)
+            meta = main_mod.encode_file(self.src, args, stream=True)
+            self.assertTrue(meta["flags"] & F_BLOCKS)
+            self.assertIsNone(meta["compressed_size"])
+            self.assertNotIsInstance(meta["data"], bytes)
+            main_mod.pack_archive(args)
+
+        with ArchiveReader(args.output) as reader:
+            reader.open()
+            hdr = reader.find("data.csv")
+        self.assertTrue(hdr.flags & F_BLOCKS)
+        outpath = os.path.join(self.dir.name, "data.out")
+        size, errors = main_mod.unpack_entry(args.output, hdr, 0, outpath)
+        self.assertEqual(size, len(self.data))
+        self.assertEqual(errors["uncorrectable"], 0)
+        with open(outpath, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_chunked_pipeline_matches_whole_file(self):
+        for huffman, hamming, r in ((True, False, 4), (False, True, 4), (True, True, 4), (True, True, 3)):
+            whole = main_mod.encode_file(self.src, make_pack_args(huffman=huffman, hamming=hamming, r=r))
+            meta = main_mod.encode_file(self.src, make_pack_args(huffman=huffman, hamming=hamming, r=r, chunk_size=7),
+                                        stream=True)
+            data = b"".join(meta["data"])
+            self.assertEqual(data, whole["data"])
+            self.assertEqual(len(data), meta["compressed_size"])
+
+            hdr = header_from_meta(whole)
+            out = io.BytesIO()
+            self.assertEqual(main_mod.decode_to(out, data, hdr, chunk_size=5), len(self.data))
+            self.assertEqual(out.getvalue(), self.data)
+
+    def test_incompressible_file_stored_raw(self):
+        random.seed(8)
+        noise = bytes(random.getrandbits(8) for _ in range(3000))
+        path = os.path.join(self.dir.name, "noise.bin")
+        with open(path, "wb") as f:
+            f.write(noise)
+
+        for hamming in (False, True):
+            meta = main_mod.encode_file(path, make_pack_args(hamming=hamming))
+            hdr = header_from_meta(meta)
+            self.assertFalse(meta["flags"] & Archive_Formats.F_HUFFMAN)
+            self.assertFalse(hdr.has_code_table())
+            self.assertEqual(bool(meta["flags"] & Archive_Formats.F_HAMMING), hamming)
+            self.assertEqual(main_mod.decode_file(meta["data"], hdr), noise)
+
+        # сжимаемый файл по-прежнему кодируется Хаффманом
+        self.assertTrue(main_mod.encode_file(self.src, make_pack_args())["flags"] & Archive_Formats.F_HUFFMAN)
+
+    def test_prescan_skips_incompressible_files(self):
+        random.seed(9)
+        noise = bytes(random.getrandbits(8) for _ in range(100000))
+        path = os.path.join(self.dir.name, "photo.jpg")
+        with open(path, "wb") as f:
+            f.write(noise)
+
+        entropy, gain = main_mod.estimate_gain(path, sample_count=4, sample_size=4096)
+        self.assertGreater(entropy, 7.9)
+        self.assertLess(gain, main_mod.MIN_GAIN)
+        self.assertGreater(main_mod.estimate_gain(self.src)[1], 0.3)
+
+        # по выборкам Хаффман пропускается без подсчёта частот всего файла
+        with mock.patch.object(main_mod, "count_symbols", wraps=main_mod.count_symbols) as counted:
+            meta = main_mod.encode_file(path, make_pack_args(hamming=False))
+            self.assertFalse(counted.called)
+            self.assertFalse(meta["flags"] & Archive_Formats.F_HUFFMAN)
+            self.assertEqual(main_mod.decode_file(meta["data"], header_from_meta(meta)), noise)
+
+            # без порога решает точная проверка по частотам
+            meta = main_mod.encode_file(path, make_pack_args(hamming=False, min_gain=-1.0))
+            self.assertTrue(counted.called)
+            self.assertFalse(meta["flags"] & Archive_Formats.F_HUFFMAN)
+
+        meta = main_mod.encode_file(path, make_pack_args(hamming=False, block_size=8192))
+        self.assertFalse(meta["flags"] & Archive_Formats.F_HUFFMAN)
+        self.assertEqual(main_mod.decode_file(meta["data"], header_from_meta(meta)), noise)
+
+    def test_entry_sizes_are_64bit(self):
+        for prefix in ("<", ">"):
+            hdr = HeaderFile(name="big.bin", original_size=5 << 32, compressed_size=(5 << 32) + 7,
+                             data_offset=otik_meta_size, flags=F_BLOCKS)
+            blob = hdr.to_bytes(prefix)
+            fixed = Archive_Formats.FH_FIXED_SIZE
+            parsed = HeaderFile.from_bytes(blob[:fixed], blob[fixed:], prefix)
+            self.assertEqual((parsed.original_size, parsed.compressed_size), (5 << 32, (5 << 32) + 7))
+
+            entry = Archive_Formats.IndexEntry(original_size=5 << 32, compressed_size=6 << 32)
+            self.assertEqual(Archive_Formats.IndexEntry.from_bytes(entry.to_bytes(prefix), 0, prefix), entry)
+
+    def test_stream_archive_one_pass(self):
+        class Pipe(io.BytesIO):
+            """Поток без перемотки, как stdout/stdin в конвейере."""
+            def seekable(self):
+                return False
+            def seek(self, *args):
+                raise io.UnsupportedOperation("seek")
+
+        names = ["data.csv", "stdin.log", "empty.bin"]
+        empty = os.path.join(self.dir.name, "empty.bin")
+        open(empty, "wb").close()
+
+        for bytes_order in (0, 1):
+            args = make_pack_args(output="-", bytes_order=bytes_order, index_table=True)
+            args.mode |= F_INDEX_TABLE
+            out = Pipe()
+            with ArchiveWriter(args, names, stream=out) as writer, \
+                    mock.patch.object(main_mod.sys, "stdin", mock.Mock(buffer=io.BytesIO(self.data[::-1]))):
+                writer.add_file("data.csv", main_mod.encode_file(self.src, args, stream=True))
+                writer.add_file("stdin.log", main_mod.encode_file("-", args, stream=True))
+                writer.add_file("empty.bin", main_mod.encode_file(empty, args, stream=True))
+                writer.finalize()
+            expected = {"data.csv": self.data, "stdin.log": self.data[::-1], "empty.bin": b""}
+
+            # чтение потока за один проход
+            reader = ArchiveStreamReader(Pipe(out.getvalue()), chunk_size=100)
+            self.assertTrue(reader.open().flags & F_STREAM)
+            for hdr, chunks in reader.iter_entries():
+                raw = b"".join(main_mod.iter_decoded_stream(chunks, hdr, bytes_order))
+                self.assertEqual(raw, expected[hdr.name])
+            headers = reader.finish()
+            self.assertEqual([hdr.original_size for hdr in headers], [len(expected[name]) for name in names])
+
+            # тот же архив в файле читается с заголовком из трейлера
+            path = os.path.join(self.dir.name, "s.otik")
+            with open(path, "wb") as f:
+                f.write(out.getvalue())
+            with ArchiveReader(path, mmap=True) as file_reader:
+                file_reader.open()
+                self.assertTrue(file_reader.verify_data_crc())
+                self.assertTrue(file_reader.verify_index())
+                for name in names:
+                    hdr, payload = file_reader.get(name)
+                    self.assertEqual(main_mod.decode_file(payload, hdr, bytes_order), expected[name])
+
+            # обрезанный поток не проходит проверку
+            reader = ArchiveStreamReader(Pipe(out.getvalue()[:-10]))
+            for _ in reader.iter_entries():
+                pass
+            with self.assertRaises(ImportError):
+                reader.finish()
+
+    def test_abort_removes_temp_file(self):
+        args = make_pack_args(output=os.path.join(self.dir.name, "b.otik"))
+        with self.assertRaises(KeyError):
+            with ArchiveWriter(args, ["data.csv"]) as writer:
+                writer.add_file("data.csv", {})
+        self.assertEqual(os.listdir(self.dir.name), ["data.csv"])
+
+
 if __name__ == "__main__":
     # Запуск тестов командой: python -m unittest -v test_archiver.py
     unittest.main(verbosity=2)
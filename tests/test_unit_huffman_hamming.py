@@ -59,6 +59,115 @@ class TestHuffmanInternals(unittest.TestCase):
 
         self.assertEqual(decoded, data)
 
+    def test_decode_long_codes_with_subtables(self):
+        # Частоты Фибоначчи дают коды длиннее LOOKUP_BITS → работают подтаблицы
+        fib = [1, 1]
+        while len(fib) < 20:
+            fib.append(fib[-1] + fib[-2])
+        data = b"".join(bytes([sym]) * f for sym, f in enumerate(fib))
+
+        h = Huffman()
+        packed, lengths_bytes, padding = h.pack(data)
+        self.assertGreater(max(lengths_bytes), LOOKUP_BITS)
+
+        decoded = Huffman().unpack(packed, lengths_bytes, padding)
+        self.assertEqual(decoded, data)
+
+    def test_encode_matches_bitwise_reference(self):
+        # Вход больше PAIR_TABLE_MIN_INPUT и нечётной длины: парный путь + хвост
+        random.seed(7)
+        data = bytes(random.choice(b"AAAABBBCCDEFGH\x00\xff") for _ in range(PAIR_TABLE_MIN_INPUT + 13))
+
+        h = Huffman()
+        packed, lengths_bytes, padding = h.pack(data)
+
+        bits = []
+        for b in data:
+            code, l = h.canonical_codes[b]
+            byte_to_bits(bits, code, l)
+        self.assertEqual(packed, bits_to_bytes(bits))
+        self.assertEqual(padding, (8 - len(bits) % 8) % 8)
+
+    def test_max_code_len_limits_lengths(self):
+        # Частоты Фибоначчи без ограничения дают коды длиной до 29 бит
+        fib = [1, 1]
+        while len(fib) < 30:
+            fib.append(fib[-1] + fib[-2])
+        data = b"".join(bytes([sym]) * f for sym, f in enumerate(fib[:24]))
+
+        for max_len in (5, 8, MAX_CODE_LEN):
+            h = Huffman(max_len)
+            packed, lengths_bytes, padding = h.pack(data)
+            self.assertLessEqual(max(lengths_bytes), max_len)
+            # неравенство Крафта выполняется с равенством — код полный
+            self.assertEqual(sum(2 ** -l for l in lengths_bytes if l), 1.0)
+            self.assertEqual(Huffman().unpack(packed, lengths_bytes, padding), data)
+
+        with self.assertRaises(ValueError):
+            Huffman(4).pack(data)
+        with self.assertRaises(ValueError):
+            Huffman(MAX_CODE_LEN_LIMIT + 1)
+
+    def test_corrupted_lengths_table_is_rejected(self):
+        too_long = bytearray(256)
+        too_long[0], too_long[1] = 1, MAX_CODE_LEN_LIMIT + 1
+        # три кода длины 1 — префиксного кода с такими длинами нет
+        over_kraft = bytearray(256)
+        over_kraft[0] = over_kraft[1] = over_kraft[2] = 1
+
+        for table in (bytes(too_long), bytes(over_kraft)):
+            with self.assertRaises(ValueError):
+                Huffman().unpack(b"\x00" * 4, table, 0)
+            with self.assertRaises(ValueError):
+                list(Huffman().iter_unpack([b"\x00" * 4], table, 32))
+
+    def test_truncated_stream_is_rejected(self):
+        random.seed(5)
+        data = bytes(random.choice(b"AAAABBBCCDEFGH") for _ in range(5000))
+        packed, lengths_bytes, padding = Huffman().pack(data)
+        total_bits = len(packed) * 8 - padding
+
+        with self.assertRaises(ValueError):
+            Huffman().unpack(packed[:len(packed) // 2], lengths_bytes, padding)
+        with self.assertRaises(ValueError):
+            list(Huffman().iter_unpack([packed[:100], packed[100:-1]], lengths_bytes, total_bits))
+        # последний код не помещается в заявленные биты
+        with self.assertRaises(ValueError):
+            Huffman().unpack(packed, lengths_bytes, padding + 1)
+        self.assertEqual(b"".join(Huffman().iter_unpack([packed[:100], packed[100:]], lengths_bytes, total_bits)), data)
+
+    def test_entropy_estimate_is_lower_bound(self):
+        random.seed(3)
+        for data in (b"AAAAABBBCCD" * 50, bytes(random.getrandbits(8) for _ in range(4000)), bytes(range(256)) * 4):
+            h = Huffman()
+            freqs = h.count(data)
+            h.build_table(freqs)
+            self.assertLessEqual(Huffman.estimate_size(freqs), h.encoded_size(freqs)[0])
+        self.assertEqual(Huffman.entropy(Counter(bytes(range(256)))), 8.0)
+        self.assertEqual(Huffman.entropy(Counter()), 0.0)
+
+    def test_table_does_not_depend_on_counter_order(self):
+        random.seed(12)
+        for _ in range(20):
+            freqs = Counter({sym: random.choice((1, 2, 3, 5, 8)) for sym in random.sample(range(256), 40)})
+            shuffled = Counter(dict(random.sample(list(freqs.items()), len(freqs))))
+            self.assertEqual(Huffman().build_table(shuffled), Huffman().build_table(freqs))
+
+    @unittest.skipIf(np is None, "NumPy не установлен")
+    def test_numpy_encode_is_byte_identical(self):
+        random.seed(11)
+        datasets = [bytes(random.choice(b"ABCDEFGH\x00\x01\xfe") for _ in range(NUMPY_MIN_INPUT + 5))]
+        # скошенные распределения; редкие символы с равными частотами встречаются первыми, по убыванию
+        for _ in range(5):
+            alphabet = random.sample(range(256), random.randint(3, 60))
+            weights = [random.choice((1, 1, 2, 4)) for _ in alphabet]
+            rare = sorted(set(range(256)) - set(alphabet), reverse=True)[:random.randint(3, 9)]
+            datasets.append(bytes(rare) + bytes(random.choices(alphabet, weights, k=NUMPY_MIN_INPUT + 99)))
+
+        for data in datasets:
+            expected = Huffman(use_numpy=False).pack(data)
+            self.assertEqual(Huffman(use_numpy=True).pack(data), expected)
+
 
 # ======================================================================
 #                        UNIT TESTS FOR HEMMING
@@ -120,6 +229,64 @@ class TestHammingInternals(unittest.TestCase):
 
         self.assertEqual(uncorrectable, 1)
 
+    def test_pack_matches_parity_matrix(self):
+        # Эталон: покомпонентное умножение на строки H по спискам бит
+        random.seed(21)
+        for r in (3, 4, 5):
+            ham = Hamming(r)
+            data = bytes(random.getrandbits(8) for _ in range(3 * ham.k + 5))
+
+            bits = bytes_to_bits(data)
+            bits += [0] * ((ham.k - len(bits) % ham.k) % ham.k)
+            expected = []
+            for i in range(0, len(bits), ham.k):
+                block = bits[i:i + ham.k]
+                parity = [sum(b & h for b, h in zip(block, row)) & 1 for row in ham.H]
+                expected += block + parity + [(sum(block) + sum(parity)) & 1]
+
+            encoded, padding = ham.pack(data)
+            self.assertEqual(encoded, bits_to_bytes(expected))
+            self.assertEqual(padding, (ham.k - len(data) * 8 % ham.k) % ham.k)
+
+    def test_syndrome_table_corrects_every_data_bit(self):
+        ham = Hamming(4)
+        block = 0b10110011101
+        word = ham._encode_word(block)
+
+        self.assertEqual(ham._decode_word(word), (block, OK))
+        # ошибка в любом бите слова (информационном, контрольном, общем) исправляется одним XOR
+        for bit in range(ham.n):
+            self.assertEqual(ham._decode_word(word ^ (1 << bit)), (block, CORRECTED))
+        # двойная ошибка в информационных битах обнаруживается
+        _, status = ham._decode_word(word ^ (1 << (ham.n - 1)) ^ (1 << (ham.n - 3)))
+        self.assertEqual(status, UNCORRECTABLE)
+
+    def test_single_error_in_any_bit_is_corrected(self):
+        random.seed(8)
+        for r in (3, 4, 5):
+            ham = Hamming(r)
+            data = bytes(random.getrandbits(8) for _ in range(2 * ham.k))
+            encoded, padding = ham.pack(data)
+            bits = bytes_to_bits(encoded)
+
+            # ошибка в каждом из n бит первого кодового слова, включая контрольные и общий
+            for pos in range(ham.n):
+                corrupted = list(bits)
+                corrupted[pos] ^= 1
+                decoded, corrected, uncorrectable = ham.unpack(bits_to_bytes(corrupted), padding)
+                self.assertEqual(decoded, data, f"r={r}, bit {pos}")
+                self.assertEqual((corrected, uncorrectable), (1, 0))
+
+    def test_lookup_tables_cached_and_consistent(self):
+        first, second = Hamming(4), Hamming(4)
+        self.assertIs(first._decode_table(), second._decode_table())
+        self.assertIsNone(Hamming(5)._encode_table())  # 2^32 слов не помещается
+
+        table = first._decode_table()
+        random.seed(4)
+        for word in random.sample(range(1 << first.n), 200):
+            self.assertEqual(table[word], first._decode_word(word))
+
 
 # ======================================================================
 #                        UNIT TESTS FOR UTILS
@@ -145,6 +312,36 @@ class TestUtils(unittest.TestCase):
         back = bytes_to_bits(out)
         self.assertEqual(back, bits)
 
+    def test_bit_writer_reader_roundtrip(self):
+        rnd = random.Random(10)
+        fields = [(rnd.getrandbits(w), w) for w in (rnd.randint(1, 70) for _ in range(500))]
+
+        writer = BitWriter()
+        for value, width in fields:
+            writer.write(value, width)
+        writer.write_bytes(b"\x12\x34")
+        total = writer.bit_length
+        padding = writer.align()
+        data = writer.getvalue()
+
+        self.assertEqual((total + padding) % 8, 0)
+        self.assertEqual(len(data) * 8, total + padding)
+        self.assertEqual(data, bits_to_bytes(bytes_to_bits(data)))
+
+        reader = BitReader(data)
+        for value, width in fields:
+            self.assertEqual(reader.peek(width), value)
+            self.assertEqual(reader.read(width), value)
+        self.assertEqual(reader.read(16), 0x1234)
+        self.assertEqual(reader.bits_consumed, total)
+
+    def test_bit_reader_aligned_bytes(self):
+        reader = BitReader(b"\xab\xcd\xef\x01", bit_offset=8)
+        self.assertEqual(reader.read(8), 0xcd)
+        self.assertEqual(bytes(reader.read_bytes(2)), b"\xef\x01")
+        self.assertEqual(bytes(reader.read_bytes(2)), b"\x00\x00")
+        self.assertEqual(reader.read(4), 0)
+
 
 if __name__ == "__main__":
     unittest.main()